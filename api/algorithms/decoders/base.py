@@ -0,0 +1,61 @@
+import numpy as np
+from typing import Generator
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.common.utils.os import path_exists
+from api.models.videos import VideoOptimalSize, VideoSegment
+
+
+class BaseVideoDecoder:
+    """
+    Base class for video decoders. A decoder yields the frames to analyze, already sampled and resized.
+    """
+
+    _video_settings: VideoAnalyzerSettings
+    """
+    The video settings for the analyzer.
+    """
+
+    _frame_size: VideoOptimalSize
+    """
+    The size of the decoded frames.
+    """
+
+    _discarded_frames: int
+    """
+    The number of frames to discard after each analyzed frame.
+    """
+
+    _segment: VideoSegment | None
+    """
+    The segment of the video to decode (`None` to decode the whole video).
+    """
+
+
+    def __init__(
+        self,
+        video_settings: VideoAnalyzerSettings,
+        frame_size: VideoOptimalSize,
+        discarded_frames: int,
+        segment: VideoSegment | None = None
+    ):
+        self._video_settings = video_settings
+        self._frame_size = frame_size
+        self._discarded_frames = discarded_frames
+        self._segment = segment
+
+
+    def read_frames(self) -> Generator[np.ndarray, None, None]:
+        """
+        Read the frames from the video one at a time (BGR, resized to the frame size).
+        """
+        raise NotImplementedError("Must be implemented in a child class")
+
+
+    def _get_video_path(self) -> str:
+        """
+        Get the video path, validating that the file exists.
+        """
+        video_path = self._video_settings.metadata.video_path
+        if not path_exists(video_path):
+            raise FileNotFoundError(f"File not found: '{video_path}'")
+        return video_path
@@ -0,0 +1,25 @@
+from api.algorithms.decoders.base import BaseVideoDecoder
+from api.algorithms.decoders.ffmpeg import FFmpegDecoder
+from api.algorithms.decoders.videogear import VideoGearDecoder
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.common.constants.video import VideoDecoder
+from api.models.videos import VideoOptimalSize, VideoSegment
+
+
+def get_video_decoder(
+    video_settings: VideoAnalyzerSettings,
+    frame_size: VideoOptimalSize,
+    discarded_frames: int,
+    segment: VideoSegment | None = None
+) -> BaseVideoDecoder:
+    """
+    Returns a video decoder by the strategy configured in the video settings.
+    If a segment is given, only the frames of the segment are decoded.
+    """
+    decoder = video_settings.decoder
+    if decoder == VideoDecoder.VIDEOGEAR:
+        return VideoGearDecoder(video_settings, frame_size, discarded_frames, segment)
+    elif decoder == VideoDecoder.FFMPEG:
+        return FFmpegDecoder(video_settings, frame_size, discarded_frames, video_settings.keyframes_only, segment)
+    else:
+        raise Exception(f"Invalid video decoder: {decoder}")
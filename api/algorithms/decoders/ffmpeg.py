@@ -0,0 +1,112 @@
+import logging
+import ffmpeg
+import numpy as np
+from typing import Generator
+from api.algorithms.decoders.base import BaseVideoDecoder
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.models.videos import VideoOptimalSize, VideoSegment
+
+
+logger = logging.getLogger(__name__)
+
+class FFmpegDecoder(BaseVideoDecoder):
+    """
+    Decoder based on FFmpeg filters. Frames are sampled (`select`) and resized (`scale`) by FFmpeg,
+    so only the frames to analyze are sent to Python as raw BGR video through a pipe.
+    """
+
+    _keyframes_only: bool
+    """
+    Flag indicating if only the keyframes should be decoded.
+    """
+
+
+    def __init__(
+        self,
+        video_settings: VideoAnalyzerSettings,
+        frame_size: VideoOptimalSize,
+        discarded_frames: int,
+        keyframes_only: bool = False,
+        segment: VideoSegment | None = None
+    ):
+        super().__init__(video_settings, frame_size, discarded_frames, segment)
+        self._keyframes_only = keyframes_only
+
+
+    def read_frames(self) -> Generator[np.ndarray, None, None]:
+        width = self._frame_size.width
+        height = self._frame_size.height
+        frame_bytes = width * height * 3
+
+        process = self._build_stream().run_async(pipe_stdout=True, pipe_stderr=True)
+        completed = False
+        try:
+            while True:
+                # Read each raw frame from the pipe
+                buffer = bytearray(frame_bytes)
+                read_bytes = process.stdout.readinto(buffer)
+                if read_bytes < frame_bytes:
+                    completed = True
+                    break
+                yield np.frombuffer(buffer, dtype=np.uint8).reshape((height, width, 3))
+        finally:
+            process.stdout.close()
+            if not completed:
+                process.kill()
+            _, err = process.communicate()
+            if completed and process.returncode != 0:
+                logger.error('Error occurred while decoding video: %s', err.decode('utf-8'))
+                raise ffmpeg.Error('ffmpeg', None, err)
+
+
+    def _build_stream(self):
+        """
+        Build the FFmpeg filter graph used to decode the video.
+        """
+        video_path = self._get_video_path()
+        start_time, end_time = self._get_segment_times()
+
+        # Seek to the start of the segment, keeping the original timestamps
+        input_args = {"ss": start_time} if start_time is not None else {}
+        if self._keyframes_only:
+            # Skip the non-key frames in the decoder itself
+            stream = ffmpeg.input(video_path, skip_frame="nokey", **input_args)
+        else:
+            stream = ffmpeg.input(video_path, **input_args)
+
+        # Keep only the frames of the segment
+        if start_time is not None or end_time is not None:
+            trim_args = {}
+            if start_time is not None:
+                trim_args["start"] = start_time
+            if end_time is not None:
+                trim_args["end"] = end_time
+            stream = stream.filter("trim", **trim_args)
+
+        if not self._keyframes_only and self._discarded_frames > 0:
+            # Discard `discarded_frames` frames and keep the next one
+            step = self._discarded_frames + 1
+            stream = stream.filter("select", f"eq(mod(n,{step}),{step - 1})")
+
+        stream = stream.filter("scale", self._frame_size.width, self._frame_size.height, flags="bilinear")
+        return stream\
+            .output("pipe:", format="rawvideo", pix_fmt="bgr24", fps_mode="passthrough")\
+            .global_args("-loglevel", "error", "-nostdin", "-copyts")
+
+
+    def _get_segment_times(self) -> tuple[float | None, float | None]:
+        """
+        Get the timestamps where the segment starts and ends (`None` for the beginning and the end of the video).
+        If the segment has no timestamps, they are estimated from the frame rate, half a frame before each boundary.
+        """
+        segment = self._segment
+        if segment is None:
+            return None, None
+        fps = self._video_settings.metadata.avg_fps
+        start_time = segment.start_time
+        if start_time is None and segment.start_frame > 0:
+            start_time = (segment.start_frame - 0.5) / fps
+        end_time = segment.end_time
+        if end_time is None and segment.end_frame is not None:
+            end_time = (segment.end_frame - 0.5) / fps
+        return start_time, end_time
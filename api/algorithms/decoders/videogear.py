@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+from typing import Generator
+from vidgear.gears import VideoGear
+from api.algorithms.decoders.base import BaseVideoDecoder
+
+
+class VideoGearDecoder(BaseVideoDecoder):
+    """
+    Decoder based on VideoGear. Every frame is decoded at full size and sampled/resized in Python.
+    VideoGear cannot seek, so the frames before the start of a segment are decoded and skipped.
+    A video split in K segments decodes about (K + 1) / 2 times its N frames (O(K·N)), so segmented analyses should use the FFmpeg decoder.
+    """
+
+    def read_frames(self) -> Generator[np.ndarray, None, None]:
+        video_path = self._get_video_path()
+
+        # Initialize the video capture object
+        video = VideoGear(source=video_path) # type: ignore
+        stream = video.start() 
+
+        start_frame = self._segment.start_frame if self._segment is not None else 0
+        end_frame = self._segment.end_frame if self._segment is not None else None
+
+        try:
+            # Skip the frames before the segment
+            for _ in range(start_frame):
+                if stream.read() is None:
+                    return
+
+            skipped_frames = 0
+            position = start_frame
+            while end_frame is None or position < end_frame:
+                # Read each frame from the video
+                frame = stream.read()
+                if frame is None:
+                    break
+                position += 1
+
+                # Validate skipped frames
+                if skipped_frames < self._discarded_frames:
+                    skipped_frames += 1
+                    continue
+                else:
+                    skipped_frames = 0
+
+                # Resize the frame
+                yield cv2.resize(frame, (
+                    self._frame_size.width,
+                    self._frame_size.height
+                ))
+        finally:
+            stream.stop()
@@ -0,0 +1,14 @@
+import numpy as np
+
+
+class BaseEmotionClassifier:
+    """
+    Base class for the inference backends of the emotion classification model.
+    """
+
+    def predict(self, faces: np.ndarray) -> np.ndarray:
+        """
+        Predict the emotions of a batch of grayscale faces (`float32` array with shape `(n, 48, 48, 1)`).
+        Returns the confidence of each emotion in `EMOTION_TYPES` (`float32` array with shape `(n, 7)`).
+        """
+        raise NotImplementedError("Must be implemented in a child class")
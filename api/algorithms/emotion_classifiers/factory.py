@@ -0,0 +1,19 @@
+from api.algorithms.emotion_classifiers.base import BaseEmotionClassifier
+from api.algorithms.emotion_classifiers.keras import KerasEmotionClassifier
+from api.algorithms.emotion_classifiers.opencv import OpenCVEmotionClassifier
+from api.algorithms.emotion_classifiers.tflite import TFLiteEmotionClassifier
+from api.common.constants.emotions import VALID_EMOTIONS_INFERENCE_BACKENDS, EmotionsInferenceBackend
+
+
+def get_emotion_classifier(backend: str) -> BaseEmotionClassifier:
+    """
+    Returns an emotion classifier by inference backend.
+    """
+    if backend == EmotionsInferenceBackend.KERAS:
+        return KerasEmotionClassifier()
+    elif backend == EmotionsInferenceBackend.TFLITE:
+        return TFLiteEmotionClassifier()
+    elif backend == EmotionsInferenceBackend.OPENCV:
+        return OpenCVEmotionClassifier()
+    else:
+        raise ValueError(f"Invalid inference backend: {backend} (use one of: {', '.join(VALID_EMOTIONS_INFERENCE_BACKENDS)})")
@@ -0,0 +1,24 @@
+import numpy as np
+from typing import Any
+from api.algorithms.emotion_classifiers.base import BaseEmotionClassifier
+from api.algorithms.model_registry import keras_emotion_classifier
+
+
+class KerasEmotionClassifier(BaseEmotionClassifier):
+    """
+    Emotion classifier running the Keras model.
+    """
+
+    _model: Any
+    """
+    The Keras model (shared by all the classifiers).
+    """
+
+
+    def __init__(self):
+        self._model = keras_emotion_classifier.get()
+
+
+    def predict(self, faces: np.ndarray) -> np.ndarray:
+        # Calling the model directly avoids the per-call overhead of `predict` for small batches
+        return np.asarray(self._model(faces, training=False), dtype=np.float32)
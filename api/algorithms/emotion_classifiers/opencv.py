@@ -0,0 +1,24 @@
+import numpy as np
+from typing import Any
+from api.algorithms.emotion_classifiers.base import BaseEmotionClassifier
+from api.algorithms.model_registry import create_onnx_emotion_net
+
+
+class OpenCVEmotionClassifier(BaseEmotionClassifier):
+    """
+    Emotion classifier running the ONNX graph exported from the Keras model with OpenCV DNN.
+    """
+
+    _net: Any
+    """
+    The OpenCV DNN network (one for each classifier, networks are not thread-safe).
+    """
+
+
+    def __init__(self):
+        self._net = create_onnx_emotion_net()
+
+
+    def predict(self, faces: np.ndarray) -> np.ndarray:
+        self._net.setInput(np.ascontiguousarray(faces, dtype=np.float32))
+        return np.asarray(self._net.forward(), dtype=np.float32).reshape(len(faces), -1)
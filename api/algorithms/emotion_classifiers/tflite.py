@@ -0,0 +1,48 @@
+import numpy as np
+from typing import Any
+from api.algorithms.emotion_classifiers.base import BaseEmotionClassifier
+from api.algorithms.model_registry import create_tflite_emotion_interpreter
+
+
+class TFLiteEmotionClassifier(BaseEmotionClassifier):
+    """
+    Emotion classifier running the TensorFlow Lite model.
+    """
+
+    _interpreter: Any
+    """
+    The TensorFlow Lite interpreter (one for each classifier, interpreters are not thread-safe).
+    """
+
+    _input_index: int
+    """
+    The index of the input tensor.
+    """
+
+    _output_index: int
+    """
+    The index of the output tensor.
+    """
+
+    _batch_size: int
+    """
+    The batch size of the allocated tensors.
+    """
+
+
+    def __init__(self):
+        self._interpreter = create_tflite_emotion_interpreter()
+        self._input_index = self._interpreter.get_input_details()[0]["index"]
+        self._output_index = self._interpreter.get_output_details()[0]["index"]
+        self._batch_size = int(self._interpreter.get_input_details()[0]["shape"][0])
+
+
+    def predict(self, faces: np.ndarray) -> np.ndarray:
+        # Reallocate the tensors only when the batch size changes (e.g. the last chunk of a video)
+        if len(faces) != self._batch_size:
+            self._interpreter.resize_tensor_input(self._input_index, faces.shape)
+            self._interpreter.allocate_tensors()
+            self._batch_size = len(faces)
+        self._interpreter.set_tensor(self._input_index, np.ascontiguousarray(faces, dtype=np.float32))
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output_index).copy()
@@ -10,6 +10,19 @@ def __mid_line_distance(p1 ,p2, p3, p4):
     return np.linalg.norm(p5 - p6)
 
 
+def landmarks_to_array(landmarks) -> np.ndarray:
+    """
+    Convert the 68 face landmarks predicted by Dlib (`full_object_detection`) to a `(68, 2)` integer numpy array
+    with the coordinates (x, y) of each point, so the eyes can be sliced without reading each point again.
+    """
+    points = landmarks.parts()
+    return np.fromiter(
+        (coordinate for point in points for coordinate in (point.x, point.y)),
+        dtype=np.int32,
+        count=2 * len(points)
+    ).reshape(-1, 2)
+
+
 def original_ear(eye_landmarks: np.ndarray) -> float:
     """
     Compute the eye aspect ratio (EAR) given the eye landmarks (original version).
@@ -52,3 +65,49 @@ def optimized_ear(eye_landmarks: np.ndarray) -> float:
     # Use the euclidean distance to compute the aspect ratio
     ear = float(A / B)
     return ear
+
+
+def __check_eyes_shape(eyes_landmarks: np.ndarray) -> None:
+    if eyes_landmarks.ndim < 2 or eyes_landmarks.shape[-2:] != (6, 2):
+        raise ValueError("The eye landmarks must have 6 points.")
+
+
+def original_ear_array(eyes_landmarks: np.ndarray) -> np.ndarray:
+    """
+    Compute the eye aspect ratio (EAR) of many eyes at once (original version).
+
+    Parameters:
+        - eyes_landmarks: Array with shape `(..., 6, 2)` with the landmarks of each eye (e.g. `(2, 6, 2)` for both eyes of a face,
+          or `(frames, 2, 6, 2)` for many frames).
+
+    Returns an array with shape `(...)` with the EAR of each eye.
+    """
+    __check_eyes_shape(eyes_landmarks)
+    points = eyes_landmarks.astype(np.float64)
+
+    # Euclidean distances between the vertical points (P2-P6, P3-P5) and the horizontal points (P1-P4)
+    A = np.hypot(*np.moveaxis(points[..., 1, :] - points[..., 5, :], -1, 0))
+    B = np.hypot(*np.moveaxis(points[..., 2, :] - points[..., 4, :], -1, 0))
+    C = np.hypot(*np.moveaxis(points[..., 0, :] - points[..., 3, :], -1, 0))
+    return (A + B) / (2.0 * C)
+
+
+def optimized_ear_array(eyes_landmarks: np.ndarray) -> np.ndarray:
+    """
+    Compute the eye aspect ratio (EAR) of many eyes at once (optimized version).
+
+    Parameters:
+        - eyes_landmarks: Array with shape `(..., 6, 2)` with the landmarks of each eye (e.g. `(2, 6, 2)` for both eyes of a face,
+          or `(frames, 2, 6, 2)` for many frames).
+
+    Returns an array with shape `(...)` with the EAR of each eye.
+    """
+    __check_eyes_shape(eyes_landmarks)
+    points = eyes_landmarks.astype(np.float64)
+
+    # Midpoints of the upper (P2, P3) and lower (P6, P5) lids, truncated to integer coordinates as in `optimized_ear`
+    upper = np.trunc((points[..., 1, :] + points[..., 2, :]) / 2)
+    lower = np.trunc((points[..., 5, :] + points[..., 4, :]) / 2)
+    A = np.hypot(*np.moveaxis(upper - lower, -1, 0))
+    B = np.hypot(*np.moveaxis(points[..., 0, :] - points[..., 3, :], -1, 0))
+    return A / B
@@ -0,0 +1,39 @@
+from api.algorithms.frame_context import FaceBox, FrameBatch, FrameContext
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+
+
+class BaseFaceDetector:
+    """
+    Base class for the face detectors used by the shared face detection stage.
+    """
+
+    _video_settings: VideoAnalyzerSettings
+    """
+    The video settings for the analyzer.
+    """
+
+
+    def __init__(self, video_settings: VideoAnalyzerSettings):
+        self._video_settings = video_settings
+
+
+    def reset_state(self) -> None:
+        """
+        Reset the detector state.
+        """
+        pass
+
+
+    def detect(self, context: FrameContext) -> FaceBox | None:
+        """
+        Detect the first face in the frame.
+        """
+        raise NotImplementedError("Must be implemented in a child class")
+
+
+    def detect_batch(self, batch: FrameBatch) -> list[FaceBox | None]:
+        """
+        Detect the first face in each frame of the batch.
+        Child classes can override it to process the whole batch in a single call.
+        """
+        return [self.detect(context) for context in batch]
@@ -0,0 +1,24 @@
+from api.algorithms.face_detectors.base import BaseFaceDetector
+from api.algorithms.face_detectors.hog import HogFaceDetector
+from api.algorithms.face_detectors.ssd import SsdFaceDetector
+from api.algorithms.face_detectors.tracking import TrackingFaceDetector
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.common.constants.face_detection import FaceDetector
+
+
+def get_face_detector(face_detector: str, video_settings: VideoAnalyzerSettings) -> BaseFaceDetector:
+    """
+    Returns a face detector by name.
+    If `face_detection_interval` is greater than `1`, the face is tracked between the detections.
+    """
+    detector: BaseFaceDetector
+    if face_detector == FaceDetector.HOG:
+        detector = HogFaceDetector(video_settings)
+    elif face_detector == FaceDetector.SSD:
+        detector = SsdFaceDetector(video_settings)
+    else:
+        raise Exception(f"Invalid face detector: {face_detector}")
+
+    if video_settings.face_detection_interval > 1:
+        return TrackingFaceDetector(video_settings, detector)
+    return detector
@@ -0,0 +1,49 @@
+import cv2
+from typing import Any
+from api.algorithms.face_detectors.base import BaseFaceDetector
+from api.algorithms.frame_context import FaceBox, FrameContext
+from api.algorithms.model_registry import hog_face_detector
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+
+
+class HogFaceDetector(BaseFaceDetector):
+    """
+    Face detector based on Dlib's HOG frontal face detector (runs on the grayscale plane).
+    The plane can be downscaled before the detection (`face_detection_scale`), since the cost of the detector grows with
+    the number of pixels and only a coarse box is needed. The box is mapped back to the analysis resolution,
+    so the pipes still use the full resolution frame (e.g. for the facial landmarks).
+    """
+
+    _face_detector: Any
+    """
+    Dlib's face detector.
+    """
+
+
+    def __init__(self, video_settings: VideoAnalyzerSettings):
+        super().__init__(video_settings)
+        scale = video_settings.face_detection_scale
+        if not 0 < scale <= 1:
+            raise ValueError(f"The face detection scale must be between 0 (exclusive) and 1, got {scale}")
+        self._face_detector = hog_face_detector.get()
+
+
+    def detect(self, context: FrameContext) -> FaceBox | None:
+        gray = context.gray
+        scale = self._video_settings.face_detection_scale
+        if scale < 1:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        faces = self._face_detector(gray, 0)
+        if len(faces) == 0:
+            return None
+        first_face = faces[0]
+
+        # Map the box back to the analysis resolution
+        height, width = context.gray.shape[:2]
+        return FaceBox(
+            left=max(0, round(first_face.left() / scale)),
+            top=max(0, round(first_face.top() / scale)),
+            right=min(width, round(first_face.right() / scale)),
+            bottom=min(height, round(first_face.bottom() / scale))
+        )
@@ -0,0 +1,71 @@
+import cv2
+import numpy as np
+from api.algorithms.face_detectors.base import BaseFaceDetector
+from api.algorithms.frame_context import FaceBox, FrameBatch, FrameContext
+from api.algorithms.model_registry import create_ssd_net
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+
+
+SSD_INPUT_SIZE = (224, 224)
+"""The size of the images fed to the SSD model."""
+
+SSD_MEAN = (104.0, 177.0, 123.0)
+"""The mean subtracted from each channel of the images fed to the SSD model."""
+
+
+class SsdFaceDetector(BaseFaceDetector):
+    """
+    Face detector based on the OpenCV DNN res10 SSD model (runs on the BGR frame).
+    """
+
+    _face_model: cv2.dnn.Net
+    """
+    The face detector model (based on FaceNet).
+    """
+
+
+    def __init__(self, video_settings: VideoAnalyzerSettings):
+        super().__init__(video_settings)
+        self._face_model = create_ssd_net()
+
+
+    def detect(self, context: FrameContext) -> FaceBox | None:
+        return self.detect_batch([context])[0]
+
+
+    def detect_batch(self, batch: FrameBatch) -> list[FaceBox | None]:
+        frames = [context.frame for context in batch]
+
+        # Convert the frames to a single blob and detect the faces in one forward pass
+        blob = cv2.dnn.blobFromImages(frames, 1.0, SSD_INPUT_SIZE, SSD_MEAN)
+        self._face_model.setInput(blob)
+        detections = self._face_model.forward()[0, 0] # Each row: [image_id, label, confidence, Xi, Yi, Xf, Yf]
+
+        # Detections are sorted by confidence within each image, so take the first row of each image
+        faces: list[FaceBox | None] = [None] * len(frames)
+        image_ids = detections[:, 0].astype(int)
+        _, first_rows = np.unique(image_ids, return_index=True)
+        for row in first_rows:
+            image_id = image_ids[row]
+            if 0 <= image_id < len(frames):
+                faces[image_id] = self.__to_face_box(frames[image_id], detections[row])
+        return faces
+
+
+    def __to_face_box(self, frame: np.ndarray, detection: np.ndarray) -> FaceBox | None:
+        """
+        Convert a detection to a face box, checking if its confidence is enough.
+        """
+        confidence = float(detection[2]) # Face detection confidence/probability
+        if confidence < self._video_settings.face_detection_confidence:
+            return None
+
+        # Use the bounding box of the detection scaled to the dimensions of the image
+        box = detection[3:7] * np.array([frame.shape[1], frame.shape[0], frame.shape[1], frame.shape[0]])
+        (Xi, Yi, Xf, Yf) = box.astype("int")
+
+        # Normalize the bounding box coordinates
+        if Xi < 0: Xi = 0
+        if Yi < 0: Yi = 0
+
+        return FaceBox(left=int(Xi), top=int(Yi), right=int(Xf), bottom=int(Yf), confidence=confidence)
@@ -0,0 +1,93 @@
+import dlib
+from typing import Any
+from api.algorithms.face_detectors.base import BaseFaceDetector
+from api.algorithms.frame_context import FaceBox, FrameBatch, FrameContext
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+
+
+class TrackingFaceDetector(BaseFaceDetector):
+    """
+    Face detector that runs the wrapped detector every `face_detection_interval` frames and follows the face
+    in between with Dlib's correlation tracker (runs on the grayscale plane).
+    The face is detected again as soon as the tracking quality drops below `face_tracking_quality_threshold`.
+    """
+
+    _detector: BaseFaceDetector
+    """
+    The wrapped face detector.
+    """
+
+    _tracker: Any
+    """
+    Dlib's correlation tracker following the last detected face (`None` if no face is being tracked).
+    """
+
+    _tracked_confidence: float | None
+    """
+    The confidence of the detection that started the tracking (kept by the tracked boxes).
+    """
+
+    _frames_since_detection: int
+    """
+    The number of frames tracked since the last detection.
+    """
+
+
+    def __init__(self, video_settings: VideoAnalyzerSettings, detector: BaseFaceDetector):
+        super().__init__(video_settings)
+        self._detector = detector
+        self.reset_state()
+
+
+    def reset_state(self) -> None:
+        self._detector.reset_state()
+        self._tracker = None
+        self._tracked_confidence = None
+        self._frames_since_detection = 0
+
+
+    def detect(self, context: FrameContext) -> FaceBox | None:
+        if self._tracker is not None and self._frames_since_detection < self._video_settings.face_detection_interval - 1:
+            face = self.__track(context)
+            if face is not None:
+                return face
+        return self.__detect(context)
+
+
+    def detect_batch(self, batch: FrameBatch) -> list[FaceBox | None]:
+        # Each frame depends on the face found in the previous one, so the frames are processed in order
+        return [self.detect(context) for context in batch]
+
+
+    def __detect(self, context: FrameContext) -> FaceBox | None:
+        """
+        Detect the face with the wrapped detector and start tracking it.
+        """
+        face = self._detector.detect(context)
+        self._frames_since_detection = 0
+        if face is None:
+            self._tracker = None
+            return None
+        self._tracker = dlib.correlation_tracker() # type: ignore
+        self._tracker.start_track(context.gray, dlib.rectangle(face.left, face.top, face.right, face.bottom)) # type: ignore
+        self._tracked_confidence = face.confidence
+        return face
+
+
+    def __track(self, context: FrameContext) -> FaceBox | None:
+        """
+        Follow the face in the next frame. Returns `None` if the tracking quality is not enough.
+        """
+        quality = self._tracker.update(context.gray)
+        if quality < self._video_settings.face_tracking_quality_threshold:
+            return None
+        self._frames_since_detection += 1
+
+        # Clip the tracked box to the frame (the tracker can drift beyond the borders)
+        position = self._tracker.get_position()
+        height, width = context.gray.shape[:2]
+        left, top = max(0, round(position.left())), max(0, round(position.top()))
+        right, bottom = min(width, round(position.right())), min(height, round(position.bottom()))
+        if right <= left or bottom <= top:
+            return None
+        return FaceBox(left=left, top=top, right=right, bottom=bottom, confidence=self._tracked_confidence)
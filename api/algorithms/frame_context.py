@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+
+
+class FaceBox:
+    """
+    Bounding box of a face detected in a frame (in frame coordinates).
+    """
+
+    left: int
+    """The left coordinate of the box in pixels."""
+
+    top: int
+    """The top coordinate of the box in pixels."""
+
+    right: int
+    """The right coordinate of the box in pixels."""
+
+    bottom: int
+    """The bottom coordinate of the box in pixels."""
+
+    confidence: float | None
+    """
+    The detection confidence (`None` if the detector does not provide one).
+    """
+
+    def __init__(self, left: int, top: int, right: int, bottom: int, confidence: float | None = None):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.confidence = confidence
+
+
+class FrameContext:
+    """
+    A frame of the video along with the data shared by all the pipes (grayscale plane and detected faces).
+    """
+
+    frame: np.ndarray
+    """
+    The frame (BGR) resized to the analysis resolution.
+    """
+
+    index: int
+    """
+    The position of the frame in the stream of decoded frames of the whole video (used by the pipes to sample their own frames).
+    """
+
+    faces: dict[str, FaceBox | None]
+    """
+    The first face detected in the frame by the shared face detection stage, keyed by the face detector preferred by the pipes
+    (`None` if no face was detected). Pipes preferring different detectors get the box of their own detector,
+    since the models applied to the box (e.g. the facial landmarks) were trained on the boxes of a specific detector.
+    """
+
+    _gray: np.ndarray | None
+    """
+    The cached grayscale plane of the frame.
+    """
+
+    def __init__(self, frame: np.ndarray, index: int = 0):
+        self.frame = frame
+        self.index = index
+        self.faces = {}
+        self._gray = None
+
+
+    @property
+    def gray(self) -> np.ndarray:
+        """
+        The grayscale plane of the frame (computed once and cached).
+        """
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+
+FrameBatch = list[FrameContext]
+"""
+A batch of consecutive frames.
+"""
@@ -0,0 +1,257 @@
+"""
+Store of pre-decoded frames, so a video analyzed more than once is decoded only the first time.
+
+The sampled and resized frames of each video are written to a raw file, which later analyses map into memory
+(zero-copy) instead of decoding the video again. Each entry has an index file (JSON) with the video and the
+shape of the frames, written once all the frames are stored, so partially written entries are never read.
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import logging
+import threading
+import numpy as np
+from typing import BinaryIO, Generator, Iterable
+from api.common.utils.os import make_dirs, join_path, path_exists
+from config import AIConfig
+
+
+logger = logging.getLogger(__name__)
+
+FRAMES_EXTENSION = ".frames"
+"""The extension of the files with the raw frames."""
+
+INDEX_EXTENSION = ".json"
+"""The extension of the index files."""
+
+
+class FrameStore:
+    """
+    Store of the decoded frames of the videos, bounded by size with a least recently used (LRU) eviction policy.
+    """
+
+    path: str
+    """
+    The directory where the frames are stored.
+    """
+
+    max_size: int
+    """
+    The maximum size of the stored frames in bytes (`0` disables the store).
+    """
+
+    _lock: threading.Lock
+    """
+    Lock for keeping the size bound when entries are added from several threads.
+    """
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Flag indicating if the store keeps frames.
+        """
+        return self.max_size > 0
+
+
+    def get_key(self, video_path: str, *params) -> str:
+        """
+        Returns the key of the frames of a video decoded with the given parameters (e.g. size and sampling).
+        The key changes when the video file changes.
+        """
+        stat = os.stat(video_path)
+        raw_key = json.dumps([video_path, stat.st_mtime_ns, stat.st_size, *params], default=str)
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+
+    def read(self, key: str) -> np.ndarray | None:
+        """
+        Map the stored frames into memory (read-only array with shape `(frames, height, width, channels)`).
+        Returns `None` if the frames are not stored.
+        """
+        index = self._read_index(key)
+        if index is None:
+            return None
+        frames_path = self._get_frames_path(key)
+        try:
+            # Mark the entry as recently used
+            os.utime(frames_path)
+            return np.memmap(frames_path, dtype=np.uint8, mode="r", shape=(index["frame_count"], *index["frame_shape"]))
+        except (OSError, ValueError) as e:
+            logger.error(f"Unable to read stored frames '{key}': {e}")
+            return None
+
+
+    def write_through(self, key: str, video_path: str, frames: Iterable[np.ndarray]) -> Generator[np.ndarray, None, None]:
+        """
+        Yield the frames while they are written to the store. The entry is saved only if all the frames are consumed
+        (an analysis stopped early does not leave an incomplete entry).
+        The store is only a cache, so if it fails (e.g. the disk is full) the entry is dropped and the frames are still yielded.
+        """
+        temp_path = join_path(self.path, f"{key}.{uuid.uuid4().hex}.tmp")
+        frame_count = 0
+        frame_shape: tuple[int, ...] = ()
+        file = None
+        try:
+            make_dirs(self.path)
+            file = open(temp_path, "wb")
+        except OSError as e:
+            logger.error(f"Unable to store the frames of '{video_path}': {e}")
+        completed = False
+        try:
+            for frame in frames:
+                if file is not None:
+                    try:
+                        data = np.ascontiguousarray(frame, dtype=np.uint8)
+                        if frame_count == 0:
+                            frame_shape = data.shape
+                        file.write(data.data)
+                        frame_count += 1
+                    except OSError as e:
+                        logger.error(f"Unable to store the frames of '{video_path}': {e}")
+                        self._close_temp_file(file, temp_path)
+                        file = None
+                yield frame
+            completed = frame_count > 0
+        finally:
+            if file is not None and self._close_temp_file(file, temp_path, keep=completed):
+                self._save(key, temp_path, {
+                    "video_path": video_path,
+                    "frame_count": frame_count,
+                    "frame_shape": list(frame_shape),
+                })
+
+
+    def evict(self, video_path: str) -> None:
+        """
+        Remove all the stored frames of a video.
+        """
+        with self._lock:
+            for key, index in self._list_indexes():
+                if index.get("video_path") == video_path:
+                    self._remove(key)
+
+
+    def clear(self) -> None:
+        """
+        Remove all the stored frames.
+        """
+        with self._lock:
+            if not path_exists(self.path):
+                return
+            for file_name in os.listdir(self.path):
+                _remove_file(join_path(self.path, file_name))
+
+
+    def _save(self, key: str, temp_path: str, index: dict) -> None:
+        """
+        Save an entry, evicting the least recently used entries if the store is full.
+        The entry is dropped if it cannot be saved (e.g. the store was cleared while the frames were written).
+        """
+        with self._lock:
+            try:
+                os.replace(temp_path, self._get_frames_path(key))
+                with open(self._get_index_path(key), "w") as file:
+                    json.dump(index, file)
+                self._evict_least_recently_used()
+            except OSError as e:
+                logger.error(f"Unable to save stored frames '{key}': {e}")
+                _remove_file(temp_path)
+                self._remove(key)
+
+
+    def _close_temp_file(self, file: BinaryIO, temp_path: str, keep: bool = False) -> bool:
+        """
+        Close the temporal file of an entry. The file is removed unless it is kept and closed without errors.
+        Returns `True` if the file is kept.
+        """
+        try:
+            file.close()
+        except OSError as e:
+            logger.error(f"Unable to close stored frames '{temp_path}': {e}")
+            keep = False
+        if not keep:
+            _remove_file(temp_path)
+        return keep
+
+
+    def _evict_least_recently_used(self) -> None:
+        """
+        Remove the least recently used entries until the store fits in its maximum size.
+        """
+        entries = []
+        for key, _ in self._list_indexes():
+            try:
+                stat = os.stat(self._get_frames_path(key))
+            except OSError:
+                self._remove(key)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, key))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(key)
+            total_size -= size
+
+
+    def _list_indexes(self) -> list[tuple[str, dict]]:
+        """
+        List the keys and indexes of the stored entries.
+        """
+        if not path_exists(self.path):
+            return []
+        indexes = []
+        for file_name in os.listdir(self.path):
+            if not file_name.endswith(INDEX_EXTENSION):
+                continue
+            key = file_name[:-len(INDEX_EXTENSION)]
+            index = self._read_index(key)
+            if index is not None:
+                indexes.append((key, index))
+        return indexes
+
+
+    def _read_index(self, key: str) -> dict | None:
+        try:
+            with open(self._get_index_path(key), "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+
+    def _remove(self, key: str) -> None:
+        # Mapped frames stay readable until they are unmapped
+        _remove_file(self._get_index_path(key))
+        _remove_file(self._get_frames_path(key))
+
+
+    def _get_frames_path(self, key: str) -> str:
+        return join_path(self.path, f"{key}{FRAMES_EXTENSION}")
+
+
+    def _get_index_path(self, key: str) -> str:
+        return join_path(self.path, f"{key}{INDEX_EXTENSION}")
+
+
+def _remove_file(path: str) -> None:
+    """
+    Remove a file, ignoring the errors (e.g. the file was removed by another thread).
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+frame_store = FrameStore(AIConfig.FrameStore.PATH, AIConfig.FrameStore.MAX_SIZE)
+"""
+The frame store shared by all the analyses.
+"""
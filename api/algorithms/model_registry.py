@@ -0,0 +1,288 @@
+"""
+Registry of the AI models used by the analysis pipes.
+
+Models are loaded on first use, so importing the pipes does not import the heavy libraries (e.g. TensorFlow).
+The API loads and warms up all the models at startup (see `load_models`), so the first request does not pay for it.
+"""
+
+import os
+import time
+import logging
+import threading
+import numpy as np
+from typing import Any, Callable, Generic, TypeVar
+from api.common.constants.emotions import EMOTION_FACE_SIZE, EmotionsInferenceBackend
+from api.models.startup import ModelLoadReport
+from config import AIConfig
+
+
+logger = logging.getLogger(__name__)
+
+TModel = TypeVar("TModel")
+
+class LazyModel(Generic[TModel]):
+    """
+    A model loaded on first use (thread-safe).
+    """
+
+    name: str
+    """
+    The name of the model (used in the startup report).
+    """
+
+    _loader: Callable[[], TModel]
+    """
+    Function that loads the model.
+    """
+
+    _warm_up: Callable[[TModel], None] | None
+    """
+    Function that runs the model once with dummy data, so the first real inference does not pay the initialization cost.
+    """
+
+    preload: bool
+    """
+    Flag indicating if the model is loaded at startup.
+    """
+
+    _model: TModel | None
+    """
+    The loaded model.
+    """
+
+    _lock: threading.Lock
+    """
+    Lock for loading the model once.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], TModel],
+        warm_up: Callable[[TModel], None] | None = None,
+        preload: bool = True
+    ):
+        self.name = name
+        self._loader = loader
+        self._warm_up = warm_up
+        self.preload = preload
+        self._model = None
+        self._lock = threading.Lock()
+
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Flag indicating if the model is loaded.
+        """
+        return self._model is not None
+
+
+    def get(self) -> TModel:
+        """
+        Get the model, loading it if needed.
+        """
+        if self._model is None:
+            self.load(warm_up=False)
+        return self._model # type: ignore
+
+
+    def load(self, warm_up: bool = True) -> ModelLoadReport:
+        """
+        Load the model (if not loaded yet) and optionally warm it up.
+        """
+        load_time = 0.0
+        with self._lock:
+            if self._model is None:
+                start = time.perf_counter()
+                self._model = self._loader()
+                load_time = time.perf_counter() - start
+                logger.info(f"Model '{self.name}' loaded in {load_time:.3f}s")
+
+        warm_up_time = None
+        if warm_up and self._warm_up is not None:
+            start = time.perf_counter()
+            self._warm_up(self._model) # type: ignore
+            warm_up_time = round(time.perf_counter() - start, 3)
+
+        return ModelLoadReport(
+            name=self.name,
+            load_time=round(load_time, 3),
+            warm_up_time=warm_up_time,
+        )
+
+
+registered_models: list[LazyModel[Any]] = []
+"""
+All the models used by the pipes.
+"""
+
+def register_model(model: LazyModel[TModel]) -> LazyModel[TModel]:
+    """
+    Register a model so it is loaded at startup (if `preload` is set).
+    """
+    registered_models.append(model)
+    return model
+
+
+def load_models(warm_up: bool = True) -> list[ModelLoadReport]:
+    """
+    Load (and warm up) all the registered models loaded at startup. Returns a report with the time spent on each model.
+    """
+    return [model.load(warm_up) for model in registered_models if model.preload]
+
+
+def _create_dummy_faces() -> np.ndarray:
+    """
+    Create a batch with a single blank face (used to warm up the emotion classification models).
+    """
+    return np.zeros((1, *EMOTION_FACE_SIZE, 1), dtype=np.float32)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+# Emotion classification models (one for each inference backend, only the configured one is loaded at startup)
+
+def _load_keras_emotion_classifier() -> Any:
+    # Disable tensorflow compilation warnings
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+    from keras.models import load_model
+    return load_model(AIConfig.Emotions.CLASSIFICATION_MODEL_PATH)
+
+def _warm_up_keras_emotion_classifier(model: Any) -> None:
+    model(_create_dummy_faces(), training=False)
+
+keras_emotion_classifier: LazyModel[Any] = register_model(LazyModel(
+    "emotions:classifier:keras",
+    _load_keras_emotion_classifier,
+    _warm_up_keras_emotion_classifier,
+    preload=AIConfig.Emotions.INFERENCE_BACKEND == EmotionsInferenceBackend.KERAS
+))
+"""
+The emotion classification model (Keras).
+"""
+
+
+def _warm_up_tflite_emotion_classifier(model: bytes) -> None:
+    interpreter = create_tflite_emotion_interpreter()
+    interpreter.set_tensor(interpreter.get_input_details()[0]["index"], _create_dummy_faces())
+    interpreter.invoke()
+
+tflite_emotion_classifier: LazyModel[bytes] = register_model(LazyModel(
+    "emotions:classifier:tflite",
+    lambda: _read_file(AIConfig.Emotions.CLASSIFICATION_TFLITE_MODEL_PATH),
+    _warm_up_tflite_emotion_classifier,
+    preload=AIConfig.Emotions.INFERENCE_BACKEND == EmotionsInferenceBackend.TFLITE
+))
+"""
+The emotion classification model converted to TensorFlow Lite (see `scripts/convert_emotion_model.py`).
+Interpreters are not thread-safe, so each classifier creates its own interpreter (see `create_tflite_emotion_interpreter`).
+"""
+
+def create_tflite_emotion_interpreter() -> Any:
+    """
+    Create a TensorFlow Lite interpreter for the emotion classification model.
+    Uses the lightweight `tflite_runtime` package if installed.
+    """
+    try:
+        from tflite_runtime.interpreter import Interpreter # type: ignore
+    except ImportError:
+        os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+        from tensorflow.lite import Interpreter # type: ignore
+    interpreter = Interpreter(model_content=tflite_emotion_classifier.get())
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def _warm_up_onnx_emotion_classifier(model: bytes) -> None:
+    net = create_onnx_emotion_net()
+    net.setInput(_create_dummy_faces())
+    net.forward()
+
+onnx_emotion_classifier: LazyModel[bytes] = register_model(LazyModel(
+    "emotions:classifier:onnx",
+    lambda: _read_file(AIConfig.Emotions.CLASSIFICATION_ONNX_MODEL_PATH),
+    _warm_up_onnx_emotion_classifier,
+    preload=AIConfig.Emotions.INFERENCE_BACKEND == EmotionsInferenceBackend.OPENCV
+))
+"""
+The emotion classification model exported to ONNX (see `scripts/convert_emotion_model.py`), run with OpenCV DNN.
+Networks are not thread-safe, so each classifier creates its own network (see `create_onnx_emotion_net`).
+"""
+
+def create_onnx_emotion_net() -> Any:
+    """
+    Create an OpenCV DNN network for the emotion classification model.
+    """
+    import cv2
+    return cv2.dnn.readNet("onnx", np.frombuffer(onnx_emotion_classifier.get(), dtype=np.uint8))
+
+
+# Face detection models
+
+def _load_ssd_face_detector() -> tuple[bytes, bytes]:
+    return _read_file(AIConfig.Emotions.PROTOTXT_PATH), _read_file(AIConfig.Emotions.WEIGHTS_PATH)
+
+def _warm_up_ssd_face_detector(model: tuple[bytes, bytes]) -> None:
+    import cv2
+    net = create_ssd_net()
+    net.setInput(cv2.dnn.blobFromImage(np.zeros((300, 300, 3), dtype=np.uint8)))
+    net.forward()
+
+ssd_face_detector: LazyModel[tuple[bytes, bytes]] = register_model(LazyModel(
+    "face_detection:ssd",
+    _load_ssd_face_detector,
+    _warm_up_ssd_face_detector
+))
+"""
+The files (prototxt and weights) of the OpenCV DNN res10 SSD face detector.
+Networks are not thread-safe, so each detector creates its own network from the files in memory (see `create_ssd_net`).
+"""
+
+def create_ssd_net() -> Any:
+    """
+    Create an OpenCV DNN network for the SSD face detector.
+    """
+    import cv2
+    prototxt, weights = ssd_face_detector.get()
+    return cv2.dnn.readNet("caffe", np.frombuffer(weights, dtype=np.uint8), np.frombuffer(prototxt, dtype=np.uint8))
+
+
+def _load_hog_face_detector() -> Any:
+    import dlib
+    return dlib.get_frontal_face_detector() # type: ignore
+
+def _warm_up_hog_face_detector(model: Any) -> None:
+    model(np.zeros((100, 100), dtype=np.uint8), 0)
+
+hog_face_detector: LazyModel[Any] = register_model(LazyModel(
+    "face_detection:hog",
+    _load_hog_face_detector,
+    _warm_up_hog_face_detector
+))
+"""
+Dlib's HOG frontal face detector.
+"""
+
+
+# Facial landmarks model (Dlib)
+
+def _load_face_landmarks_predictor() -> Any:
+    import dlib
+    return dlib.shape_predictor(AIConfig.Blinking.SHAPE_PREDICTOR_PATH) # type: ignore
+
+def _warm_up_face_landmarks_predictor(model: Any) -> None:
+    import dlib
+    model(np.zeros((100, 100), dtype=np.uint8), dlib.rectangle(10, 10, 90, 90)) # type: ignore
+
+face_landmarks_predictor: LazyModel[Any] = register_model(LazyModel(
+    "attention_level:face_landmarks",
+    _load_face_landmarks_predictor,
+    _warm_up_face_landmarks_predictor
+))
+"""
+Dlib's face landmark predictor.
+"""
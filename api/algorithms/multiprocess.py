@@ -0,0 +1,259 @@
+import queue
+import logging
+import threading
+import contextlib
+import multiprocessing
+import numpy as np
+import concurrent.futures
+from typing import Any, Iterable, Iterator
+from multiprocessing.managers import SyncManager
+from multiprocessing.shared_memory import SharedMemory
+from concurrent.futures.process import BrokenProcessPool
+from api.algorithms.frame_context import FaceBox, FrameContext
+from config import AIConfig
+
+
+logger = logging.getLogger(__name__)
+
+SLOT_POLL_INTERVAL = 0.1
+"""The interval in seconds used to check if a worker failed while waiting for a free frame slot."""
+
+FrameMessage = list[tuple[int, int, dict[str, FaceBox | None]]]
+"""
+A batch of frames sent to a worker: the shared memory slot of each frame, its index and its detected faces.
+"""
+
+
+class SharedFrameBuffer:
+    """
+    Ring of frame slots in shared memory. Frames are written once by the analyzer and read
+    by every worker process without copies; workers only receive the slot indexes.
+    """
+
+    _memory: SharedMemory
+    """
+    The shared memory block with all the slots.
+    """
+
+    _frames: np.ndarray
+    """
+    View of the shared memory block as an array of frames (one per slot).
+    """
+
+    _free_slots: queue.Queue
+    """
+    The slots that can be written.
+    """
+
+    _pending_acks: list[int]
+    """
+    The number of workers that finished reading each slot.
+    """
+
+
+    def __init__(self, slots: int, frame_shape: tuple[int, int, int]):
+        frame_bytes = int(np.prod(frame_shape))
+        self._memory = SharedMemory(create=True, size=slots * frame_bytes)
+        self._frames = np.ndarray((slots, *frame_shape), dtype=np.uint8, buffer=self._memory.buf)
+        self._free_slots = queue.Queue()
+        for slot in range(slots):
+            self._free_slots.put(slot)
+        self._pending_acks = [0] * slots
+
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the shared memory block (used by the workers to attach to it).
+        """
+        return self._memory.name
+
+
+    def acquire(self, futures: Iterable[concurrent.futures.Future]) -> int:
+        """
+        Wait for a free slot. Raises the worker exception if any worker finished before the end of the stream.
+        """
+        while True:
+            try:
+                return self._free_slots.get(timeout=SLOT_POLL_INTERVAL)
+            except queue.Empty:
+                for future in futures:
+                    if future.done():
+                        future.result()
+                        raise RuntimeError("A worker process finished before the end of the stream")
+
+
+    def write(self, slot: int, frame: np.ndarray) -> None:
+        """
+        Copy a frame into a slot.
+        """
+        self._frames[slot] = frame
+
+
+    def collect_acks(self, ack_queue: Any, consumers: int) -> None:
+        """
+        Release the slots once all the consumers have read them, until the end of the stream (`None`).
+        """
+        while True:
+            slots = ack_queue.get()
+            if slots is None:
+                return
+            for slot in slots:
+                self._pending_acks[slot] += 1
+                if self._pending_acks[slot] == consumers:
+                    self._pending_acks[slot] = 0
+                    self._free_slots.put(slot)
+
+
+    def close(self) -> None:
+        """
+        Release the shared memory block.
+        """
+        del self._frames
+        self._memory.close()
+        self._memory.unlink()
+
+
+    def __enter__(self) -> "SharedFrameBuffer":
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class _ProcessPool:
+    """
+    Pool of worker processes shared by all the analyses. Workers are reused, so the models
+    imported by each pipe module are loaded only once per process.
+    """
+
+    _executor: concurrent.futures.ProcessPoolExecutor | None
+    _manager: SyncManager | None
+    _size: int
+    _available_workers: int
+    _reservations: dict[concurrent.futures.ProcessPoolExecutor, int]
+    _condition: threading.Condition
+
+    def __init__(self, size: int):
+        self._executor = None
+        self._manager = None
+        self._size = max(1, size)
+        self._available_workers = self._size
+        self._reservations = {}
+        self._condition = threading.Condition()
+
+
+    @property
+    def size(self) -> int:
+        """
+        The number of worker processes of the pool.
+        """
+        return self._size
+
+
+    @contextlib.contextmanager
+    def reserve(self, workers: int) -> Iterator[tuple[concurrent.futures.ProcessPoolExecutor, SyncManager]]:
+        """
+        Reserve workers for a whole analysis. All the pipes of an analysis must run at the same time,
+        so analyses wait until enough workers are free instead of queueing part of their pipes.
+        Analyses that need more workers than the pool has get their own short-lived pool.
+        """
+        if workers > self._size:
+            logger.warning(f"Starting a separate process pool with {workers} workers (larger than the shared pool)")
+            context = multiprocessing.get_context("spawn")
+            with context.Manager() as manager, \
+                concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                yield executor, manager
+            return
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._available_workers >= workers)
+            self._available_workers -= workers
+            executor, manager = self._get_executor()
+            self._reservations[executor] = self._reservations.get(executor, 0) + 1
+        try:
+            yield executor, manager
+        except BrokenProcessPool:
+            with self._condition:
+                # Replace the broken pool for the next analyses (it is shut down once no analysis holds it)
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        finally:
+            with self._condition:
+                self._release(executor)
+                self._available_workers += workers
+                self._condition.notify_all()
+
+
+    def _get_executor(self) -> tuple[concurrent.futures.ProcessPoolExecutor, SyncManager]:
+        context = multiprocessing.get_context("spawn")
+        if self._manager is None:
+            self._manager = context.Manager()
+        if self._executor is None:
+            logger.info(f"Starting process pool with {self._size} workers")
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self._size, mp_context=context)
+        return self._executor, self._manager
+
+
+    def _release(self, executor: concurrent.futures.ProcessPoolExecutor) -> None:
+        """
+        Release a reservation of an executor, shutting it down if it was replaced and no analysis holds it anymore.
+        """
+        self._reservations[executor] -= 1
+        if self._reservations[executor] == 0:
+            del self._reservations[executor]
+            if executor is not self._executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+
+process_pool = _ProcessPool(AIConfig.PROCESS_POOL_SIZE)
+"""
+The process pool used by the multiprocess analysis.
+"""
+
+
+def run_pipe_worker(
+    pipe_type: type,
+    pipe_settings: Any,
+    frame_stride: int,
+    memory_name: str,
+    frame_shape: tuple[int, int, int],
+    slots: int,
+    task_queue: Any,
+    ack_queue: Any
+) -> Any:
+    """
+    Run a pipe in a worker process over the frames received through the task queue, until the end
+    of the stream (`None`). The slots of each message are acknowledged once processed.
+    Returns the final result of the pipe.
+    """
+    pipe = pipe_type(pipe_settings)
+    pipe.frame_stride = frame_stride
+    pipe.reset_state()
+    memory = SharedMemory(name=memory_name)
+    try:
+        frames = np.ndarray((slots, *frame_shape), dtype=np.uint8, buffer=memory.buf)
+        try:
+            while (message := task_queue.get()) is not None:
+                pipe.analyze_batch(_to_batch(frames, message))
+                ack_queue.put([slot for slot, _, _ in message])
+        finally:
+            del frames
+        return pipe.get_final_result()
+    finally:
+        memory.close()
+
+
+def _to_batch(frames: np.ndarray, message: FrameMessage) -> list[FrameContext]:
+    """
+    Build the frame contexts of a message. The frames are views of the shared memory (no copies), which are valid
+    until the slots are acknowledged after the batch is analyzed, so pipes copy only what they keep (see `BaseAnalysisPipe.analyze_batch`).
+    """
+    batch = []
+    for slot, index, faces in message:
+        context = FrameContext(frames[slot], index)
+        context.faces = faces
+        batch.append(context)
+    return batch
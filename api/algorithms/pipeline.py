@@ -0,0 +1,151 @@
+import time
+import queue
+import threading
+from typing import Iterator
+from api.algorithms.frame_context import FrameBatch
+from api.models.pipeline import PipelineStageStats
+
+
+CHANNEL_POLL_INTERVAL = 0.1
+"""The interval in seconds used to check if a blocked channel was cancelled."""
+
+
+class FrameChannel:
+    """
+    Bounded queue of frame batches between two threads of the analysis pipeline.
+    Collects the queue depth and the time each side spent blocked, to help sizing the queues.
+    """
+
+    _name: str
+    """
+    The name of the stage.
+    """
+
+    _queue: queue.Queue
+    """
+    The bounded queue of frame batches. `None` marks the end of the stream.
+    """
+
+    _cancelled: threading.Event
+    """
+    Flag indicating if the consumer stopped reading from the channel.
+    """
+
+    _frames: int
+    """
+    The number of frames added to the channel (in all the batches).
+    """
+
+    _max_depth: int
+    """
+    The maximum queue depth.
+    """
+
+    _total_depth: int
+    """
+    The sum of the queue depth sampled after each frame is added.
+    """
+
+    _producer_stall_time: float
+    """
+    The time the producer was blocked because the queue was full.
+    """
+
+    _consumer_stall_time: float
+    """
+    The time the consumer was blocked because the queue was empty.
+    """
+
+
+    def __init__(self, name: str, maxsize: int):
+        self._name = name
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._cancelled = threading.Event()
+        self._frames = 0
+        self._max_depth = 0
+        self._total_depth = 0
+        self._producer_stall_time = 0.0
+        self._consumer_stall_time = 0.0
+
+
+    def put(self, batch: FrameBatch) -> bool:
+        """
+        Add a batch of frames to the channel, blocking while the queue is full.
+        Returns `False` if the channel was cancelled and the batch was not added.
+        """
+        if not self._put(batch):
+            return False
+        depth = self._queue.qsize()
+        self._frames += len(batch)
+        self._total_depth += depth
+        self._max_depth = max(self._max_depth, depth)
+        return True
+
+
+    def close(self) -> None:
+        """
+        Mark the end of the stream.
+        """
+        self._put(None)
+
+
+    def cancel(self) -> None:
+        """
+        Stop the channel, releasing the producer if it is blocked.
+        """
+        self._cancelled.set()
+
+
+    def __iter__(self) -> Iterator[FrameBatch]:
+        """
+        Yield the batches of frames until the end of the stream.
+        """
+        while True:
+            try:
+                batch = self._queue.get_nowait()
+            except queue.Empty:
+                start = time.perf_counter()
+                batch = self._queue.get()
+                self._consumer_stall_time += time.perf_counter() - start
+            if batch is None:
+                return
+            yield batch
+
+
+    def get_stats(self) -> PipelineStageStats:
+        """
+        Get the statistics of the channel.
+        """
+        return PipelineStageStats(
+            stage=self._name,
+            capacity=self._queue.maxsize,
+            frames=self._frames,
+            max_depth=self._max_depth,
+            avg_depth=round(self._total_depth / self._frames, 2) if self._frames > 0 else 0.0,
+            producer_stall_time=round(self._producer_stall_time, 3),
+            consumer_stall_time=round(self._consumer_stall_time, 3),
+        )
+
+
+    def _put(self, item: FrameBatch | None) -> bool:
+        """
+        Add an item to the queue, measuring the time blocked while it is full.
+        """
+        if self._cancelled.is_set():
+            return False
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        start = time.perf_counter()
+        try:
+            while not self._cancelled.is_set():
+                try:
+                    self._queue.put(item, timeout=CHANNEL_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self._producer_stall_time += time.perf_counter() - start
@@ -1,36 +1,38 @@
 from typing import Any
 import dlib
-import cv2
 import numpy as np
 from decimal import Decimal
+from api.algorithms.frame_context import FrameContext
+from api.algorithms.model_registry import face_landmarks_predictor
 from api.algorithms.pipes.base import BaseAnalysisPipe
-from config import AIConfig
-from api.algorithms.eye_aspect_ratio import optimized_ear, original_ear
+from api.algorithms.eye_aspect_ratio import landmarks_to_array, optimized_ear_array, original_ear_array
 from api.algorithms.settings.attention_level import AttentionLevelSettings
-from api.common.constants.attention_level import AttentionLevelStatus, FacialLandmarksIndexes
-from api.models.attention_level import AttentionLevelPipeResponse
+from api.common.constants.face_detection import FaceDetector
+from api.common.constants.attention_level import AttentionLevelStatus, EyeRatioAlgorithm, FacialLandmarksIndexes
+from api.models.attention_level import AttentionLevelPartialState, AttentionLevelPipeResponse
 
 
-face_predictor = dlib.shape_predictor(AIConfig.Blinking.SHAPE_PREDICTOR_PATH)  # type: ignore
+EYES_LANDMARKS = np.array([
+    np.arange(*FacialLandmarksIndexes.LEFT_EYE),
+    np.arange(*FacialLandmarksIndexes.RIGHT_EYE),
+])
 """
-Dlib's face landmark predictor.
+Indexes of the landmarks of both eyes (one row per eye), used to slice the `(68, 2)` landmarks array into a `(2, 6, 2)` array.
 """
 
+
 class AttentionLevelPipe(BaseAnalysisPipe[AttentionLevelPipeResponse]):
     """
     Pipe for the attention level algorithm.
     """
+
+    face_detector = FaceDetector.HOG
     
     _settings: AttentionLevelSettings
     """
     The settings for the pipe.
     """
 
-    _face_detector: Any
-    """
-    Dlib's face detector.
-    """
-
     _face_predictor: Any
     """
     Dlib's face landmark predictor.
@@ -46,39 +48,40 @@ class AttentionLevelPipe(BaseAnalysisPipe[AttentionLevelPipeResponse]):
     Flag indicating if the eye is closed.
     """
 
+    _first_eye_closed: bool | None
+    """
+    Flag indicating if the eye was closed in the first frame with a face (`None` if no face was found yet).
+    Used to detect the blinks that span the boundary between two segments of the video.
+    """
+
 
     def __init__(self, settings: AttentionLevelSettings):
         super().__init__()
         self._settings = settings
-        self._face_detector = dlib.get_frontal_face_detector() # type: ignore
-        self._face_predictor = face_predictor
+        self._face_predictor = face_landmarks_predictor.get()
 
 
     def reset_state(self) -> None:
         self._blinks_count = 0
         self._eye_closed = False
+        self._first_eye_closed = None
 
 
-    def _analyze_frame(self, frame: np.ndarray) -> None:
-        # Convert the frame to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        # Detect faces in the grayscale frame
-        faces = self._face_detector(gray, 0)
-        if len(faces) == 0:
+    def _analyze_frame(self, context: FrameContext) -> None:
+        # Skip if no face was detected by the shared face detection stage
+        face = self._get_face(context)
+        if face is None:
             return
         
         # Get the landmarks of the first face
-        first_face = faces[0]
-        landmarks = self._face_predictor(gray, first_face)
+        first_face = dlib.rectangle(face.left, face.top, face.right, face.bottom) # type: ignore
+        landmarks = self._face_predictor(context.gray, first_face)
 
-        # Use the coordinates of each eye to compute the eye aspect ratio (EAR)
-        left_eye = self.__extract_landmarks(landmarks, FacialLandmarksIndexes.LEFT_EYE)
-        right_eye = self.__extract_landmarks(landmarks, FacialLandmarksIndexes.RIGHT_EYE)
-        avg_ear = np.mean([
-            self.__eye_aspect_ratio(left_eye),
-            self.__eye_aspect_ratio(right_eye)
-        ]) # type: ignore
+        # Use the coordinates of both eyes to compute the eye aspect ratio (EAR) in a single call
+        eyes = landmarks_to_array(landmarks)[EYES_LANDMARKS]
+        avg_ear = float(self.__eye_aspect_ratio(eyes).mean())
+        if self._first_eye_closed is None:
+            self._first_eye_closed = bool(avg_ear < self._settings.eye_ratio_threshold)
 
         # If eye aspect ratio is below the blink threshold, the eye is closed
         if avg_ear < self._settings.eye_ratio_threshold:
@@ -102,26 +105,36 @@ class AttentionLevelPipe(BaseAnalysisPipe[AttentionLevelPipeResponse]):
         return result
 
 
-    def __extract_landmarks(self, landmarks, landmarks_indexes: tuple[int, int]) -> np.ndarray:
-        """
-        Extract coordinates (x, y) from the provided face landmarks given the start and end indexes.
-
-        Returns a 2-dimensional integer numpy array with the coordinates of each eye landmark.
-        """
-        (start, end) = landmarks_indexes
-        return np.array(
-            [(landmarks.part(i).x, landmarks.part(i).y) for i in range(start, end)],
-            dtype=np.int32
+    def get_partial_state(self) -> AttentionLevelPartialState:
+        return AttentionLevelPartialState(
+            blinks=self._blinks_count,
+            first_eye_closed=self._first_eye_closed,
+            eye_closed=self._eye_closed,
         )
 
 
-    def __eye_aspect_ratio(self, eye_landmarks: np.ndarray) -> float:
+    def merge_partial_state(self, state: AttentionLevelPartialState) -> None:
+        # Skip the segments without faces, keeping the eye state of the previous segments
+        if state.first_eye_closed is None:
+            return
+
+        # The segment was analyzed with the eye open at the start, so a blink is missing
+        # if the eye was closed at the end of the previous segment and open at the start of this one
+        if self._eye_closed and not state.first_eye_closed:
+            self._blinks_count += 1
+        self._blinks_count += state.blinks
+        if self._first_eye_closed is None:
+            self._first_eye_closed = state.first_eye_closed
+        self._eye_closed = state.eye_closed
+
+
+    def __eye_aspect_ratio(self, eyes_landmarks: np.ndarray) -> np.ndarray:
         """
-        Compute the eye aspect ratio (EAR) given the eye landmarks.
+        Compute the eye aspect ratio (EAR) of each eye given the eye landmarks (array with shape `(eyes, 6, 2)`).
         """
-        if self._settings.eye_ratio_algorithm == "optimized":
-            return optimized_ear(eye_landmarks)
-        return original_ear(eye_landmarks)
+        if self._settings.eye_ratio_algorithm == EyeRatioAlgorithm.OPTIMIZED:
+            return optimized_ear_array(eyes_landmarks)
+        return original_ear_array(eyes_landmarks)
         
 
     def __calculate_attention_level(self, blink_rate_per_minute):
@@ -1,5 +1,5 @@
-import numpy as np
-from typing import Generic, TypeVar
+from typing import Any, Generic, Iterable, TypeVar
+from api.algorithms.frame_context import FaceBox, FrameBatch, FrameContext
 
 
 TResult = TypeVar("TResult")
@@ -9,8 +9,40 @@ class BaseAnalysisPipe(Generic[TResult]):
     Base class for AI analysis pipes.
     """
 
+    face_detector: str | None = None
+    """
+    The face detector preferred by the pipe (`None` if the pipe does not use the detected faces).
+    Use values from `api.common.constants.face_detection.FaceDetector`.
+    """
+
+    _settings: Any
+    """
+    The settings of the pipe (set by the child classes).
+    """
+
+    frame_stride: int
+    """
+    The pipe analyzes one of every `frame_stride` decoded frames (set by the analyzer from the frame rate of the pipe).
+    """
+
     def __init__(self):
-        pass
+        self.frame_stride = 1
+
+
+    @property
+    def settings(self) -> Any:
+        """
+        The settings of the pipe. Used to rebuild the pipe in a worker process.
+        """
+        return self._settings
+
+
+    @property
+    def frame_rate(self) -> float | None:
+        """
+        The number of frames per second analyzed by the pipe (`None` to analyze all the decoded frames).
+        """
+        return self._settings.frame_rate
 
 
     def reset_state(self) -> None:
@@ -20,15 +52,52 @@ class BaseAnalysisPipe(Generic[TResult]):
         raise NotImplementedError("Must be implemented in a child class")
 
 
-    def analyze_frames(self, frames: list[np.ndarray]) -> None:
+    def analyze_frames(self, contexts: Iterable[FrameContext]) -> None:
         """
-        Analyze all the frames.
+        Analyze all the frames. Frames are consumed one at a time, so `contexts` can be a generator.
         """
-        for frame in frames:
-            self._analyze_frame(frame)
+        for context in contexts:
+            self.analyze_frame(context)
 
 
-    def _analyze_frame(self, frame: np.ndarray) -> None:
+    def analyze_batches(self, batches: Iterable[FrameBatch]) -> None:
+        """
+        Analyze all the batches of frames. Batches are consumed one at a time, so `batches` can be a generator.
+        """
+        for batch in batches:
+            self.analyze_batch(batch)
+
+
+    def analyze_batch(self, batch: FrameBatch) -> None:
+        """
+        Analyze a batch of consecutive frames.
+        Child classes can override it to process the whole batch in a single call.
+        The frames can be views of shared memory that is reused once the batch is analyzed (see `SharedFrameBuffer`),
+        so pipes must copy any part of a frame they keep (e.g. the face crops of `EmotionsPipe` are resized into its own buffer).
+        """
+        for context in batch:
+            self.analyze_frame(context)
+
+
+    def analyze_frame(self, context: FrameContext) -> None:
+        """
+        Analyze a single frame (skipped if it is not sampled by the pipe).
+        """
+        if context.index % self.frame_stride != 0:
+            return
+        self._analyze_frame(context)
+
+
+    def _get_face(self, context: FrameContext) -> FaceBox | None:
+        """
+        Get the face detected in the frame by the face detector preferred by the pipe (`None` if no face was detected).
+        """
+        if self.face_detector is None:
+            return None
+        return context.faces.get(self.face_detector)
+
+
+    def _analyze_frame(self, context: FrameContext) -> None:
         """
         Analyze a frame.
         """
@@ -40,3 +109,19 @@ class BaseAnalysisPipe(Generic[TResult]):
         Get the final result from the analysis.
         """
         raise NotImplementedError("Must be implemented in a child class")
+
+
+    def get_partial_state(self) -> Any:
+        """
+        Get the state of the pipe after analyzing a segment of the video.
+        Used to merge the results of a video analyzed in several segments.
+        """
+        raise NotImplementedError("Must be implemented in a child class")
+
+
+    def merge_partial_state(self, state: Any) -> None:
+        """
+        Merge the state of the next segment of the video into the pipe state.
+        The segments are merged in temporal order, starting from a reset pipe.
+        """
+        raise NotImplementedError("Must be implemented in a child class")
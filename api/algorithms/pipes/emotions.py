@@ -1,156 +1,191 @@
-import os
 import cv2
 import numpy as np
 from decimal import Decimal
-from keras.preprocessing.image import img_to_array
-from keras.models import load_model
+from api.algorithms.frame_context import FaceBox, FrameContext
+from api.algorithms.emotion_classifiers.base import BaseEmotionClassifier
+from api.algorithms.emotion_classifiers.factory import get_emotion_classifier
 from api.algorithms.pipes.base import BaseAnalysisPipe
 from api.algorithms.settings.emotions import EmotionsSettings
-from api.common.constants.emotions import EMOTION_TYPES
-from api.models.emotions import EmotionDetail, EmotionsPipeResponse, PartialEmotionsResult
-from config import AIConfig
-
-
-# Disable tensorflow compilation warnings
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-
-emotion_model: any = load_model(AIConfig.Emotions.CLASSIFICATION_MODEL_PATH) # type: ignore
-"""
-The emotion classification model.
-"""
+from api.common.constants.face_detection import FaceDetector
+from api.common.constants.emotions import EMOTION_FACE_SIZE, EMOTION_PERCENTILES, EMOTION_TYPES
+from api.common.utils.video import calculate_frame_step, calculate_sampled_frame_count
+from api.models.emotions import DominantEmotionShare, EmotionDetail, EmotionStatistics, EmotionsPartialState, EmotionsPipeResponse
 
 
 class EmotionsPipe(BaseAnalysisPipe[EmotionsPipeResponse]):
     """
     Pipe for the emotions algorithm.
     """
+
+    face_detector = FaceDetector.SSD
     
     _settings: EmotionsSettings
     """
     The settings for the pipe.
     """
 
-    _face_model: cv2.dnn.Net
+    _classifier: BaseEmotionClassifier | None
     """
-    The face detector model (based on FaceNet).
+    The emotion classifier (created on the first analysis, so the model is not loaded when the result is cached).
     """
 
-    _extracted_faces: np.ndarray
+    _face_buffer: np.ndarray
     """
-    The extracted faces from each frame of the video. Only the first face of each frame is extracted.
+    Preallocated buffer with the extracted faces waiting to be classified. Only the first face of each frame is extracted.
+    """
+
+    _buffered_faces: int
+    """
+    The number of faces in the buffer.
+    """
+
+    _predictions: np.ndarray
+    """
+    Preallocated matrix with the predictions of the classified faces (one row per face, one column per emotion).
+    """
+
+    _prediction_count: int
+    """
+    The number of classified faces.
     """
 
 
     def __init__(self, settings: EmotionsSettings):
         super().__init__()
         self._settings = settings
-        self._face_model = cv2.dnn.readNet(AIConfig.Emotions.PROTOTXT_PATH, AIConfig.Emotions.WEIGHTS_PATH)
+        self._classifier = None
 
 
     def reset_state(self) -> None:
-        self._extracted_faces = np.array([])
-
-
-    def _analyze_frame(self, frame: np.ndarray) -> None:
-        extracted_face = self.__predict_face(frame)
-        if extracted_face is None or extracted_face.size == 0: # Skip if no face was detected
+        if self._classifier is None:
+            self._classifier = get_emotion_classifier(self._settings.inference_backend)
+        sampled_frames = self.__calculate_sampled_frames()
+        buffer_size = max(1, min(self._settings.classification_chunk_size, sampled_frames))
+        self._face_buffer = np.empty((buffer_size, *EMOTION_FACE_SIZE, 1), dtype=np.float32)
+        self._buffered_faces = 0
+        self._predictions = np.empty((max(1, sampled_frames), len(EMOTION_TYPES)), dtype=np.float32)
+        self._prediction_count = 0
+
+
+    def _analyze_frame(self, context: FrameContext) -> None:
+        face = self._get_face(context)
+        if face is None or not self.__is_confident(face): # Skip if no face was detected
             return
-        self._extracted_faces = extracted_face if self._extracted_faces.size == 0 \
-            else np.concatenate((self._extracted_faces, extracted_face), axis=0)
+        if self.__extract_face(context.gray, face):
+            self._buffered_faces += 1
+            # Classify the faces as soon as the buffer is full
+            if self._buffered_faces == len(self._face_buffer):
+                self.__classify_buffered_faces()
     
     
     def get_final_result(self) -> EmotionsPipeResponse:
-        emotions_detail = []
-        partial_result = self.__predict_emotions()
-        for label, total in partial_result.total_confidence_by_emotion.items():
-            # Calculate the average confidence
-            count = partial_result.prediction_count_by_emotion[label]
-            average = total / count
-            emotions_detail.append(EmotionDetail(
-                label=label,
-                confidence=Decimal(f"{average:.3f}")
-            ))
+        self.__classify_buffered_faces()
+        predictions = self._predictions[:self._prediction_count]
+        face_count = len(predictions)
+        if face_count == 0:
+            return EmotionsPipeResponse()
+
+        # Reduce the prediction matrix (faces x emotions) for all the emotions at once
+        totals = predictions.sum(axis=0, dtype=np.float64)
+        averages = totals / face_count
+        percentiles = np.percentile(predictions, EMOTION_PERCENTILES, axis=0)
+        dominant_counts = np.bincount(predictions.argmax(axis=1), minlength=len(EMOTION_TYPES))
+
         result = EmotionsPipeResponse(
-            result=emotions_detail,
+            result=[
+                EmotionDetail(label=label, confidence=_to_decimal(averages[i]))
+                for i, label in enumerate(EMOTION_TYPES)
+            ],
+            statistics=[
+                EmotionStatistics(
+                    label=label,
+                    total=_to_decimal(totals[i]),
+                    mean=_to_decimal(averages[i]),
+                    p25=_to_decimal(percentiles[0, i]),
+                    median=_to_decimal(percentiles[1, i]),
+                    p75=_to_decimal(percentiles[2, i]),
+                    p90=_to_decimal(percentiles[3, i]),
+                )
+                for i, label in enumerate(EMOTION_TYPES)
+            ],
+            dominant_emotions=[
+                DominantEmotionShare(
+                    label=label,
+                    count=int(dominant_counts[i]),
+                    share=_to_decimal(dominant_counts[i] / face_count),
+                )
+                for i, label in enumerate(EMOTION_TYPES)
+            ],
+            face_count=face_count,
         )
         return result
 
 
-    def __predict_face(self, frame: np.ndarray) -> np.ndarray | None:
-        """
-        Detect faces in the frame and extract the first one.
-        """
+    def get_partial_state(self) -> EmotionsPartialState:
+        self.__classify_buffered_faces()
+        return EmotionsPartialState(predictions=self._predictions[:self._prediction_count].copy())
 
-        # Convert the frame to a blob
-        blob = cv2.dnn.blobFromImage(frame, 1.0, (224, 224), (104.0, 177.0, 123.0))
-        
-        # Detect faces in the frame
-        self._face_model.setInput(blob)
-        detections = self._face_model.forward()
 
-        # Skip if no faces were detected
-        total_detected_faces = detections.shape[2]
-        if total_detected_faces == 0:
-            return None
+    def merge_partial_state(self, state: EmotionsPartialState) -> None:
+        self.__classify_buffered_faces()
+        self.__store_predictions(state.predictions)
 
-        # Take the first face
-        first_face = detections[0, 0, 0]
 
-        # Check if the confidence of the first detection is enough
-        confidence = first_face[2] # Face detection confidence/probability
-        if confidence < self._settings.face_detection_confidence:
-            return None
-        
-        # Extract the face from the frame
-        face_array = self.__extract_face(frame, first_face)
-        return face_array
+    def __calculate_sampled_frames(self) -> int:
+        """
+        Calculate the number of frames that will be analyzed (at most one face is extracted per frame).
+        """
+        video_settings = self._settings.video_settings
+        step = calculate_frame_step(video_settings.metadata, video_settings.discarded_frames, self._settings.frame_rate)
+        return calculate_sampled_frame_count(video_settings.metadata.frame_count, step - 1)
 
 
-    def __extract_face(self, frame: np.ndarray, face: np.ndarray) -> np.ndarray:
+    def __extract_face(self, gray: np.ndarray, face: FaceBox) -> bool:
         """
-        Extracts the face from the frame.
+        Extracts the face from the grayscale frame into the next slot of the face buffer.
+        Returns `False` if the face is empty.
         """
-        # Use the bounding box of the detection scaled to the dimensions of the image
-        box = face[3:7] * np.array([frame.shape[1], frame.shape[0], frame.shape[1], frame.shape[0]])
-        (Xi, Yi, Xf, Yf) = box.astype("int")
-
-        # Normalize the bounding box coordinates
-        if Xi < 0: Xi = 0
-        if Yi < 0: Yi = 0
-            
-        # Extract the face from the frame, convert it to grayscale and resize it to 48x48
-        extracted_face = frame[Yi:Yf, Xi:Xf]
-        extracted_face = cv2.cvtColor(extracted_face, cv2.COLOR_BGR2GRAY)
-        extracted_face = cv2.resize(extracted_face, (48, 48))
-        face_array = img_to_array(extracted_face)
-        face_array = np.expand_dims(face_array, axis=0)
-        return face_array
+        extracted_face = gray[face.top:face.bottom, face.left:face.right]
+        if extracted_face.size == 0:
+            return False
+        # Resize the face to 48x48 directly into the buffer
+        self._face_buffer[self._buffered_faces, :, :, 0] = cv2.resize(extracted_face, EMOTION_FACE_SIZE)
+        return True
+
+
+    def __is_confident(self, face: FaceBox) -> bool:
+        """
+        Check if the confidence of the detection is enough (detections without confidence are accepted).
+        """
+        return face.confidence is None or face.confidence >= self._settings.face_detection_confidence
     
 
-    def __predict_emotions(self) -> PartialEmotionsResult:
+    def __classify_buffered_faces(self) -> None:
         """
-        Predict the emotion of all the extracted faces.
+        Predict the emotions of the buffered faces and store them in the prediction matrix.
         """
-        
-        partial_result = PartialEmotionsResult(
-            total_confidence_by_emotion={},
-            prediction_count_by_emotion={}
-        )
-        if self._extracted_faces.size == 0:
-            return partial_result
-
-        # Predict emotions
-        predictions = emotion_model.predict(self._extracted_faces, verbose=0)
-       
-        for prediction in predictions:
-            for i in range(0, len(prediction)):
-                label = EMOTION_TYPES[i]
-                confidence = prediction[i]
-                if label in partial_result.total_confidence_by_emotion:
-                    partial_result.total_confidence_by_emotion[label] += confidence
-                    partial_result.prediction_count_by_emotion[label] += 1
-                else:
-                    partial_result.total_confidence_by_emotion[label] = confidence
-                    partial_result.prediction_count_by_emotion[label] = 1
-
-        return partial_result
+        if self._buffered_faces == 0:
+            return
+        predictions = self._classifier.predict(self._face_buffer[:self._buffered_faces]) # type: ignore
+        self.__store_predictions(predictions)
+        self._buffered_faces = 0
+
+
+    def __store_predictions(self, predictions: np.ndarray) -> None:
+        """
+        Store the predictions in the prediction matrix, growing it if the video has more faces than expected.
+        """
+        end = self._prediction_count + len(predictions)
+        if end > len(self._predictions):
+            grown = np.empty((max(end, 2 * len(self._predictions)), len(EMOTION_TYPES)), dtype=np.float32)
+            grown[:self._prediction_count] = self._predictions[:self._prediction_count]
+            self._predictions = grown
+        self._predictions[self._prediction_count:end] = predictions
+        self._prediction_count = end
+
+
+def _to_decimal(value: float) -> Decimal:
+    """
+    Round a value to 3 decimal places.
+    """
+    return Decimal(f"{value:.3f}")
@@ -16,12 +16,20 @@ class AttentionLevelSettings:
     Use values from `api.common.constants.attention_level.EyeRatioAlgorithm`.
     """
 
+    frame_rate: float | None
+    """
+    The number of frames analyzed per second (`None` to analyze all the frames sampled with `VideoAnalyzerSettings.discarded_frames`).
+    Blinks last 100-400 ms, so a dense frame rate is needed.
+    """
+
     def __init__(
         self, 
         video_settings: VideoAnalyzerSettings,
         eye_ratio_threshold: float = 0.2,
-        eye_ratio_algorithm: str = EyeRatioAlgorithm.OPTIMIZED
+        eye_ratio_algorithm: str = EyeRatioAlgorithm.OPTIMIZED,
+        frame_rate: float | None = None
     ):
         self.video_settings = video_settings
         self.eye_ratio_threshold = eye_ratio_threshold
         self.eye_ratio_algorithm = eye_ratio_algorithm
+        self.frame_rate = frame_rate
@@ -1,4 +1,6 @@
 from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.common.constants.emotions import DEFAULT_CLASSIFICATION_CHUNK_SIZE, DEFAULT_EMOTIONS_FRAME_RATE
+from config import AIConfig
 
 
 class EmotionsSettings:
@@ -9,10 +11,29 @@ class EmotionsSettings:
     face_detection_confidence: float
     """The minimum confidence threshold to use for face detection."""
 
+    classification_chunk_size: int
+    """The number of faces classified in a single call to the emotion model while the frames are analyzed."""
+
+    frame_rate: float | None
+    """
+    The number of frames analyzed per second (`None` to analyze all the frames sampled with `VideoAnalyzerSettings.discarded_frames`).
+    Defaults to `DEFAULT_EMOTIONS_FRAME_RATE` (3 FPS). Before per-pipe sampling, the emotions were analyzed in every frame sampled
+    with `discarded_frames`, so the default analysis now classifies fewer faces (`face_count`) and its averages can differ slightly.
+    """
+
+    inference_backend: str
+    """The backend running the emotion classification model. Use the constants available in `api.common.constants.emotions.EmotionsInferenceBackend`."""
+
     def __init__(
         self, 
         video_settings: VideoAnalyzerSettings,
-        face_detection_confidence: float = 0.4
+        face_detection_confidence: float = 0.4,
+        classification_chunk_size: int = DEFAULT_CLASSIFICATION_CHUNK_SIZE,
+        inference_backend: str = AIConfig.Emotions.INFERENCE_BACKEND,
+        frame_rate: float | None = DEFAULT_EMOTIONS_FRAME_RATE
     ):
         self.video_settings = video_settings
         self.face_detection_confidence = face_detection_confidence
+        self.classification_chunk_size = classification_chunk_size
+        self.inference_backend = inference_backend
+        self.frame_rate = frame_rate
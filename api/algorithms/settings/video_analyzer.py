@@ -1,5 +1,6 @@
 from typing import Literal
-from api.common.constants.video import DEFAULT_DISCARDED_FRAMES_VALUE, VideoResolution
+from api.common.constants.face_detection import DEFAULT_FACE_DETECTION_CONFIDENCE, DEFAULT_FACE_DETECTION_INTERVAL, DEFAULT_FACE_DETECTION_SCALE, DEFAULT_FACE_TRACKING_QUALITY_THRESHOLD
+from api.common.constants.video import DEFAULT_BATCH_SIZE, DEFAULT_DISCARDED_FRAMES_VALUE, DEFAULT_FRAME_QUEUE_SIZE, VideoDecoder, VideoResolution
 from api.models.videos import FullVideoMetadata
 
 
@@ -11,6 +12,12 @@ class VideoAnalyzerSettings:
     multithreaded: bool
     """Flag indicating if the analysis should be run in multiple threads. Helps with performance."""
 
+    multiprocess: bool
+    """
+    Flag indicating if each pipe should be run in a worker process, sharing the decoded frames through shared memory.
+    Avoids the GIL contention between pipes on multi-core hosts. Takes precedence over `multithreaded`.
+    """
+
     metadata: FullVideoMetadata
     """The video metadata."""
     
@@ -20,14 +27,90 @@ class VideoAnalyzerSettings:
     discarded_frames: int | Literal["auto"]
     """The number of frames to discard in a second. This affects the performance of the analysis (default: `auto`)."""
 
+    segments: int
+    """
+    The number of time segments of the video analyzed in parallel worker processes (each one seeks to its start).
+    The partial results are merged in temporal order. Use `1` to analyze the video in a single pass.
+    The VideoGear decoder cannot seek, so each segment also decodes the frames before its start (prefer the FFmpeg decoder).
+    """
+
+    pipelined: bool
+    """Flag indicating if the video should be decoded in a dedicated thread, overlapping the decoding with the analysis."""
+
+    batch_size: int
+    """The number of frames analyzed in a single call by the face detector and the pipes (e.g. a single DNN forward pass)."""
+
+    frame_queue_size: int
+    """The maximum number of frames buffered in each stage of the pipeline (pipelined or multithreaded mode). Keeps memory usage flat for long videos."""
+
+    decoder: str
+    """
+    The decoder to use for reading the video frames.
+    Use values from `api.common.constants.video.VideoDecoder`.
+    """
+
+    keyframes_only: bool
+    """Flag indicating if only the keyframes should be analyzed (only supported by the FFmpeg decoder). Ignores `discarded_frames`."""
+
+    face_detector: str | None
+    """
+    The face detector shared by all the pipes. Use values from `api.common.constants.face_detection.FaceDetector`.
+    If `None`, each pipe gets the faces of its preferred detector (each detector runs once per frame, however many pipes use it).
+    """
+
+    face_detection_confidence: float
+    """The minimum confidence threshold to use for face detection (only for detectors that provide a confidence)."""
+
+    face_detection_scale: float
+    """
+    The scale (greater than `0` and up to `1`) of the grayscale plane used by the HOG face detector, relative to the analysis resolution.
+    The detected box is mapped back, so the landmarks and the face crops still use the analysis resolution.
+    Lower values make the detection cheaper but miss small faces. The SSD detector always resizes the frame to its input size, so it is not affected.
+    """
+
+    face_detection_interval: int
+    """
+    The number of analyzed frames between two face detections. The face is followed in between with a correlation tracker,
+    which is much cheaper than a full-frame detection. Use `1` to detect the face in every frame.
+    """
+
+    face_tracking_quality_threshold: float
+    """The minimum tracking quality (peak-to-sidelobe ratio) of a tracked face. The face is detected again when the quality drops below it."""
+
     def __init__(
         self,
         metadata: FullVideoMetadata,
         video_resolution: str = VideoResolution.LOW,
         discarded_frames: int | Literal["auto"] = DEFAULT_DISCARDED_FRAMES_VALUE,
-        multithreaded: bool = False
+        multithreaded: bool = False,
+        multiprocess: bool = False,
+        segments: int = 1,
+        pipelined: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        frame_queue_size: int = DEFAULT_FRAME_QUEUE_SIZE,
+        decoder: str = VideoDecoder.VIDEOGEAR,
+        keyframes_only: bool = False,
+        face_detector: str | None = None,
+        face_detection_confidence: float = DEFAULT_FACE_DETECTION_CONFIDENCE,
+        face_detection_scale: float = DEFAULT_FACE_DETECTION_SCALE,
+        face_detection_interval: int = DEFAULT_FACE_DETECTION_INTERVAL,
+        face_tracking_quality_threshold: float = DEFAULT_FACE_TRACKING_QUALITY_THRESHOLD
     ):
+        if not 0 < face_detection_scale <= 1:
+            raise ValueError(f"The face detection scale must be between 0 (exclusive) and 1, got {face_detection_scale}")
         self.metadata = metadata
         self.video_resolution = video_resolution
         self.discarded_frames = discarded_frames
         self.multithreaded = multithreaded
+        self.multiprocess = multiprocess
+        self.segments = segments
+        self.pipelined = pipelined
+        self.batch_size = batch_size
+        self.frame_queue_size = frame_queue_size
+        self.decoder = decoder
+        self.keyframes_only = keyframes_only
+        self.face_detector = face_detector
+        self.face_detection_confidence = face_detection_confidence
+        self.face_detection_scale = face_detection_scale
+        self.face_detection_interval = face_detection_interval
+        self.face_tracking_quality_threshold = face_tracking_quality_threshold
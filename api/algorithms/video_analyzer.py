@@ -1,18 +1,33 @@
-from typing import Any
-import cv2
-import numpy as np
-from vidgear.gears import VideoGear
+import copy
+import logging
+import threading
 import concurrent.futures
+import numpy as np
+from typing import Any, Generator, Iterable
+from api.algorithms.decoders.factory import get_video_decoder
+from api.algorithms.face_detectors.base import BaseFaceDetector
+from api.algorithms.face_detectors.factory import get_face_detector
+from api.algorithms.frame_store import frame_store
+from api.algorithms.frame_context import FrameBatch, FrameContext
+from api.algorithms.multiprocess import SharedFrameBuffer, process_pool, run_pipe_worker
+from api.algorithms.pipeline import FrameChannel
 from api.algorithms.pipes.base import BaseAnalysisPipe
 from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
-from api.common.utils.os import path_exists
-from api.common.constants.video import DEFAULT_DISCARDED_FRAMES_RATE, DEFAULT_DISCARDED_FRAMES_VALUE
-from api.common.utils.video import calculate_optimal_size
-from api.models.videos import VideoOptimalSize
+from api.common.constants.video import VideoDecoder
+from api.common.utils.video import calculate_frame_step, calculate_optimal_size, probe_frame_timestamps, split_video_segments
+from api.models.pipeline import PipelineStageStats
+from api.models.videos import VideoOptimalSize, VideoSegment
+
 
+logger = logging.getLogger(__name__)
 
 PipeDict = dict[str, BaseAnalysisPipe[Any]]
 AnalysisResult = dict[str, Any]
+FaceDetectionStage = tuple[BaseFaceDetector, list[str], list[int]]
+"""
+A face detector of the shared face detection stage, with the keys of the faces it detects (the detectors preferred by the pipes)
+and the frame strides of the pipes that use them (only the frames analyzed by those pipes are detected).
+"""
 
 class VideoAnalyzer:
     """
@@ -31,7 +46,7 @@ class VideoAnalyzer:
 
     _discarded_frames: int
     """
-    The number of frames to discard.
+    The number of frames to discard between two decoded frames (the video is decoded at the highest frame rate needed by the pipes).
     """
 
     _pipes: PipeDict
@@ -39,17 +54,39 @@ class VideoAnalyzer:
     The list of pipes to use in the analysis.
     """
 
-    _frames: list[np.ndarray]
+    _face_detectors: list[FaceDetectionStage]
+    """
+    The face detectors shared by the pipes (one for each detector preferred by the pipes, empty if no pipe uses the detected faces).
+    """
+
+    _channels: list[FrameChannel]
     """
-    The list of frames to analyze.
+    The channels between the stages of the pipeline used in the last run.
     """
 
+    _segment: VideoSegment | None
+    """
+    The segment of the video to analyze (`None` to analyze the whole video).
+    """
 
-    def __init__(self, video_settings: VideoAnalyzerSettings, pipes: PipeDict):
+
+    def __init__(self, video_settings: VideoAnalyzerSettings, pipes: PipeDict, segment: VideoSegment | None = None):
         self._video_settings = video_settings
         self._video_optimal_size = self._calculate_optimal_size()
-        self._discarded_frames = self._calculate_discarded_frames()
         self._pipes = pipes
+        self._discarded_frames = self._calculate_discarded_frames()
+        self._assign_frame_strides()
+        self._segment = segment
+        self._face_detectors = self._create_face_detectors()
+        self._channels = []
+
+
+    @property
+    def stage_stats(self) -> list[PipelineStageStats]:
+        """
+        The statistics of the pipeline stages used in the last run (empty if the analysis was not pipelined or multithreaded).
+        """
+        return [channel.get_stats() for channel in self._channels]
 
 
     def run(self) -> AnalysisResult:
@@ -60,14 +97,16 @@ class VideoAnalyzer:
         # Reset the state of the analyzer
         self._reset()
 
-        # Extract the frames from the video
-        self._extract_frames()
-
         # Analyze the frames
-        if self._video_settings.multithreaded:
-            final_result = self._analyze_multithreaded()
+        if self._segment is None and self._video_settings.segments > 1:
+            final_result = self._analyze_segments()
+        elif self._video_settings.pipelined:
+            final_result = self._analyze_pipelined()
         else:
-            final_result = self._analyze()
+            final_result = self._analyze_batches(self._read_batches())
+
+        for stats in self.stage_stats:
+            logger.debug("Pipeline stage stats: %s", stats)
         return final_result
 
     
@@ -75,95 +114,279 @@ class VideoAnalyzer:
         """
         Reset the state of the analyzer.
         """
-        self._frames = []
+        self._channels = []
+        for face_detector, _, _ in self._face_detectors:
+            face_detector.reset_state()
         for pipe in self._pipes.values():
             pipe.reset_state()
 
 
-    def _extract_frames(self) -> None:
+    def _read_batches(self) -> Generator[FrameBatch, None, None]:
+        """
+        Read the frames from the video in batches, skipping the discarded ones.
+        Only the batch being analyzed is kept in memory.
+        The faces are detected once per frame and detector (shared face detection stage) and shared by all the pipes.
         """
-        Extract frames from the video.
+        batch_size = max(1, self._video_settings.batch_size)
+        # Number the frames from the start of the video, so the pipes sample the same frames in every segment
+        index = self._segment.start_frame // (self._discarded_frames + 1) if self._segment is not None else 0
+        frames = self._read_frames()
+        try:
+            batch: FrameBatch = []
+            for frame in frames:
+                batch.append(FrameContext(frame, index))
+                index += 1
+                if len(batch) == batch_size:
+                    yield self._detect_faces(batch)
+                    batch = []
+            if len(batch) > 0:
+                yield self._detect_faces(batch)
+        finally:
+            frames.close()
+
+
+    def _read_frames(self) -> Generator[np.ndarray, None, None]:
         """
+        Read the sampled and resized frames of the video.
+        If the frame store is enabled, the frames of the whole video are mapped from the store (decoding them only the first time).
+        Segments are always decoded, since each one is analyzed in a different process.
+        """
+        decoder = get_video_decoder(
+            self._video_settings,
+            self._video_optimal_size,
+            self._discarded_frames,
+            self._segment
+        )
+        if not frame_store.enabled or self._segment is not None:
+            yield from decoder.read_frames()
+            return
 
-        # Validate the video path
         video_path = self._video_settings.metadata.video_path
-        if not path_exists(video_path):
-            raise FileNotFoundError(f"File not found: '{video_path}'")
-
-        # Initialize the video capture object
-        video = VideoGear(source=video_path) # type: ignore
-        stream = video.start() 
-
-        skipped_frames = 0
-        while True:
-            # Read each frame from the video
-            frame = stream.read()
-            if frame is None:
-                break
-
-            # Validate skipped frames
-            if skipped_frames < self._discarded_frames:
-                skipped_frames += 1
+        key = frame_store.get_key(
+            video_path,
+            self._video_settings.decoder,
+            self._video_settings.keyframes_only,
+            self._video_optimal_size.width,
+            self._video_optimal_size.height,
+            self._discarded_frames
+        )
+        stored_frames = frame_store.read(key)
+        if stored_frames is not None:
+            yield from stored_frames
+        else:
+            yield from frame_store.write_through(key, video_path, decoder.read_frames())
+
+
+    def _detect_faces(self, batch: FrameBatch) -> FrameBatch:
+        """
+        Detect the faces of a batch of frames with the shared face detectors.
+        Each detector only runs on the frames analyzed by the pipes that use its faces.
+        """
+        for face_detector, face_keys, strides in self._face_detectors:
+            contexts = [context for context in batch if any(context.index % stride == 0 for stride in strides)]
+            if len(contexts) == 0:
                 continue
-            else:
-                skipped_frames = 0
+            faces = face_detector.detect_batch(contexts)
+            for context, face in zip(contexts, faces):
+                for face_key in face_keys:
+                    context.faces[face_key] = face
+        return batch
 
-            # Resize the frame
-            frame = cv2.resize(frame, (
-                self._video_optimal_size.width,
-                self._video_optimal_size.height
-            ))
-            self._frames.append(frame)
 
-        stream.stop()
+    def _create_channel(self, stage: str) -> FrameChannel:
+        """
+        Create a bounded channel for a stage of the pipeline.
+        The capacity is given in batches, so the number of buffered frames stays within the queue size.
+        """
+        capacity = max(1, self._video_settings.frame_queue_size // max(1, self._video_settings.batch_size))
+        channel = FrameChannel(stage, capacity)
+        self._channels.append(channel)
+        return channel
 
 
-    def _analyze(self) -> AnalysisResult:
+    def _analyze_batches(self, batches: Iterable[FrameBatch]) -> AnalysisResult:
         """
-        Analyze frames from the video.
+        Analyze the batches of frames with the configured threading mode.
         """
-        results = {}
-        for pipe_key, pipe_value in self._pipes.items():
-            pipe_key, result = self._analyze_and_get_result(
-                pipe_key, 
-                pipe_value, 
-                self._frames
-            )
-            results[pipe_key] = result
-        return results
+        if self._video_settings.multiprocess:
+            return self._analyze_multiprocess(batches)
+        if self._video_settings.multithreaded:
+            return self._analyze_multithreaded(batches)
+        return self._analyze(batches)
 
 
-    def _analyze_multithreaded(self) -> AnalysisResult:
+    def _analyze_pipelined(self) -> AnalysisResult:
         """
-        Analyze frames from the video in multiple threads.
+        Decode the video in a dedicated thread while the frames are analyzed,
+        so the decoding time overlaps with the inference time.
         """
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = []
+        decode_channel = self._create_channel("decode")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._produce_batches, decode_channel)
+            try:
+                final_result = self._analyze_batches(decode_channel)
+            finally:
+                # Release the decoder if the analysis failed
+                decode_channel.cancel()
+            future.result()
+        return final_result
+
+
+    def _analyze_segments(self) -> AnalysisResult:
+        """
+        Split the video into time segments and analyze them in parallel worker processes.
+        The partial states of each pipe are merged in temporal order into the pipes of the analyzer.
+        """
+        frame_count = self._video_settings.metadata.frame_count
+        timestamps = None
+        if self._video_settings.decoder == VideoDecoder.FFMPEG:
+            # Place the boundaries between two frames, so the seeks are exact in variable frame rate videos
+            timestamps = probe_frame_timestamps(self._video_settings.metadata.video_path)
+            frame_count = len(timestamps)
+        segments = split_video_segments(
+            frame_count,
+            self._video_settings.segments,
+            self._discarded_frames,
+            timestamps
+        )
+        if self._video_settings.decoder == VideoDecoder.VIDEOGEAR:
+            # VideoGear cannot seek, so each segment decodes all the frames before its start (O(K·N) decoded frames in total)
+            logger.warning(
+                "The VideoGear decoder cannot seek, so the %d segments decode about %.1f times the frames of a single pass. "
+                "Use the FFmpeg decoder for segmented analyses.",
+                len(segments),
+                (len(segments) + 1) / 2
+            )
+        pipe_specs = {
+            pipe_key: (type(pipe_value), pipe_value.settings)
+            for pipe_key, pipe_value in self._pipes.items()
+        }
+        # The segments are queued in the pool, so an analysis never takes more workers than the pool has
+        with process_pool.reserve(min(len(segments), process_pool.size)) as (executor, _):
+            futures = [
+                executor.submit(_analyze_segment, self._video_settings, segment, pipe_specs)
+                for segment in segments
+            ]
+            concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_EXCEPTION)
+            # Stop the pending segments if any segment failed
+            for future in futures:
+                future.cancel()
+            concurrent.futures.wait(futures)
+            partial_states = [future.result() for future in futures]
+
+        for segment_states in partial_states:
             for pipe_key, pipe_value in self._pipes.items():
-                future = executor.submit(self._analyze_and_get_result, pipe_key, pipe_value, self._frames)
-                futures.append(future)
-            results = {}
-            for future in concurrent.futures.as_completed(futures):
-                future_result = future.result()
-                if future_result is None:
-                    continue
-                pipe_key, result = future_result
-                results[pipe_key] = result
-            return results
+                pipe_value.merge_partial_state(segment_states[pipe_key])
+        return self._get_result()
+
+
+    def _produce_batches(self, channel: FrameChannel) -> None:
+        """
+        Decode the frames from the video into the channel until the end of the stream.
+        """
+        batches = self._read_batches()
+        try:
+            for batch in batches:
+                if not channel.put(batch):
+                    break
+        finally:
+            channel.close()
+            batches.close()
 
 
-    def _analyze_and_get_result(
-            self, 
-            pipe_key: str, 
-            pipe_value: BaseAnalysisPipe[Any],
-            frames: list[np.ndarray]
-        ) -> tuple[str, Any]:
+    def _analyze(self, batches: Iterable[FrameBatch]) -> AnalysisResult:
         """
-        Analyze frames from the video and get the final result.
+        Analyze frames from the video, feeding each batch to every pipe.
         """
-        pipe_value.analyze_frames(frames)
-        final_result = pipe_value.get_final_result()
-        return (pipe_key, final_result)
+        for batch in batches:
+            for pipe_value in self._pipes.values():
+                pipe_value.analyze_batch(batch)
+        return self._get_result()
+
+
+    def _analyze_multithreaded(self, batches: Iterable[FrameBatch]) -> AnalysisResult:
+        """
+        Analyze frames from the video in multiple threads (one for each pipe).
+        Batches are fanned out to the pipes through bounded channels.
+        """
+        channels = [self._create_channel(f"pipe:{pipe_key}") for pipe_key in self._pipes]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self._pipes)) as executor:
+            futures = [
+                executor.submit(self._consume_batches, pipe_value, channel)
+                for pipe_value, channel in zip(self._pipes.values(), channels)
+            ]
+            try:
+                for batch in batches:
+                    # Stop decoding as soon as a pipe failed (its channel is cancelled), the analysis fails anyway
+                    if not all(channel.put(batch) for channel in channels):
+                        break
+            finally:
+                # Signal the end of the stream
+                for channel in channels:
+                    channel.close()
+            for future in futures:
+                future.result()
+        return self._get_result()
+
+
+    def _consume_batches(self, pipe_value: BaseAnalysisPipe[Any], channel: FrameChannel) -> None:
+        """
+        Analyze the batches received through the channel until the end of the stream.
+        """
+        try:
+            pipe_value.analyze_batches(channel)
+        except Exception:
+            # Stop receiving frames so the producer is never blocked
+            channel.cancel()
+            raise
+
+
+    def _analyze_multiprocess(self, batches: Iterable[FrameBatch]) -> AnalysisResult:
+        """
+        Analyze frames from the video in worker processes (one for each pipe).
+        The frames are written once to shared memory and the workers only receive the slot indexes.
+        """
+        frame_shape = (self._video_optimal_size.height, self._video_optimal_size.width, 3)
+        slots = max(self._video_settings.frame_queue_size, self._video_settings.batch_size, 1)
+        with process_pool.reserve(len(self._pipes)) as (executor, manager), SharedFrameBuffer(slots, frame_shape) as buffer:
+            ack_queue = manager.Queue()
+            task_queues = [manager.Queue() for _ in self._pipes]
+            futures = [
+                executor.submit(
+                    run_pipe_worker,
+                    type(pipe_value),
+                    pipe_value.settings,
+                    pipe_value.frame_stride,
+                    buffer.name,
+                    frame_shape,
+                    slots,
+                    task_queue,
+                    ack_queue
+                )
+                for pipe_value, task_queue in zip(self._pipes.values(), task_queues)
+            ]
+            ack_thread = threading.Thread(target=buffer.collect_acks, args=(ack_queue, len(self._pipes)), daemon=True)
+            ack_thread.start()
+            try:
+                for batch in batches:
+                    message = []
+                    for context in batch:
+                        slot = buffer.acquire(futures)
+                        buffer.write(slot, context.frame)
+                        message.append((slot, context.index, context.faces))
+                    for task_queue in task_queues:
+                        task_queue.put(message)
+            finally:
+                # Signal the end of the stream
+                for task_queue in task_queues:
+                    task_queue.put(None)
+                concurrent.futures.wait(futures)
+                ack_queue.put(None)
+                ack_thread.join()
+            return {
+                pipe_key: future.result()
+                for pipe_key, future in zip(self._pipes, futures)
+            }
 
 
     def _get_result(self) -> AnalysisResult:
@@ -176,6 +399,27 @@ class VideoAnalyzer:
         return result
         
 
+    def _create_face_detectors(self) -> list[FaceDetectionStage]:
+        """
+        Create the face detectors shared by the pipes: one for each detector preferred by the pipes
+        (or a single one for all the pipes if the detector is set in the video settings).
+        """
+        strides_by_detector: dict[str, set[int]] = {}
+        for pipe in self._pipes.values():
+            if pipe.face_detector is not None:
+                strides_by_detector.setdefault(pipe.face_detector, set()).add(pipe.frame_stride)
+        if len(strides_by_detector) == 0:
+            return []
+        if self._video_settings.face_detector is not None:
+            face_detector = get_face_detector(self._video_settings.face_detector, self._video_settings)
+            strides = set().union(*strides_by_detector.values())
+            return [(face_detector, list(strides_by_detector), sorted(strides))]
+        return [
+            (get_face_detector(face_key, self._video_settings), [face_key], sorted(strides))
+            for face_key, strides in strides_by_detector.items()
+        ]
+
+
     def _calculate_optimal_size(self) -> VideoOptimalSize:
         """
         Calculate the optimal size for the video.
@@ -188,9 +432,53 @@ class VideoAnalyzer:
 
     def _calculate_discarded_frames(self) -> int:
         """
-        Calculate the number of frames to discard.
+        Calculate the number of frames to discard, so the video is decoded at the highest frame rate needed by the pipes.
         """
-        if self._video_settings.discarded_frames == DEFAULT_DISCARDED_FRAMES_VALUE:
-            return int(self._video_settings.metadata.avg_fps * DEFAULT_DISCARDED_FRAMES_RATE)
-        else:
-            return self._video_settings.discarded_frames
+        return min(self._calculate_frame_steps(), default=self._calculate_frame_step(None)) - 1
+
+
+    def _assign_frame_strides(self) -> None:
+        """
+        Set the stride of each pipe over the decoded frames, so each pipe only analyzes the frames at its own frame rate.
+        The stride is rounded down like the frame steps, so a pipe is never sampled below its frame rate.
+        """
+        step = self._discarded_frames + 1
+        for pipe_value, pipe_step in zip(self._pipes.values(), self._calculate_frame_steps()):
+            pipe_value.frame_stride = max(1, pipe_step // step)
+
+
+    def _calculate_frame_steps(self) -> list[int]:
+        """
+        Calculate the step between two analyzed frames of each pipe.
+        """
+        return [self._calculate_frame_step(pipe_value.frame_rate) for pipe_value in self._pipes.values()]
+
+
+    def _calculate_frame_step(self, frame_rate: float | None) -> int:
+        """
+        Calculate the step between two analyzed frames for a frame rate.
+        """
+        return calculate_frame_step(
+            self._video_settings.metadata,
+            self._video_settings.discarded_frames,
+            frame_rate
+        )
+
+
+def _analyze_segment(
+    video_settings: VideoAnalyzerSettings,
+    segment: VideoSegment,
+    pipe_specs: dict[str, tuple[type, Any]]
+) -> dict[str, Any]:
+    """
+    Analyze a segment of the video in a worker process. Returns the partial state of each pipe.
+    """
+    segment_settings = copy.copy(video_settings)
+    segment_settings.segments = 1
+    segment_settings.multiprocess = False
+    pipes: PipeDict = {
+        pipe_key: pipe_type(pipe_settings)
+        for pipe_key, (pipe_type, pipe_settings) in pipe_specs.items()
+    }
+    VideoAnalyzer(segment_settings, pipes, segment).run()
+    return {pipe_key: pipe_value.get_partial_state() for pipe_key, pipe_value in pipes.items()}
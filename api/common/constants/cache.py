@@ -0,0 +1,2 @@
+DEFAULT_ANALYSIS_CACHE_SIZE = 256
+"""The default maximum number of analysis results kept in the cache (`0` disables the cache)."""
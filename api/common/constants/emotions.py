@@ -1 +1,26 @@
 EMOTION_TYPES = ['angry','disgust','fear','happy','neutral','sad','surprise']
+
+EMOTION_FACE_SIZE = (48, 48)
+"""The size of the grayscale faces fed to the emotion classification model."""
+
+DEFAULT_CLASSIFICATION_CHUNK_SIZE = 64
+"""The default number of faces classified in a single call to the emotion classification model."""
+
+DEFAULT_EMOTIONS_FRAME_RATE = 3.0
+"""The default number of frames analyzed per second by the emotions pipe (emotion averages do not need a dense frame rate)."""
+
+EMOTION_PERCENTILES = (25, 50, 75, 90)
+"""The percentiles of the confidence reported for each emotion."""
+
+
+class EmotionsInferenceBackend:
+    KERAS = "keras" # Keras model (`modelFEC.h5`)
+    TFLITE = "tflite" # TensorFlow Lite model converted from the Keras model
+    OPENCV = "opencv" # OpenCV DNN running the ONNX graph exported from the Keras model
+
+
+VALID_EMOTIONS_INFERENCE_BACKENDS = [EmotionsInferenceBackend.KERAS, EmotionsInferenceBackend.TFLITE, EmotionsInferenceBackend.OPENCV]
+"""Valid inference backends for the emotion classification model."""
+
+DEFAULT_EMOTIONS_INFERENCE_BACKEND = EmotionsInferenceBackend.KERAS
+"""The default inference backend for the emotion classification model."""
@@ -0,0 +1,16 @@
+class FaceDetector:
+    HOG = "hog" # Dlib's HOG frontal face detector
+    SSD = "ssd" # OpenCV DNN face detector (res10 SSD)
+
+
+DEFAULT_FACE_DETECTION_CONFIDENCE = 0.4
+"""The default minimum confidence for a face detection (only for detectors that provide a confidence)."""
+
+DEFAULT_FACE_DETECTION_INTERVAL = 1
+"""The default number of frames between two face detections (`1` detects the face in every frame, without tracking)."""
+
+DEFAULT_FACE_TRACKING_QUALITY_THRESHOLD = 7.0
+"""The default minimum quality (peak-to-sidelobe ratio) of the face tracking before the face is detected again."""
+
+DEFAULT_FACE_DETECTION_SCALE = 1.0
+"""The default scale of the grayscale plane used to detect the faces, relative to the analysis resolution (`1.0` detects at the analysis resolution)."""
@@ -0,0 +1,28 @@
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JobType:
+    EMOTIONS = "emotions"
+    ATTENTION_LEVEL = "attentionLevel"
+    UNIFIED = "unified"
+
+VALID_JOB_TYPES = [
+    JobType.EMOTIONS,
+    JobType.ATTENTION_LEVEL,
+    JobType.UNIFIED,
+]
+
+DEFAULT_JOB_WORKERS = 2
+"""The default number of analysis jobs running at the same time."""
+
+DEFAULT_JOB_QUEUE_SIZE = 32
+"""The default maximum number of analysis jobs waiting in the queue."""
+
+DEFAULT_JOB_TTL = 24 * 60 * 60
+"""The default number of seconds a finished job (and its result) is kept before it is removed."""
+
+JOB_CLEANUP_INTERVAL = 10 * 60
+"""The minimum number of seconds between two removals of the expired jobs."""
@@ -7,3 +7,16 @@ class Environment:
     PORT = "PORT"
     STORAGE_PATH = "STORAGE_PATH"
     API_KEY = "API_KEY"
+    PROCESS_POOL_SIZE = "PROCESS_POOL_SIZE"
+    JOB_WORKERS = "JOB_WORKERS"
+    JOB_QUEUE_SIZE = "JOB_QUEUE_SIZE"
+    JOB_TTL = "JOB_TTL"
+    ANALYSIS_CACHE_SIZE = "ANALYSIS_CACHE_SIZE"
+    PRELOAD_MODELS = "PRELOAD_MODELS"
+    EMOTIONS_INFERENCE_BACKEND = "EMOTIONS_INFERENCE_BACKEND"
+    MAX_UPLOAD_SIZE = "MAX_UPLOAD_SIZE"
+    VIDEO_UPLOAD_MODE = "VIDEO_UPLOAD_MODE"
+    PROXY_RESOLUTION = "PROXY_RESOLUTION"
+    PROXY_FRAME_RATE = "PROXY_FRAME_RATE"
+    PROXY_GRAYSCALE = "PROXY_GRAYSCALE"
+    FRAME_STORE_MAX_SIZE = "FRAME_STORE_MAX_SIZE"
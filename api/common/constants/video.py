@@ -11,6 +11,11 @@ class VideoAspectRatio:
     OTHER = "other"
 
 
+class VideoDecoder:
+    VIDEOGEAR = "videogear" # Decodes every frame and samples/resizes in Python
+    FFMPEG = "ffmpeg" # Samples/resizes with FFmpeg filters before the frames reach Python
+
+
 class VideoExtension:
     MP4 = ".mp4"
     WEBM = ".webm"
@@ -19,6 +24,14 @@ class VideoExtension:
 VALID_VIDEO_EXTENSIONS = [VideoExtension.MP4, VideoExtension.WEBM]
 """Valid video extensions."""
 
+STREAMABLE_VIDEO_EXTENSIONS = [VideoExtension.WEBM]
+"""Extensions of the videos that FFmpeg can read from a pipe while they are uploaded (MP4 files usually store their index at the end)."""
+
+
+class VideoUploadMode:
+    ORIGINAL = "original" # Store the uploaded video (converted to MP4 if `CONVERT_VIDEO` is set)
+    PROXY = "proxy" # Store an analysis proxy (resized and sampled once at upload, so every analysis decodes less)
+
 
 OPTIMAL_SIZE_BY_ASPECT_RATIO: dict[str, dict[str, tuple[int, int]]] = {
     VideoResolution.MEDIUM: {
@@ -45,5 +58,38 @@ DEFAULT_DISCARDED_FRAMES_VALUE = "auto"
 DEFAULT_DISCARDED_FRAMES_RATE = 0.1
 """The sample rate should not be higher than 10% of FPS to avoid loosing analysis quality."""
 
+DEFAULT_BATCH_SIZE = 8
+"""The default number of frames analyzed in a single call by the face detector and the pipes."""
+
+DEFAULT_FRAME_QUEUE_SIZE = 32
+"""The maximum number of decoded frames buffered for each pipe while streaming the video."""
+
 CONVERT_VIDEO = False
 """Whether to convert the video or not."""
+
+DEFAULT_MAX_UPLOAD_SIZE = 1024 * 1024 * 1024
+"""The default maximum size of an uploaded video in bytes (1 GiB)."""
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+"""The size in bytes of the chunks read from an upload while it is written to disk."""
+
+UPLOAD_FIELD_NAME = "video"
+"""The name of the form field with the uploaded video."""
+
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+"""
+The maximum size in bytes of the multipart form around the uploaded video (boundaries, headers and other fields).
+The upload is rejected before receiving its body if its `Content-Length` exceeds the maximum upload size plus this overhead.
+"""
+
+PROBE_CACHE_SIZE = 128
+"""The maximum number of video files whose probed metadata is kept in memory."""
+
+DEFAULT_PROXY_FRAME_RATE = 8.0
+"""
+The default maximum frame rate of the analysis proxies. It is kept below 10 FPS,
+so the default sampling (`DEFAULT_DISCARDED_FRAMES_RATE`) analyzes every frame of the proxy.
+"""
+
+DEFAULT_FRAME_STORE_MAX_SIZE = 0
+"""The default maximum size in bytes of the pre-decoded frames kept for repeated analyses (`0` disables the frame store)."""
@@ -0,0 +1,35 @@
+"""
+Utilities for analysis settings.
+"""
+
+import json
+import hashlib
+from typing import Any
+from pydantic import BaseModel
+
+
+def _to_serializable(value: Any) -> Any:
+    """
+    Convert settings objects to JSON-serializable values (including the class name of each object).
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, dict):
+        return {str(key): _to_serializable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_serializable(item) for item in value]
+    if hasattr(value, "__dict__"):
+        return {
+            "__type__": type(value).__qualname__,
+            **{key: _to_serializable(item) for key, item in vars(value).items()},
+        }
+    return value
+
+
+def calculate_settings_hash(*settings: Any) -> str:
+    """
+    Calculate a stable hash of the given settings objects (e.g. `VideoAnalyzerSettings` and the pipe settings).
+    Two analyses with the same hash produce the same result.
+    """
+    serialized = json.dumps(_to_serializable(settings), sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
@@ -0,0 +1,148 @@
+"""
+Streaming reader of the files uploaded in multipart requests.
+
+FastAPI parses the whole multipart body (spooling the files to temporal files) before calling the endpoint,
+so large uploads are received, and written to disk, before they can be validated. This reader parses the body
+while it is received instead, so the file content can be validated and written to its final location (or to FFmpeg)
+as it arrives, without an intermediate copy.
+"""
+
+import multipart
+from multipart.multipart import parse_options_header
+from fastapi import Request, status
+from api.common.exceptions import AppException
+
+
+class UploadStream:
+    """
+    Reader of a file field of a multipart request, parsed from the request body while it is received.
+    """
+
+    filename: str | None
+    """
+    The name of the uploaded file (`None` until the headers of the file are parsed).
+    """
+
+    _field_name: str
+    """
+    The name of the form field with the file.
+    """
+
+    _body: object
+    """
+    The stream of chunks of the request body.
+    """
+
+    _parser: object
+    """
+    The multipart parser of the request body.
+    """
+
+    _chunks: list[bytes]
+    """
+    The parsed chunks of the file waiting to be read.
+    """
+
+    _header_field: bytes
+    _header_value: bytes
+    _headers: dict[bytes, bytes]
+
+    _in_file: bool
+    """
+    Flag indicating if the parser is in the file part.
+    """
+
+    _file_ended: bool
+    """
+    Flag indicating if the whole file was parsed.
+    """
+
+    def __init__(self, request: Request, field_name: str):
+        content_type, params = parse_options_header(request.headers.get("Content-Type", ""))
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise AppException("The request must be a multipart form", status_code=status.HTTP_400_BAD_REQUEST)
+        self.filename = None
+        self._field_name = field_name
+        self._body = request.stream().__aiter__()
+        self._parser = multipart.MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+        self._chunks = []
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._file_ended = False
+
+    async def open(self) -> str | None:
+        """
+        Receive the request until the headers of the file. Returns the name of the file (`None` if the form has no file).
+        """
+        while self.filename is None and await self._receive():
+            pass
+        return self.filename
+
+    async def read(self, size: int) -> bytes:
+        """
+        Receive the next chunk of the file, of at least `size` bytes (except for the last chunk).
+        Returns an empty chunk at the end of the file.
+        """
+        buffered = sum(len(chunk) for chunk in self._chunks)
+        while buffered < size and not self._file_ended:
+            if not await self._receive():
+                raise AppException("The upload is incomplete", status_code=status.HTTP_400_BAD_REQUEST)
+            buffered = sum(len(chunk) for chunk in self._chunks)
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+    async def _receive(self) -> bool:
+        """
+        Parse the next chunk of the request body. Returns `False` at the end of the body.
+        """
+        try:
+            chunk = await self._body.__anext__() # type: ignore
+        except StopAsyncIteration:
+            return False
+        if chunk:
+            self._parser.write(chunk) # type: ignore
+        return True
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        # Only the first file of the field is read
+        if self.filename is not None:
+            return
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("utf-8") == self._field_name and b"filename" in options:
+            self.filename = options[b"filename"].decode("utf-8")
+            self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._chunks.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self._file_ended = True
@@ -2,13 +2,16 @@
 Utilities for video processing.
 """
 
+import os
+import json
 import math
 import logging
+import functools
 import subprocess
 import ffmpeg
-from typing import Union
-from api.common.constants.video import OPTIMAL_SIZE_BY_ASPECT_RATIO, VideoAspectRatio, VideoResolution
-from api.models.videos import BaseVideoMetadata, FullVideoMetadata, VideoOptimalSize
+from typing import Literal, Union
+from api.common.constants.video import DEFAULT_DISCARDED_FRAMES_RATE, DEFAULT_DISCARDED_FRAMES_VALUE, OPTIMAL_SIZE_BY_ASPECT_RATIO, PROBE_CACHE_SIZE, VideoAspectRatio, VideoResolution
+from api.models.videos import FullVideoMetadata, VideoOptimalSize, VideoSegment
 
 
 logger = logging.getLogger(__name__)
@@ -32,16 +35,16 @@ def _calculate_aspect_ratio(width: int, height: int) -> str:
     return f"{width // gcd}:{height // gcd}"
 
 
-def extract_stream_metadata(path: str) -> BaseVideoMetadata | None:
+def extract_metadata(path: str) -> FullVideoMetadata | None:
     """
-    Extract the metadata of a video stream using FFmpeg.
+    Extract the metadata of a video using FFmpeg.
 
     Parameters:
         - path: The path to the video file.
     """
-    
+
     try:
-        probe = ffmpeg.probe(path, count_frames=None)
+        probe = ffmpeg.probe(path)
     except ffmpeg.Error as e:
         logger.error('Error occurred while extracting video metadata: %s', e.stderr.decode('utf-8'))
         raise e
@@ -50,16 +53,20 @@ def extract_stream_metadata(path: str) -> BaseVideoMetadata | None:
     if raw_metadata is None:
         return None
 
-    frame_count = int(raw_metadata['nb_read_frames'])
+    avg_fps = _parse_video_fps(raw_metadata['avg_frame_rate'])
+    frame_count = int(raw_metadata['nb_frames'])
+    duration = float(raw_metadata['duration'])
     width = int(raw_metadata['width'])
     height = int(raw_metadata['height'])
     aspect_ratio = raw_metadata['display_aspect_ratio'] \
         if 'display_aspect_ratio' in raw_metadata \
         else _calculate_aspect_ratio(width, height)
     
-    video_metadata = BaseVideoMetadata(
+    video_metadata = FullVideoMetadata(
         video_path=path,
+        avg_fps=round(avg_fps, 2),
         frame_count=frame_count,
+        duration=round(duration, 2),
         width=width,
         height=height,
         aspect_ratio=aspect_ratio
@@ -67,43 +74,103 @@ def extract_stream_metadata(path: str) -> BaseVideoMetadata | None:
     return video_metadata
 
 
-def extract_metadata(path: str) -> FullVideoMetadata | None:
+def extract_packet_metadata(path: str, cmd='ffprobe') -> FullVideoMetadata | None:
     """
-    Extract the metadata of a video using FFmpeg.
+    Extract the metadata of a video from its packet timestamps with a single FFprobe call, without decoding the video.
+    Useful for containers without a frame count or duration (e.g. WebM recorded by browsers).
+    If the packets have no timestamps, the frame count is estimated from the duration and frame rate of the container.
+    The results are cached for each file (until the file changes).
 
     Parameters:
         - path: The path to the video file.
     """
+    stat = os.stat(path)
+    metadata = _probe_packet_metadata(path, stat.st_mtime_ns, stat.st_size, cmd)
+    # Return a copy, so the callers never change the cached metadata
+    return metadata.model_copy() if metadata is not None else None
 
-    try:
-        probe = ffmpeg.probe(path)
-    except ffmpeg.Error as e:
-        logger.error('Error occurred while extracting video metadata: %s', e.stderr.decode('utf-8'))
-        raise e
-    raw_metadata = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
 
+@functools.lru_cache(maxsize=PROBE_CACHE_SIZE)
+def _probe_packet_metadata(path: str, mtime_ns: int, size: int, cmd: str) -> FullVideoMetadata | None:
+    """
+    Probe the packets of a video (cached by path, modification time and size).
+    """
+    args = [
+        cmd,
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height,display_aspect_ratio,avg_frame_rate,r_frame_rate,nb_frames,duration:format=duration:packet=pts_time',
+        '-of', 'json',
+        path
+    ]
+    p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = p.communicate()
+    if p.returncode != 0:
+        logger.error('Error occurred while extracting video metadata: %s', err.decode('utf-8'))
+        raise ffmpeg.Error('ffprobe', out, err)
+    probe = json.loads(out.decode('utf-8'))
+
+    raw_metadata = next(iter(probe.get('streams', [])), None)
     if raw_metadata is None:
         return None
 
-    avg_fps = _parse_video_fps(raw_metadata['avg_frame_rate'])
-    frame_count = int(raw_metadata['nb_frames'])
-    duration = float(raw_metadata['duration'])
+    # Packets are stored in decoding order
+    timestamps = sorted(
+        float(packet['pts_time']) for packet in probe.get('packets', [])
+        if packet.get('pts_time', 'N/A') != 'N/A'
+    )
+    if len(timestamps) > 1:
+        frame_count = len(timestamps)
+        # The last frame lasts as long as the average frame
+        duration = (timestamps[-1] - timestamps[0]) * frame_count / (frame_count - 1)
+    else:
+        # Estimate the frame count from the container
+        duration = _parse_optional_float(raw_metadata.get('duration')) \
+            or _parse_optional_float(probe.get('format', {}).get('duration')) \
+            or 0.0
+        fps = _parse_optional_fps(raw_metadata.get('avg_frame_rate')) \
+            or _parse_optional_fps(raw_metadata.get('r_frame_rate')) \
+            or 0.0
+        frame_count = int(_parse_optional_float(raw_metadata.get('nb_frames')) or round(duration * fps))
+
+    if frame_count == 0 or duration == 0:
+        return None
+
     width = int(raw_metadata['width'])
     height = int(raw_metadata['height'])
     aspect_ratio = raw_metadata['display_aspect_ratio'] \
         if 'display_aspect_ratio' in raw_metadata \
         else _calculate_aspect_ratio(width, height)
-    
-    video_metadata = FullVideoMetadata(
+
+    return FullVideoMetadata(
         video_path=path,
-        avg_fps=round(avg_fps, 2),
+        avg_fps=round(frame_count / duration, 2),
         frame_count=frame_count,
         duration=round(duration, 2),
         width=width,
         height=height,
         aspect_ratio=aspect_ratio
     )
-    return video_metadata
+
+
+def _parse_optional_float(value: str | None) -> float | None:
+    """
+    Parse an optional numeric value reported by FFprobe (`None` if missing or not available).
+    """
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_optional_fps(fps: str | None) -> float | None:
+    """
+    Parse an optional frame rate reported by FFprobe (`None` if missing or unknown, e.g. "0/0").
+    """
+    try:
+        return _parse_video_fps(fps) if fps is not None else None
+    except (ValueError, ZeroDivisionError):
+        return None
 
 
 def calculate_optimal_size(video_metadata: FullVideoMetadata, resolution: str) -> VideoOptimalSize:
@@ -134,6 +201,117 @@ def calculate_optimal_size(video_metadata: FullVideoMetadata, resolution: str) -
     )
 
 
+def calculate_discarded_frames(video_metadata: FullVideoMetadata, discarded_frames: int | Literal["auto"]) -> int:
+    """
+    Calculate the number of frames to discard after each analyzed frame.
+
+    Parameters:
+        - video_metadata: The video metadata.
+        - discarded_frames: The configured number of frames to discard or `auto` to use the default rate.
+    """
+    if discarded_frames == DEFAULT_DISCARDED_FRAMES_VALUE:
+        return int(video_metadata.avg_fps * DEFAULT_DISCARDED_FRAMES_RATE)
+    return discarded_frames
+
+
+def calculate_frame_step(
+    video_metadata: FullVideoMetadata,
+    discarded_frames: int | Literal["auto"],
+    frame_rate: float | None = None
+) -> int:
+    """
+    Calculate the step between two analyzed frames (e.g. `1` analyzes every frame).
+    The frame rate can only reduce the frames sampled with `discarded_frames`.
+    The step is rounded down, so the frames are never sampled below the requested frame rate
+    (e.g. a 7.5 FPS video sampled at 3 FPS analyzes every second frame, so 3.75 FPS).
+
+    Parameters:
+        - video_metadata: The video metadata.
+        - discarded_frames: The configured number of frames to discard or `auto` to use the default rate.
+        - frame_rate: The number of frames to analyze per second (`None` to use only `discarded_frames`).
+    """
+    step = calculate_discarded_frames(video_metadata, discarded_frames) + 1
+    if frame_rate is None or frame_rate <= 0:
+        return step
+    return max(step, math.floor(video_metadata.avg_fps / frame_rate))
+
+
+def calculate_sampled_frame_count(frame_count: int, discarded_frames: int) -> int:
+    """
+    Calculate the number of frames analyzed when discarding `discarded_frames` frames before each analyzed one.
+
+    Parameters:
+        - frame_count: The total number of frames in the video.
+        - discarded_frames: The number of frames to discard after each analyzed frame.
+    """
+    return frame_count // (discarded_frames + 1)
+
+
+def split_video_segments(
+    frame_count: int,
+    segments: int,
+    discarded_frames: int,
+    timestamps: list[float] | None = None
+) -> list[VideoSegment]:
+    """
+    Split a video into consecutive segments of (almost) the same length.
+    The segments start at multiples of the sampling step, so the analyzed frames are the same as in a single pass.
+    The last segment has no end, so the frames beyond the metadata frame count are still analyzed.
+
+    Parameters:
+        - frame_count: The total number of frames in the video.
+        - segments: The maximum number of segments.
+        - discarded_frames: The number of frames to discard after each analyzed frame.
+        - timestamps: The presentation timestamps of the frames (see `probe_frame_timestamps`). If given, the boundaries
+          of the segments are placed halfway between two frames, so each frame belongs to a single segment even in variable frame rate videos.
+    """
+    step = discarded_frames + 1
+    steps_per_segment = max(1, math.ceil(math.ceil(frame_count / step) / max(1, segments)))
+    segment_length = steps_per_segment * step
+    starts = list(range(0, max(1, frame_count), segment_length))
+    ends: list[int | None] = [*starts[1:], None]
+
+    def boundary_time(frame: int | None) -> float | None:
+        if timestamps is None or frame is None or frame <= 0 or frame >= len(timestamps):
+            return None
+        return (timestamps[frame - 1] + timestamps[frame]) / 2
+
+    return [
+        VideoSegment(
+            start_frame=start,
+            end_frame=end,
+            start_time=boundary_time(start),
+            end_time=boundary_time(end)
+        )
+        for start, end in zip(starts, ends)
+    ]
+
+
+def probe_frame_timestamps(path: str, cmd='ffprobe') -> list[float]:
+    """
+    Read the presentation timestamps (in seconds) of the video frames from the packets, without decoding the video.
+
+    Parameters:
+        - path: The path to the video file.
+    """
+    args = [
+        cmd,
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time',
+        '-of', 'csv=p=0',
+        path
+    ]
+    p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = p.communicate()
+    if p.returncode != 0:
+        logger.error('Error occurred while extracting frame timestamps: %s', err.decode('utf-8'))
+        raise ffmpeg.Error('ffprobe', out, err)
+    values = (line.strip(',') for line in out.decode('utf-8').split())
+    # Packets are stored in decoding order
+    return sorted(float(value) for value in values if value not in ('', 'N/A'))
+
+
 def convert_video(
     input_path: str, 
     output_path: str, 
@@ -164,42 +342,63 @@ def convert_video(
         raise e
 
 
-def calculate_stream_duration(path: str) -> float:
+def _proxy_width_expression(resolution: str) -> str:
+    """
+    Build the FFmpeg expression of the proxy width, so the proxy has the optimal size of its aspect ratio
+    (see `OPTIMAL_SIZE_BY_ASPECT_RATIO`). The height keeps the aspect ratio of the video.
+    """
+    config = OPTIMAL_SIZE_BY_ASPECT_RATIO[resolution]
+    expression = str(config[VideoAspectRatio.OTHER][0])
+    for aspect_ratio, (width, height) in config.items():
+        if aspect_ratio == VideoAspectRatio.OTHER:
+            continue
+        ratio_width, ratio_height = (int(value) for value in aspect_ratio.split(':'))
+        expression = f"if(eq(iw*{ratio_height},ih*{ratio_width}),{width},{expression})"
+    return expression
+
+
+def create_proxy_stream(
+    input_path: str,
+    output_path: str,
+    resolution: str,
+    frame_rate: float,
+    grayscale: bool = False
+):
     """
-    Calculate the duration of a video stream.
+    Create the FFmpeg stream that transcodes a video to an analysis proxy (MP4 resized to the optimal size and sampled at the frame rate).
 
     Parameters:
-        - path: The path to the video file.
+        - input_path: The path to the input video file (`pipe:0` to read the video from the standard input).
+        - output_path: The path to the output video file.
+        - resolution: The resolution of the proxy. Use the constants available in `api.common.constants.video.VideoResolution`.
+        - frame_rate: The maximum frame rate of the proxy (videos with a lower frame rate keep all their frames).
+        - grayscale: Whether to remove the colors of the proxy.
     """
-    try:
-        duration = duration_probe(path)
-    except ffmpeg.Error as e:
-        logger.error('Error occurred while extracting video duration: %s', e.stderr.decode('utf-8'))
-        raise e
-    return round(duration, 2)
+    stream = ffmpeg.input(input_path)
+    if resolution != VideoResolution.ORIGINAL and resolution in OPTIMAL_SIZE_BY_ASPECT_RATIO:
+        stream = stream.filter('scale', _proxy_width_expression(resolution), -2)
+    if grayscale:
+        stream = stream.filter('hue', s=0)
+    return stream\
+        .output(output_path, vcodec='libx264', preset='veryfast', pix_fmt='yuv420p', fpsmax=frame_rate, an=None)\
+        .global_args('-loglevel', 'error')\
+        .overwrite_output()
 
 
-def duration_probe(filename, cmd='ffprobe') -> float:
+def create_video_proxy(
+    input_path: str,
+    output_path: str,
+    resolution: str,
+    frame_rate: float,
+    grayscale: bool = False,
+    quiet: bool = True
+) -> None:
     """
-    Run ffprobe on a file and return the output as a string (duration).
+    Transcode a video file to an analysis proxy using FFmpeg (see `create_proxy_stream`).
     """
-    
-    # ffprobe -v 0 -of compact=p=0:nk=1 -show_entries packet=pts_time -read_intervals 99999%+#1000 recorded-video.webm
-    args = [
-        cmd,
-        '-v', '0',
-        '-of', 'compact=p=0:nk=1',
-        '-show_entries', 'packet=pts_time',
-        '-read_intervals', '99999%+#1000',
-    ]
-    args += [filename]
-
-    p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    out, err = p.communicate()
-    if p.returncode != 0:
-        raise ffmpeg.Error('ffprobe', out, err)
+    stream = create_proxy_stream(input_path, output_path, resolution, frame_rate, grayscale)
     try:
-        duration = float(out.decode('utf-8').strip().split('\n')[-1])
-        return duration
-    except ValueError:
-        return 0.0
+        stream.run(quiet=quiet, capture_stderr=True)
+    except ffmpeg.Error as e:
+        logger.error('Error occurred while creating video proxy: %s', e.stderr.decode('utf-8'))
+        raise e
@@ -16,3 +16,18 @@ class AttentionLevelResponse(BaseModel):
     blink_rate: DecimalField
     level: str
     video_duration: DecimalField 
+    analysis_time: DecimalField | None = None
+    """Time in seconds spent analyzing the video."""
+    cached: bool = False
+    """Flag indicating if the result was served from the analysis cache (`analysis_time` is then the time spent reading it)."""
+
+
+class AttentionLevelPartialState(BaseModel):
+    blinks: int
+    """The number of blinks registered in the segment."""
+
+    first_eye_closed: bool | None
+    """Flag indicating if the eye was closed in the first frame with a face (`None` if no face was found)."""
+
+    eye_closed: bool
+    """Flag indicating if the eye was closed at the end of the segment."""
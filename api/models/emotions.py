@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, ConfigDict
 from api.common.annotations import DecimalField
 
 
@@ -11,22 +12,58 @@ class EmotionDetail(BaseModel):
     confidence: DecimalField
 
 
+class EmotionStatistics(BaseModel):
+    label: str
+    total: DecimalField
+    mean: DecimalField
+    p25: DecimalField
+    median: DecimalField
+    p75: DecimalField
+    p90: DecimalField
+
+
+class DominantEmotionShare(BaseModel):
+    label: str
+    count: int
+    """
+    The number of faces where the emotion had the highest confidence.
+    """
+
+    share: DecimalField
+    """
+    The fraction of faces where the emotion had the highest confidence.
+    """
+
+
 class EmotionsPipeResponse(BaseModel):
     result: list[EmotionDetail] = []
+    statistics: list[EmotionStatistics] = []
+    dominant_emotions: list[DominantEmotionShare] = []
+    face_count: int = 0
 
 
 class EmotionsResponse(BaseModel):
+    """
+    Emotions of the faces in the frames analyzed at `EmotionsSettings.frame_rate` (3 FPS by default).
+    Before per-pipe sampling, every frame sampled with `VideoAnalyzerSettings.discarded_frames` was analyzed,
+    so `face_count` is now lower for the same video and the averages can differ slightly.
+    """
+
     result: list[EmotionDetail] = []
+    statistics: list[EmotionStatistics] = []
+    dominant_emotions: list[DominantEmotionShare] = []
+    face_count: int = 0
     video_duration: DecimalField 
+    analysis_time: DecimalField | None = None
+    """Time in seconds spent analyzing the video."""
+    cached: bool = False
+    """Flag indicating if the result was served from the analysis cache (`analysis_time` is then the time spent reading it)."""
 
 
-class PartialEmotionsResult(BaseModel):
-    total_confidence_by_emotion: dict[str, float]
-    """
-    The total confidence for each emotion.
-    """
+class EmotionsPartialState(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    prediction_count_by_emotion: dict[str, int]
+    predictions: np.ndarray
     """
-    The number of predictions for each emotion.
+    The predictions of the faces classified in the segment (one row per face, one column per emotion).
     """
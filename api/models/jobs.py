@@ -0,0 +1,36 @@
+from typing import Any
+from pydantic import BaseModel
+
+
+class JobRequest(BaseModel):
+    video_id: str
+    type: str
+    """Type of analysis. Use values from `api.common.constants.jobs.JobType`."""
+
+
+class CreateJobResponse(BaseModel):
+    job_id: str
+    status: str
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    type: str
+    video_id: str
+    status: str
+    """Status of the job based on the constants in `api.common.constants.jobs.JobStatus`."""
+
+    created_at: float
+    """Time when the job was submitted (seconds since the epoch)."""
+
+    started_at: float | None = None
+    """Time when the analysis started (seconds since the epoch)."""
+
+    finished_at: float | None = None
+    """Time when the analysis finished (seconds since the epoch)."""
+
+    result: dict[str, Any] | None = None
+    """Result of the analysis (same as the data of the synchronous endpoint)."""
+
+    error: str | None = None
+    """Error message if the job failed."""
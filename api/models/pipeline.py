@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+
+
+class PipelineStageStats(BaseModel):
+
+    stage: str
+    """Name of the stage (e.g. "decode", "pipe:emotions")."""
+
+    capacity: int
+    """Maximum number of frame batches buffered in the stage queue."""
+
+    frames: int
+    """Number of frames that went through the stage queue."""
+
+    max_depth: int
+    """Maximum number of frame batches buffered at the same time."""
+
+    avg_depth: float
+    """Average number of frame batches buffered (sampled each time a batch is added)."""
+
+    producer_stall_time: float
+    """Time in seconds the producer was blocked because the queue was full."""
+
+    consumer_stall_time: float
+    """Time in seconds the consumer was blocked because the queue was empty."""
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+
+
+class ModelLoadReport(BaseModel):
+
+    name: str
+    """Name of the model."""
+
+    load_time: float
+    """Time in seconds spent loading the model (`0` if it was already loaded)."""
+
+    warm_up_time: float | None = None
+    """Time in seconds spent running the model with dummy data (`None` if the model was not warmed up)."""
+
+
+class StartupReport(BaseModel):
+
+    models: list[ModelLoadReport] = []
+    """Report of each model loaded at startup."""
+
+    orphaned_jobs: int = 0
+    """Number of jobs left queued or running by the previous run of the service (marked as failed)."""
+
+    expired_jobs: int = 0
+    """Number of finished jobs removed because they were older than their time to live."""
+
+    startup_time: float
+    """Total time in seconds spent in the startup hooks."""
@@ -10,4 +10,9 @@ class UnifiedRequest(BaseModel):
 
 class UnifiedResponse(BaseModel):
     emotions: EmotionsPipeResponse | None
+    attention_level: AttentionLevelPipeResponse | None = None
     video_duration: DecimalField 
+    analysis_time: DecimalField | None = None
+    """Time in seconds spent analyzing the video (all the pipes run over a single decoded frame stream)."""
+    cached: bool = False
+    """Flag indicating if the result was served from the analysis cache (`analysis_time` is then the time spent reading it)."""
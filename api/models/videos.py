@@ -6,6 +6,18 @@ class UploadVideoResponse(BaseModel):
     video_id: str
 
 
+class UploadedFile(BaseModel):
+
+    path: str
+    """Path where the upload was written."""
+
+    content_hash: str
+    """SHA-256 hash of the file content (hexadecimal)."""
+
+    size: int
+    """Size of the file in bytes."""
+
+
 class DeleteVideoRequest(BaseModel):
     
     video_id: str
@@ -48,3 +60,18 @@ class VideoOptimalSize(BaseModel):
     
     resolution: str
     """Video resolution based on the constants in `api.common.constants.video.VideoResolution`."""
+
+
+class VideoSegment(BaseModel):
+
+    start_frame: int
+    """Index of the first frame of the segment."""
+
+    end_frame: int | None
+    """Index of the frame after the last frame of the segment (`None` to read until the end of the video)."""
+
+    start_time: float | None = None
+    """Timestamp in seconds where the segment starts (`None` if unknown or if the segment starts at the beginning)."""
+
+    end_time: float | None = None
+    """Timestamp in seconds where the segment ends (`None` if unknown or if the segment ends at the end of the video)."""
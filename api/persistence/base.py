@@ -23,6 +23,12 @@ class IObjectStore:
         """
         raise NotImplementedError
 
+    def set(self, key: str, value: dict) -> None:
+        """
+        Adds or replaces data by key.
+        """
+        raise NotImplementedError
+
     def delete(self, key: str) -> None:
         """
         Deletes data by key.
@@ -0,0 +1,110 @@
+import time
+import threading
+from api.persistence.base import IObjectStore
+
+
+class LRUObjectCache:
+    """
+    Cache bounded by size with a least recently used (LRU) eviction policy, stored in an object store.
+    Entries belong to an owner (e.g. a video), so all the entries of an owner can be evicted at once.
+    """
+
+    store: IObjectStore
+    """
+    The object store where the entries are saved.
+    """
+
+    max_size: int
+    """
+    The maximum number of entries (`0` disables the cache).
+    """
+
+    lock: threading.Lock
+    """
+    Lock for keeping the size bound when entries are added from several threads.
+    """
+
+    _index: dict[str, tuple[str, float]] | None
+    """
+    The owner and last access time of each entry, by entry key (loaded from the store on first use).
+    Used to count and evict the entries without reading the cached values.
+    """
+
+    def __init__(self, store: IObjectStore, max_size: int):
+        self.store = store
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self._index = None
+
+    def get(self, owner: str, key: str) -> dict | None:
+        """
+        Returns the cached value (`None` if it is not cached), marking it as recently used.
+        """
+        if self.max_size <= 0:
+            return None
+        entry_key = self._get_entry_key(owner, key)
+        # The entry is touched under the lock, so an entry evicted in the meantime is never saved again
+        with self.lock:
+            entry = self.store.get_by_id(entry_key)
+            if entry is None:
+                return None
+            entry["accessed_at"] = time.time()
+            self.store.set(entry_key, entry)
+            self._get_index()[entry_key] = (owner, entry["accessed_at"])
+        return entry["value"]
+
+    def set(self, owner: str, key: str, value: dict) -> None:
+        """
+        Caches a value, evicting the least recently used entries if the cache is full.
+        """
+        if self.max_size <= 0:
+            return
+        now = time.time()
+        entry_key = self._get_entry_key(owner, key)
+        with self.lock:
+            self.store.set(entry_key, {
+                "owner": owner,
+                "value": value,
+                "created_at": now,
+                "accessed_at": now,
+            })
+            index = self._get_index()
+            index[entry_key] = (owner, now)
+            if len(index) > self.max_size:
+                by_access = sorted(index, key=lambda item: index[item][1])
+                for evicted_key in by_access[:len(index) - self.max_size]:
+                    self.store.delete(evicted_key)
+                    del index[evicted_key]
+
+    def evict(self, owner: str) -> None:
+        """
+        Removes all the entries of an owner.
+        """
+        with self.lock:
+            index = self._get_index()
+            for entry_key in [entry_key for entry_key, (entry_owner, _) in index.items() if entry_owner == owner]:
+                self.store.delete(entry_key)
+                del index[entry_key]
+
+    def clear(self) -> None:
+        """
+        Removes all the entries.
+        """
+        with self.lock:
+            self.store.clear()
+            self._index = {}
+
+    def _get_index(self) -> dict[str, tuple[str, float]]:
+        """
+        Returns the index of the entries, loading it from the store the first time (must be called with the lock held).
+        """
+        if self._index is None:
+            self._index = {
+                entry_key: (entry.get("owner", ""), entry.get("accessed_at", 0))
+                for entry_key, entry in self.store.get_all().items()
+                if entry is not None
+            }
+        return self._index
+
+    def _get_entry_key(self, owner: str, key: str) -> str:
+        return f"{owner}:{key}"
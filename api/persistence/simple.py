@@ -1,15 +1,36 @@
 import json
+import logging
 import os
 import threading
 import uuid
+from api.common.utils.json import try_deserialize_from_json, try_serialize_to_json
 from api.persistence.base import IObjectStore
 
 
+logger = logging.getLogger(__name__)
+
+class LogOperation:
+    SET = 'set'
+    DELETE = 'delete'
+
+COMPACTION_MIN_ENTRIES = 1000
+"""
+The minimum number of entries in the log before it is compacted.
+"""
+
+COMPACTION_RATIO = 2
+"""
+The log is compacted when it has more entries than this ratio times the number of stored records.
+"""
+
 class SimpleObjectStore(IObjectStore):
     """
     Simple object store based on JSON file (only for local development).
+    The data is kept in memory, and each change is appended to the file as a JSON line (an append-only log),
+    so writes do not rewrite the whole file. The log is compacted when most of its entries are outdated.
+    The data is reloaded only when the file is changed by another store (e.g. another process).
     """
-    
+
     file_path: str
     """
     Full path to the file where the data is stored.
@@ -20,63 +41,169 @@ class SimpleObjectStore(IObjectStore):
     Lock for thread-safe access to the data.
     """
 
+    _data: dict[str, str]
+    """
+    The stored records serialized to JSON (each read returns a new copy of the record).
+    """
+
+    _log_entries: int
+    """
+    The number of entries in the log.
+    """
+
+    _file_signature: tuple[int, int, int] | None
+    """
+    The inode, size and modification time of the file when it was last loaded or written by this store.
+    """
+
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.lock = threading.Lock()
+        self._data = {}
+        self._log_entries = 0
+        self._file_signature = None
         self._init_db()
 
     def get_all(self) -> dict:
         with self.lock:
-            data = self._load_data()
-            return data
+            self._reload_if_changed()
+            return {key: json.loads(value) for key, value in self._data.items()}
 
     def get_by_id(self, key: str) -> dict | None:
-         with self.lock:
-            data = self._load_data()
-            return data.get(key)
+        with self.lock:
+            self._reload_if_changed()
+            value = self._data.get(key)
+        return json.loads(value) if value is not None else None
 
     def add(self, value: dict) -> str | None:
         key = self._generate_key()
+        json_value = try_serialize_to_json(value)
+        if json_value is None:
+            return None
         with self.lock:
-            data = self._load_data()
-            data[key] = value
-            self._save_data(data)
+            self._reload_if_changed()
+            self._set(key, json_value)
         return key
 
+    def set(self, key: str, value: dict) -> None:
+        json_value = try_serialize_to_json(value)
+        if json_value is None:
+            logger.error(f"Unable to serialize data for key '{key}'")
+            return
+        with self.lock:
+            self._reload_if_changed()
+            self._set(key, json_value)
+
     def delete(self, key: str) -> None:
         with self.lock:
-            data = self._load_data()
-            if key in data:
-                del data[key]
-                self._save_data(data)
+            self._reload_if_changed()
+            if key in self._data:
+                del self._data[key]
+                self._append_entry(json.dumps({"op": LogOperation.DELETE, "key": key}))
 
     def clear(self) -> None:
         with self.lock:
-            self._save_data()
+            self._data = {}
+            self._compact()
 
     def _init_db(self) -> None:
         """
-        Initializes the data file if it does not exist. 
+        Initializes the data file if it does not exist, or loads it.
         Creates the file and the directory if they do not exist.
         """
         path = os.path.dirname(self.file_path)
         if not os.path.exists(path):
             os.makedirs(path)
-        if not os.path.exists(self.file_path):
-            self._save_data()
+        with self.lock:
+            if os.path.exists(self.file_path):
+                self._load_data()
+            else:
+                self._compact()
+
+    def _set(self, key: str, json_value: str) -> None:
+        self._data[key] = json_value
+        self._append_entry(_create_set_entry(key, json_value))
+
+    def _append_entry(self, entry: str) -> None:
+        """
+        Appends an entry to the log (a single write, so entries appended by other processes are not interleaved).
+        """
+        with open(self.file_path, 'a') as file:
+            file.write(f"{entry}\n")
+        self._log_entries += 1
+        self._file_signature = self._get_file_signature()
+        if self._log_entries > max(COMPACTION_MIN_ENTRIES, COMPACTION_RATIO * len(self._data)):
+            self._compact()
 
-    def _load_data(self) -> dict:
-        if os.path.exists(self.file_path):
+    def _compact(self) -> None:
+        """
+        Rewrites the log with a single entry per record. The file is replaced at once, so it is never partially written.
+        """
+        temp_path = f"{self.file_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w') as file:
+            file.writelines(f"{_create_set_entry(key, value)}\n" for key, value in self._data.items())
+        os.replace(temp_path, self.file_path)
+        self._log_entries = len(self._data)
+        self._file_signature = self._get_file_signature()
+
+    def _reload_if_changed(self) -> None:
+        if self._get_file_signature() != self._file_signature:
+            self._load_data()
+
+    def _load_data(self) -> None:
+        """
+        Loads the data by replaying the log.
+        Files in the original format (a single JSON object) are converted to a log.
+        """
+        signature = self._get_file_signature()
+        try:
             with open(self.file_path, 'r') as file:
-                try:
-                    return json.load(file)
-                except:
-                    return {}
-        return {}
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            lines = []
+        data: dict[str, str] = {}
+        invalid_entries = 0
+        for index, line in enumerate(lines):
+            entry = try_deserialize_from_json(line) if line else None
+            if not isinstance(entry, dict) or "op" not in entry:
+                if index == 0:
+                    self._load_legacy_data(lines)
+                    return
+                # An incomplete entry (e.g. the process stopped while writing it)
+                logger.warning(f"Skipping invalid entry {index + 1} of {self.file_path}")
+                invalid_entries += 1
+                continue
+            operation = entry["op"]
+            if operation == LogOperation.SET:
+                data[entry["key"]] = json.dumps(entry["value"])
+            elif operation == LogOperation.DELETE:
+                data.pop(entry["key"], None)
+        self._data = data
+        self._log_entries = len(lines)
+        self._file_signature = signature
+        if invalid_entries > 0:
+            # Remove the invalid entries, so the next entries are not appended to an incomplete line
+            self._compact()
 
-    def _save_data(self, data: dict = {}) -> None:
-        with open(self.file_path, 'w') as file:
-            json.dump(data, file, indent=4)
+    def _load_legacy_data(self, lines: list[str]) -> None:
+        data = try_deserialize_from_json("\n".join(lines))
+        if not isinstance(data, dict):
+            logger.error(f"Unable to load data from {self.file_path}")
+            data = {}
+        self._data = {key: json.dumps(value) for key, value in data.items()}
+        self._compact()
+
+    def _get_file_signature(self) -> tuple[int, int, int] | None:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
 
     def _generate_key(self) -> str:
         return uuid.uuid4().hex
+
+
+def _create_set_entry(key: str, json_value: str) -> str:
+    # The value is already serialized, so it is not serialized again
+    return f'{{"op": "{LogOperation.SET}", "key": {json.dumps(key)}, "value": {json_value}}}'
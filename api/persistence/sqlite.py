@@ -1,6 +1,7 @@
 import logging
 import os
 import sqlite3
+import threading
 import uuid
 from api.common.utils.json import try_deserialize_from_json, try_serialize_to_json
 from api.persistence.base import IObjectStore
@@ -11,54 +12,78 @@ logger = logging.getLogger(__name__)
 STORE_TABLE = "STORE"
 STORE_SCHEMA = """
 (
-    ID TEXT NOT NULL,
+    ID TEXT NOT NULL PRIMARY KEY,
     DATA TEXT NOT NULL
 )
 """
 
+SCHEMA_VERSION = 1
+"""
+Version of the schema, stored in the `user_version` of the database (`0` is the original table without primary key).
+"""
+
+CONNECTION_PRAGMAS = [
+    # Durable on application crashes, only the last transactions can be lost on power failure (safe with WAL)
+    "PRAGMA synchronous=NORMAL;",
+    # Read the database through memory mapping instead of read calls
+    f"PRAGMA mmap_size={64 * 1024 * 1024};",
+]
+"""
+Settings applied to each connection (the WAL journal mode is persistent, so it is set when the database is initialized).
+"""
+
+BUSY_TIMEOUT = 30.0
+"""
+Seconds to wait for a lock held by another connection (e.g. another worker process writing).
+"""
+
+SELECT_ALL_QUERY = f"SELECT ID, DATA FROM {STORE_TABLE};"
+SELECT_BY_ID_QUERY = f"SELECT DATA FROM {STORE_TABLE} WHERE ID=?;"
+INSERT_QUERY = f"INSERT INTO {STORE_TABLE} (ID, DATA) VALUES (?, ?);"
+REPLACE_QUERY = f"INSERT OR REPLACE INTO {STORE_TABLE} (ID, DATA) VALUES (?, ?);"
+DELETE_BY_ID_QUERY = f"DELETE FROM {STORE_TABLE} WHERE ID=?;"
+DELETE_ALL_QUERY = f"DELETE FROM {STORE_TABLE};"
+
 class SQLiteObjectStore(IObjectStore):
     """
     SQLite object store (optimized for distributed processing).
+    Each thread keeps its own connection open, and the queries are parameterized so their compiled statements are reused.
     """
-    
+
     file_path: str
     """
     Full path to the file where the database is stored.
     """
 
+    _local: threading.local
+    """
+    The connection of each thread (connections cannot be shared between threads).
+    """
+
     def __init__(self, file_path: str):
         self.file_path = file_path
+        self._local = threading.local()
         self._init_db()
 
     def get_all(self) -> dict:
         result = {}
-        connection = None
         try:
-            connection = self._create_connection()
-            cursor = connection.execute(f"SELECT ID, DATA FROM {STORE_TABLE};")
+            cursor = self._get_connection().execute(SELECT_ALL_QUERY)
             for row in cursor.fetchall():
                 result[row[0]] = try_deserialize_from_json(row[1])
         except Exception as e:
             logger.error(e)
-        finally:
-            if connection:
-                connection.close()
         return result
 
     def get_by_id(self, key: str) -> dict | None:
         result = None
-        connection = None
         try:
-            connection = self._create_connection()
-            cursor = connection.execute(f"SELECT DATA FROM {STORE_TABLE} WHERE ID='{key}';")
+            cursor = self._get_connection().execute(SELECT_BY_ID_QUERY, (key,))
             row = cursor.fetchone()
             if row is not None:
                 result = try_deserialize_from_json(row[0])
         except Exception as e:
             logger.error(e)
-        finally:
-            if connection:
-                connection.close()
         return result
 
     def add(self, value: dict) -> str | None:
@@ -66,63 +91,105 @@ class SQLiteObjectStore(IObjectStore):
         json_value = try_serialize_to_json(value)
         if json_value is None:
             return None
-        connection = None
         try:
-            connection = self._create_connection()
-            connection.execute(f"INSERT INTO {STORE_TABLE} (ID, DATA) VALUES ('{key}', '{json_value}');")
-            connection.commit()
+            with self._get_connection() as connection:
+                connection.execute(INSERT_QUERY, (key, json_value))
         except Exception as e:
             key = None
             logger.error(e)
-        finally:
-            if connection:
-                connection.close()
         return key
-        
+
+    def set(self, key: str, value: dict) -> None:
+        json_value = try_serialize_to_json(value)
+        if json_value is None:
+            logger.error(f"Unable to serialize data for key '{key}'")
+            return
+        try:
+            with self._get_connection() as connection:
+                connection.execute(REPLACE_QUERY, (key, json_value))
+        except Exception as e:
+            logger.error(e)
+
     def delete(self, key: str) -> None:
-        connection = None
         try:
-            connection = self._create_connection()
-            connection.execute(f"DELETE FROM {STORE_TABLE} WHERE ID='{key}';")
-            connection.commit()
+            with self._get_connection() as connection:
+                connection.execute(DELETE_BY_ID_QUERY, (key,))
         except Exception as e:
             logger.error(e)
-        finally:
-            if connection:
-                connection.close()
 
     def clear(self) -> None:
-        if os.path.exists(self.file_path):
-            os.remove(self.file_path)
-        self._init_db()
+        # The rows are deleted instead of the file, which is kept open by the connections of other threads
+        try:
+            with self._get_connection() as connection:
+                connection.execute(DELETE_ALL_QUERY)
+        except Exception as e:
+            logger.error(e)
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection of the current thread, creating it on first use.
+        """
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._create_connection()
+            self._local.connection = connection
+        return connection
 
     def _create_connection(self) -> sqlite3.Connection:
         """
         Creates a connection to the database.
         """
-        return sqlite3.connect(self.file_path)
+        connection = sqlite3.connect(self.file_path, timeout=BUSY_TIMEOUT)
+        for pragma in CONNECTION_PRAGMAS:
+            connection.execute(pragma)
+        return connection
 
     def _init_db(self) -> None:
         """
-        Initializes the database file if it does not exist. 
+        Initializes the database file if it does not exist, or migrates it to the current schema.
         Creates the file and the directory if they do not exist.
         """
         path = os.path.dirname(self.file_path)
         if not os.path.exists(path):
             os.makedirs(path)
+        # A temporal connection, so no connection is inherited by forked processes
         connection = None
         try:
             connection = self._create_connection()
-            cursor = connection.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{STORE_TABLE}';")
+            connection.execute("PRAGMA journal_mode=WAL;")
+            version = connection.execute("PRAGMA user_version;").fetchone()[0]
+            cursor = connection.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?;", (STORE_TABLE,))
             if cursor.fetchone() is None:
                 logger.info(f"Initializing database at {self.file_path}")
-                connection.execute(f"CREATE TABLE {STORE_TABLE} {STORE_SCHEMA};")
-                connection.commit()
+                with connection:
+                    connection.execute(f"CREATE TABLE {STORE_TABLE} {STORE_SCHEMA};")
+                    connection.execute(f"PRAGMA user_version={SCHEMA_VERSION};")
+            elif version < SCHEMA_VERSION:
+                self._migrate_db(connection)
         except Exception as e:
             logger.error(e)
         finally:
             if connection:
                 connection.close()
 
+    def _migrate_db(self, connection: sqlite3.Connection) -> None:
+        """
+        Migrates the original table (without primary key) to the current schema, in a single transaction.
+        If a key is repeated, the last inserted row is kept.
+        """
+        logger.info(f"Migrating database at {self.file_path} to schema version {SCHEMA_VERSION}")
+        migration_table = f"{STORE_TABLE}_MIGRATION"
+        with connection:
+            # Lock the database, so only one process migrates it
+            connection.execute("BEGIN IMMEDIATE;")
+            if connection.execute("PRAGMA user_version;").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            connection.execute(f"DROP TABLE IF EXISTS {migration_table};")
+            connection.execute(f"CREATE TABLE {migration_table} {STORE_SCHEMA};")
+            connection.execute(f"INSERT OR REPLACE INTO {migration_table} (ID, DATA) SELECT ID, DATA FROM {STORE_TABLE} ORDER BY rowid;")
+            connection.execute(f"DROP TABLE {STORE_TABLE};")
+            connection.execute(f"ALTER TABLE {migration_table} RENAME TO {STORE_TABLE};")
+            connection.execute(f"PRAGMA user_version={SCHEMA_VERSION};")
+
     def _generate_key(self) -> str:
         return uuid.uuid4().hex
@@ -4,6 +4,8 @@ from api.models.base import BaseResponse
 from api.models.unified import UnifiedRequest, UnifiedResponse
 from api.services.videos import get_video_metadata
 from api.services.analytics import analyze_emotions, analyze_attention_level, analyze_unified
+from api.services.jobs import get_job, submit_job
+from api.models.jobs import CreateJobResponse, JobRequest, JobResponse
 from api.models.attention_level import AttentionLevelRequest, AttentionLevelResponse
 from api.models.emotions import EmotionsRequest, EmotionsResponse
 
@@ -16,7 +18,7 @@ def emotions(request: EmotionsRequest) -> BaseResponse[EmotionsResponse]:
         video_metadata = get_video_metadata(request.video_id)
         if video_metadata is None:
             raise AppException("Video not found", status_code=status.HTTP_404_NOT_FOUND)
-        result = analyze_emotions(video_metadata)
+        result = analyze_emotions(request.video_id, video_metadata)
         return BaseResponse(
             success=True, 
             message="Emotions analyzed successfully",
@@ -34,7 +36,7 @@ def blinks(request: AttentionLevelRequest) -> BaseResponse[AttentionLevelRespons
         video_metadata = get_video_metadata(request.video_id)
         if video_metadata is None:
             raise AppException("Video not found", status_code=status.HTTP_404_NOT_FOUND)
-        result = analyze_attention_level(video_metadata)
+        result = analyze_attention_level(request.video_id, video_metadata)
         return BaseResponse(
             success=True, 
             message="Attention level analyzed successfully",
@@ -52,7 +54,7 @@ def unified(request: UnifiedRequest) -> BaseResponse[UnifiedResponse]:
         video_metadata = get_video_metadata(request.video_id)
         if video_metadata is None:
             raise AppException("Video not found", status_code=status.HTTP_404_NOT_FOUND)
-        result = analyze_unified(video_metadata)
+        result = analyze_unified(request.video_id, video_metadata)
         return BaseResponse(
             success=True, 
             message="Video analyzed successfully",
@@ -62,3 +64,38 @@ def unified(request: UnifiedRequest) -> BaseResponse[UnifiedResponse]:
         raise e
     except Exception as e:
         raise AppException(str(e))
+
+
+@router.post("/jobs")
+def create_job(request: JobRequest) -> BaseResponse[CreateJobResponse]:
+    """
+    Submits an analysis job. The analysis runs in the background, use the job id to get its status and result.
+    """
+    try:
+        result = submit_job(request)
+        return BaseResponse(
+            success=True, 
+            message="Job submitted successfully",
+            data=result
+        )
+    except AppException as e:
+        raise e
+    except Exception as e:
+        raise AppException(str(e))
+
+
+@router.get("/jobs/{job_id}")
+def job(job_id: str) -> BaseResponse[JobResponse]:
+    try:
+        result = get_job(job_id)
+        if result is None:
+            raise AppException("Job not found", status_code=status.HTTP_404_NOT_FOUND)
+        return BaseResponse(
+            success=True, 
+            message="Job retrieved successfully",
+            data=result
+        )
+    except AppException as e:
+        raise e
+    except Exception as e:
+        raise AppException(str(e))
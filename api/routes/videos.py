@@ -1,5 +1,5 @@
-from fastapi import APIRouter, UploadFile
-from api.common.constants.video import CONVERT_VIDEO
+from fastapi import APIRouter, Request
+from api.common.constants.video import CONVERT_VIDEO, UPLOAD_FIELD_NAME
 from api.common.exceptions import AppException
 from api.models.base import BaseResponse, EmptyResponse
 from api.models.videos import DeleteVideoRequest, UploadVideoResponse
@@ -8,10 +8,24 @@ from api.services.videos import upload_video, delete_video, clear_videos
 
 router = APIRouter(prefix="/videos", tags=["Videos"])
 
-@router.post("/upload")
-def upload(video: UploadFile) -> BaseResponse[UploadVideoResponse]:
+@router.post("/upload", openapi_extra={
+    # The form is parsed while the body is received (see `upload_video`), so it is documented here
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": [UPLOAD_FIELD_NAME],
+                    "properties": {UPLOAD_FIELD_NAME: {"type": "string", "format": "binary"}},
+                },
+            },
+        },
+    },
+})
+async def upload(request: Request) -> BaseResponse[UploadVideoResponse]:
     try:
-        result = upload_video(video, CONVERT_VIDEO)
+        result = await upload_video(request, CONVERT_VIDEO)
         return BaseResponse(
             success=True, 
             message="Video uploaded successfully",
@@ -1,5 +1,7 @@
 from decimal import Decimal
+from typing import Callable, TypeVar
 from fastapi import status
+from pydantic import BaseModel
 from api.algorithms.pipes.attention_level import AttentionLevelPipe
 from api.algorithms.pipes.emotions import EmotionsPipe
 from api.algorithms.video_analyzer import PipeDict, VideoAnalyzer
@@ -7,13 +9,48 @@ from api.algorithms.settings.attention_level import AttentionLevelSettings
 from api.algorithms.settings.emotions import EmotionsSettings
 from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
 from api.common.exceptions import AppException
+from api.common.utils.time import timer
+from api.common.utils.settings import calculate_settings_hash
 from api.models.attention_level import AttentionLevelPipeResponse, AttentionLevelResponse
 from api.models.emotions import EmotionsPipeResponse, EmotionsResponse
 from api.models.unified import UnifiedResponse
 from api.models.videos import FullVideoMetadata
+from api.services.cache import analysis_cache
 
 
-def analyze_emotions(video_metadata: FullVideoMetadata):
+TResponse = TypeVar("TResponse", bound=BaseModel)
+
+
+def _get_cached_analysis(
+    video_metadata: FullVideoMetadata,
+    video_settings: VideoAnalyzerSettings,
+    pipes: PipeDict,
+    response_type: type[TResponse],
+    analyze: Callable[[], TResponse]
+) -> TResponse:
+    """
+    Returns the cached result of an analysis with the same video and settings, or runs the analysis and caches its result.
+    Cached results are flagged and report the time spent reading them, instead of the time of the original analysis.
+    The results are cached by stored video file, so they are shared by all the uploads of the same video.
+    """
+    settings_hash = calculate_settings_hash(
+        response_type.__name__,
+        video_settings,
+        {pipe_key: pipe_value.settings for pipe_key, pipe_value in pipes.items()}
+    )
+    cache_lookup = timer(lambda: analysis_cache.get(video_metadata.video_path, settings_hash), precision=6)
+    if cache_lookup.data is not None:
+        return response_type.model_validate({
+            **cache_lookup.data,
+            "cached": True,
+            "analysis_time": Decimal(str(cache_lookup.time)),
+        })
+    result = analyze()
+    analysis_cache.set(video_metadata.video_path, settings_hash, result.model_dump(mode="json"))
+    return result
+
+
+def analyze_emotions(video_id: str, video_metadata: FullVideoMetadata) -> EmotionsResponse:
     """
     Analyzes the emotions in a video.
     """
@@ -23,15 +60,24 @@ def analyze_emotions(video_metadata: FullVideoMetadata):
             EmotionsSettings(video_settings=video_settings)
         )
     }
-    video_analyzer = VideoAnalyzer(video_settings, pipes)
-    emotions_analysis: EmotionsPipeResponse = video_analyzer.run()["emotions"]
-    return EmotionsResponse(
-        result=emotions_analysis.result,
-        video_duration=Decimal(str(video_settings.metadata.duration)),
-    )
+
+    def analyze() -> EmotionsResponse:
+        video_analyzer = VideoAnalyzer(video_settings, pipes)
+        video_analysis = timer(video_analyzer.run)
+        emotions_analysis: EmotionsPipeResponse = video_analysis.data["emotions"]
+        return EmotionsResponse(
+            result=emotions_analysis.result,
+            statistics=emotions_analysis.statistics,
+            dominant_emotions=emotions_analysis.dominant_emotions,
+            face_count=emotions_analysis.face_count,
+            video_duration=Decimal(str(video_settings.metadata.duration)),
+            analysis_time=Decimal(str(video_analysis.time)),
+        )
+
+    return _get_cached_analysis(video_metadata, video_settings, pipes, EmotionsResponse, analyze)
     
 
-def analyze_attention_level(video_metadata: FullVideoMetadata):
+def analyze_attention_level(video_id: str, video_metadata: FullVideoMetadata) -> AttentionLevelResponse:
     """
     Analyzes the attention level in a video.
     """
@@ -41,35 +87,51 @@ def analyze_attention_level(video_metadata: FullVideoMetadata):
             AttentionLevelSettings(video_settings=video_settings)
         )
     }
-    video_analyzer = VideoAnalyzer(video_settings, pipes)
-    attention_level_analysis: AttentionLevelPipeResponse = video_analyzer.run()["attentionLevel"]
-    return AttentionLevelResponse(
-        blink_rate=attention_level_analysis.blink_rate,
-        blinks=attention_level_analysis.blinks,
-        level=attention_level_analysis.level,
-        video_duration=Decimal(str(video_settings.metadata.duration)),
-    )
 
+    def analyze() -> AttentionLevelResponse:
+        video_analyzer = VideoAnalyzer(video_settings, pipes)
+        video_analysis = timer(video_analyzer.run)
+        attention_level_analysis: AttentionLevelPipeResponse = video_analysis.data["attentionLevel"]
+        return AttentionLevelResponse(
+            blink_rate=attention_level_analysis.blink_rate,
+            blinks=attention_level_analysis.blinks,
+            level=attention_level_analysis.level,
+            video_duration=Decimal(str(video_settings.metadata.duration)),
+            analysis_time=Decimal(str(video_analysis.time)),
+        )
+
+    return _get_cached_analysis(video_metadata, video_settings, pipes, AttentionLevelResponse, analyze)
 
-def analyze_unified(video_metadata: FullVideoMetadata):
+
+def analyze_unified(video_id: str, video_metadata: FullVideoMetadata) -> UnifiedResponse:
     """
-    Analyzes all in a video.
+    Analyzes all in a video. All the pipes run over a single decoded frame stream.
     """
     video_settings = VideoAnalyzerSettings(metadata=video_metadata, multithreaded=True)
     pipes: PipeDict = {
         "emotions": EmotionsPipe(
             EmotionsSettings(video_settings=video_settings)
         ),
+        "attentionLevel": AttentionLevelPipe(
+            AttentionLevelSettings(video_settings=video_settings)
+        ),
     }
-    video_analyzer = VideoAnalyzer(video_settings, pipes)
-    video_analysis = video_analyzer.run()
-    emotions_analysis: EmotionsPipeResponse | None = video_analysis.get("emotions", None)
-    if emotions_analysis is None:
-        raise AppException(
-            description="Unable to analyze video (all pipes failed)",
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+
+    def analyze() -> UnifiedResponse:
+        video_analyzer = VideoAnalyzer(video_settings, pipes)
+        video_analysis = timer(video_analyzer.run)
+        emotions_analysis: EmotionsPipeResponse | None = video_analysis.data.get("emotions", None)
+        attention_level_analysis: AttentionLevelPipeResponse | None = video_analysis.data.get("attentionLevel", None)
+        if emotions_analysis is None and attention_level_analysis is None:
+            raise AppException(
+                description="Unable to analyze video (all pipes failed)",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return UnifiedResponse(
+            emotions=emotions_analysis,
+            attention_level=attention_level_analysis,
+            video_duration=Decimal(str(video_metadata.duration)),   
+            analysis_time=Decimal(str(video_analysis.time)),
         )
-    return UnifiedResponse(
-        emotions=emotions_analysis,
-        video_duration=Decimal(str(video_metadata.duration)),   
-    )
+
+    return _get_cached_analysis(video_metadata, video_settings, pipes, UnifiedResponse, analyze)
@@ -0,0 +1,12 @@
+from api.persistence.cache import LRUObjectCache
+from api.persistence.factory import get_object_store
+from config import AppConfig
+
+
+analysis_cache = LRUObjectCache(
+    get_object_store(AppConfig.AnalysisCache.DB_STRATEGY, AppConfig.AnalysisCache.DB_PATH),
+    AppConfig.AnalysisCache.MAX_SIZE
+)
+"""
+Cache of the analysis results by video and settings.
+"""
@@ -0,0 +1,224 @@
+import time
+import queue
+import logging
+import threading
+from typing import Callable
+from fastapi import status
+from pydantic import BaseModel
+from api.common.constants.jobs import JOB_CLEANUP_INTERVAL, VALID_JOB_TYPES, JobStatus, JobType
+from api.common.exceptions import AppException
+from api.models.jobs import CreateJobResponse, JobRequest, JobResponse
+from api.models.videos import FullVideoMetadata
+from api.persistence.factory import get_object_store
+from api.services.analytics import analyze_attention_level, analyze_emotions, analyze_unified
+from api.services.videos import get_video_metadata
+from config import AppConfig
+
+
+logger = logging.getLogger(__name__)
+
+jobs_db = get_object_store(AppConfig.Jobs.DB_STRATEGY, AppConfig.Jobs.DB_PATH)
+
+ANALYSIS_BY_JOB_TYPE: dict[str, Callable[[str, FullVideoMetadata], BaseModel]] = {
+    JobType.EMOTIONS: analyze_emotions,
+    JobType.ATTENTION_LEVEL: analyze_attention_level,
+    JobType.UNIFIED: analyze_unified,
+}
+
+
+class JobWorkerPool:
+    """
+    Bounded pool of worker threads running the analysis jobs.
+    Jobs wait in a bounded queue, so the number of pending analyses never grows without limit.
+    """
+
+    workers: int
+    """
+    The number of worker threads.
+    """
+
+    _queue: queue.Queue
+    """
+    The identifiers of the jobs waiting to be run.
+    """
+
+    _threads: list[threading.Thread]
+    """
+    The worker threads (started on the first submission).
+    """
+
+    _lock: threading.Lock
+    """
+    Lock for starting the worker threads once.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(1, workers)
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: str) -> bool:
+        """
+        Queue a job. Returns `False` if the queue is full.
+        """
+        self._start()
+        try:
+            self._queue.put_nowait(job_id)
+            return True
+        except queue.Full:
+            return False
+
+    def _start(self) -> None:
+        """
+        Start the worker threads if they are not running.
+        """
+        with self._lock:
+            if len(self._threads) > 0:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        """
+        Run the queued jobs until the process exits.
+        """
+        while True:
+            job_id = self._queue.get()
+            try:
+                _run_job(job_id)
+            except Exception as e:
+                logger.error(f"Unexpected error running job '{job_id}': {e}")
+            finally:
+                self._queue.task_done()
+
+
+job_pool = JobWorkerPool(AppConfig.Jobs.WORKERS, AppConfig.Jobs.QUEUE_SIZE)
+
+FINISHED_JOB_STATUSES = [JobStatus.COMPLETED, JobStatus.FAILED]
+
+_cleanup_lock = threading.Lock()
+"""
+Lock for removing the expired jobs from a single thread at a time.
+"""
+
+_last_cleanup = 0.0
+"""
+The time of the last removal of the expired jobs.
+"""
+
+
+def fail_orphaned_jobs() -> int:
+    """
+    Mark as failed the jobs left queued or running by a previous run of the service (the job queue is kept in memory,
+    so they would never finish). Must be called at startup, before any job is submitted.
+    Returns the number of failed jobs.
+    """
+    now = time.time()
+    orphaned_jobs = 0
+    for job_id, job in jobs_db.get_all().items():
+        if job is None or job.get("status") in FINISHED_JOB_STATUSES:
+            continue
+        job["status"] = JobStatus.FAILED
+        job["error"] = "The job was interrupted by a restart of the service"
+        job["finished_at"] = now
+        jobs_db.set(job_id, job)
+        orphaned_jobs += 1
+    if orphaned_jobs > 0:
+        logger.warning(f"Marked {orphaned_jobs} orphaned jobs as failed")
+    return orphaned_jobs
+
+
+def remove_expired_jobs() -> int:
+    """
+    Remove the finished jobs older than the configured time to live (`AppConfig.Jobs.TTL`, `0` keeps them forever).
+    Returns the number of removed jobs.
+    """
+    global _last_cleanup
+    if AppConfig.Jobs.TTL <= 0:
+        return 0
+    with _cleanup_lock:
+        now = time.time()
+        _last_cleanup = now
+        removed_jobs = 0
+        for job_id, job in jobs_db.get_all().items():
+            if job is None:
+                continue
+            if job.get("status") in FINISHED_JOB_STATUSES and now - job.get("finished_at", now) > AppConfig.Jobs.TTL:
+                jobs_db.delete(job_id)
+                removed_jobs += 1
+    if removed_jobs > 0:
+        logger.info(f"Removed {removed_jobs} expired jobs")
+    return removed_jobs
+
+
+def _run_job(job_id: str) -> None:
+    job = jobs_db.get_by_id(job_id)
+    if job is None: # The job was removed while queued
+        return
+
+    job["status"] = JobStatus.RUNNING
+    job["started_at"] = time.time()
+    jobs_db.set(job_id, job)
+
+    try:
+        video_metadata = get_video_metadata(job["video_id"])
+        if video_metadata is None:
+            raise AppException("Video not found", status_code=status.HTTP_404_NOT_FOUND)
+        result = ANALYSIS_BY_JOB_TYPE[job["type"]](job["video_id"], video_metadata)
+        job["status"] = JobStatus.COMPLETED
+        job["result"] = result.model_dump(mode="json")
+    except AppException as e:
+        job["status"] = JobStatus.FAILED
+        job["error"] = e.description
+    except Exception as e:
+        logger.error(f"Error running job '{job_id}': {e}")
+        job["status"] = JobStatus.FAILED
+        job["error"] = str(e)
+
+    job["finished_at"] = time.time()
+    jobs_db.set(job_id, job)
+
+
+def submit_job(request: JobRequest) -> CreateJobResponse:
+    # Validate job type
+    if request.type not in VALID_JOB_TYPES:
+        raise AppException(
+            f"The job type must be one of the following: {', '.join(VALID_JOB_TYPES)}",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    if get_video_metadata(request.video_id) is None:
+        raise AppException("Video not found", status_code=status.HTTP_404_NOT_FOUND)
+    # Remove the expired jobs from time to time, so the finished jobs do not pile up
+    if time.time() - _last_cleanup >= JOB_CLEANUP_INTERVAL:
+        remove_expired_jobs()
+
+    job = {
+        "type": request.type,
+        "video_id": request.video_id,
+        "status": JobStatus.QUEUED,
+        "created_at": time.time(),
+    }
+    job_id = jobs_db.add(job)
+    if job_id is None:
+        raise AppException("Unable to save job")
+    if not job_pool.submit(job_id):
+        jobs_db.delete(job_id)
+        raise AppException(
+            "Too many analysis jobs in progress, try again later",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    return CreateJobResponse(
+        job_id=job_id,
+        status=JobStatus.QUEUED
+    )
+
+
+def get_job(job_id: str) -> JobResponse | None:
+    job = jobs_db.get_by_id(job_id)
+    if job is None:
+        return None
+    return JobResponse(job_id=job_id, **job)
@@ -0,0 +1,32 @@
+import time
+import logging
+from api.algorithms.model_registry import load_models
+from api.models.startup import StartupReport
+from api.services.jobs import fail_orphaned_jobs, remove_expired_jobs
+from config import AppConfig
+
+
+logger = logging.getLogger(__name__)
+
+
+def run_startup() -> StartupReport:
+    """
+    Loads and warms up the AI models, so the first analysis does not pay for it.
+    Also fails the jobs interrupted by the previous run of the service and removes the expired jobs.
+    Returns a report with the time spent on each model.
+    """
+    start = time.perf_counter()
+    orphaned_jobs = fail_orphaned_jobs()
+    expired_jobs = remove_expired_jobs()
+    models = load_models(warm_up=True) if AppConfig.PRELOAD_MODELS else []
+    report = StartupReport(
+        models=models,
+        orphaned_jobs=orphaned_jobs,
+        expired_jobs=expired_jobs,
+        startup_time=round(time.perf_counter() - start, 3)
+    )
+
+    for model in report.models:
+        logger.info(f"Startup: model '{model.name}' loaded in {model.load_time}s (warm-up: {model.warm_up_time}s)")
+    logger.info(f"Startup completed in {report.startup_time}s")
+    return report
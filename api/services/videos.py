@@ -1,88 +1,279 @@
 import uuid
-from fastapi import UploadFile, status
-from api.common.constants.video import VALID_VIDEO_EXTENSIONS, VideoExtension
+import asyncio
+import hashlib
+import logging
+import threading
+import ffmpeg
+from typing import Any, BinaryIO
+from fastapi import Request, status
+from fastapi.concurrency import run_in_threadpool
+from api.algorithms.frame_store import frame_store
+from api.common.constants.video import STREAMABLE_VIDEO_EXTENSIONS, UPLOAD_CHUNK_SIZE, UPLOAD_FIELD_NAME, UPLOAD_FORM_OVERHEAD, VALID_VIDEO_EXTENSIONS, VideoExtension, VideoUploadMode
 from api.common.exceptions import AppException
-from api.common.utils.file import get_file_extension, remove_dir_contents, remove_file, write_file
-from api.common.utils.os import make_dirs, join_path
+from api.common.utils.file import get_file_extension, remove_dir_contents, remove_file
+from api.common.utils.os import make_dirs, join_path, path_exists
+from api.common.utils.upload_stream import UploadStream
 from api.persistence.factory import get_object_store
-from api.common.utils.video import calculate_stream_duration, convert_video, extract_metadata, extract_stream_metadata
-from api.models.videos import UploadVideoResponse, FullVideoMetadata
+from api.common.utils.video import convert_video, create_proxy_stream, create_video_proxy, extract_metadata, extract_packet_metadata
+from api.models.videos import UploadVideoResponse, FullVideoMetadata, UploadedFile
+from api.services.cache import analysis_cache
 from config import AppConfig
 
 
+logger = logging.getLogger(__name__)
+
 videos_db = get_object_store(AppConfig.Videos.DB_STRATEGY, AppConfig.Videos.DB_PATH)
+"""
+The stored videos, by content hash (identical uploads share the stored file, metadata and analyses).
+"""
+
+references_db = get_object_store(AppConfig.Videos.DB_STRATEGY, AppConfig.Videos.REFERENCES_DB_PATH)
+"""
+The content hash of the stored video of each upload, by the video ID returned to the client.
+Each upload gets its own ID, so deleting an upload never removes the references of the other uploads of the same content.
+"""
+
+_references_lock = threading.Lock()
+"""
+Lock for updating the references of the stored videos (an upload and a deletion of the same video can run at the same time).
+"""
 
 
-def _convert_video(src_file_path: str, dst_file_path: str, video_content: bytes) -> None:
-    # Save temporal video
-    write_file(src_file_path, video_content, binary=True)
+def _convert_video(src_file_path: str, dst_file_path: str, use_proxy: bool) -> None:
     # Convert video
-    convert_video(src_file_path, dst_file_path, quiet=AppConfig.IS_DEV)
+    if use_proxy:
+        create_video_proxy(
+            src_file_path,
+            dst_file_path,
+            AppConfig.Videos.PROXY_RESOLUTION,
+            AppConfig.Videos.PROXY_FRAME_RATE,
+            AppConfig.Videos.PROXY_GRAYSCALE,
+            quiet=AppConfig.IS_DEV
+        )
+    else:
+        convert_video(src_file_path, dst_file_path, quiet=AppConfig.IS_DEV)
     # Remove temporal video
     remove_file(src_file_path)
 
 
-def _get_stream_metadata(dst_file_path: str) -> FullVideoMetadata | None:
-    # Extract video metadata
-    dst_video_metadata = extract_stream_metadata(dst_file_path)
-    duration = calculate_stream_duration(dst_file_path)
+def _check_upload_size(size: int) -> None:
+    if size > AppConfig.Videos.MAX_UPLOAD_SIZE:
+        raise AppException(
+            f"The file must not be larger than {AppConfig.Videos.MAX_UPLOAD_SIZE} bytes",
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
 
-    if dst_video_metadata is None or duration == 0:
-        return None
-    
-    avg_fps = round(dst_video_metadata.frame_count / duration, 2)
-    return FullVideoMetadata(
-        video_path=dst_file_path,
-        avg_fps=avg_fps,
-        frame_count=dst_video_metadata.frame_count,
-        duration=duration,
-        width=dst_video_metadata.width,
-        height=dst_video_metadata.height,
-        aspect_ratio=dst_video_metadata.aspect_ratio
+
+def _check_content_length(request: Request) -> None:
+    """
+    Reject the upload before receiving its body if its declared length is larger than the maximum size (plus the form overhead).
+    The received size is still checked while the upload is streamed, as the header can be missing or wrong.
+    """
+    content_length = request.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit():
+        _check_upload_size(int(content_length) - UPLOAD_FORM_OVERHEAD)
+
+
+def _write_chunk(file: BinaryIO, content_hash: Any, chunk: bytes) -> None:
+    content_hash.update(chunk)
+    file.write(chunk)
+
+
+async def _save_upload(video: UploadStream, path: str) -> UploadedFile:
+    """
+    Stream the upload to disk in chunks while the request body is received, hashing it on the fly,
+    so only one chunk is kept in memory and the upload is not spooled to a temporal file first.
+    The partial file is removed if the upload is larger than the maximum size or fails.
+    """
+    content_hash = hashlib.sha256()
+    size = 0
+    try:
+        # The file is opened, written and closed (flushed) in the thread pool, so the event loop never waits for the disk
+        file = await run_in_threadpool(open, path, "wb")
+        try:
+            while chunk := await video.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                _check_upload_size(size)
+                await run_in_threadpool(_write_chunk, file, content_hash, chunk)
+        finally:
+            await run_in_threadpool(file.close)
+    except BaseException:
+        await run_in_threadpool(remove_file, path)
+        raise
+    return UploadedFile(path=path, content_hash=content_hash.hexdigest(), size=size)
+
+
+async def _save_proxy_upload(video: UploadStream, path: str) -> UploadedFile:
+    """
+    Stream the upload into FFmpeg while the request body is received, so the analysis proxy is written without any temporal copy.
+    The upload is hashed on the fly, like in `_save_upload`. The partial proxy is removed if the upload or the transcoding fails.
+    """
+    args = create_proxy_stream(
+        'pipe:0',
+        path,
+        AppConfig.Videos.PROXY_RESOLUTION,
+        AppConfig.Videos.PROXY_FRAME_RATE,
+        AppConfig.Videos.PROXY_GRAYSCALE
+    ).compile()
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
     )
+    content_hash = hashlib.sha256()
+    size = 0
+    try:
+        try:
+            while chunk := await video.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                _check_upload_size(size)
+                await run_in_threadpool(content_hash.update, chunk)
+                process.stdin.write(chunk) # type: ignore
+                await process.stdin.drain() # type: ignore
+            process.stdin.close() # type: ignore
+        except (BrokenPipeError, ConnectionResetError):
+            pass # FFmpeg stopped reading the input, the error is reported below
+        _, err = await process.communicate()
+        if process.returncode != 0:
+            logger.error('Error occurred while creating video proxy: %s', err.decode('utf-8'))
+            raise ffmpeg.Error('ffmpeg', b'', err)
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        await run_in_threadpool(remove_file, path)
+        raise
+    return UploadedFile(path=path, content_hash=content_hash.hexdigest(), size=size)
+
+
+def _extract_video_metadata(dst_file_path: str, dst_file_extension: str) -> FullVideoMetadata:
+    if dst_file_extension == VideoExtension.WEBM:
+        # WebM files recorded by browsers have no frame count or duration in the container
+        video_metadata = extract_packet_metadata(dst_file_path)
+    else:
+        video_metadata = extract_metadata(dst_file_path)
+    if video_metadata is None:
+        raise AppException("Unable to extract video metadata")
+    return video_metadata
+
+
+def _create_reference(content_hash: str, video_record: dict) -> str:
+    """
+    Create the reference of an upload to a stored video (must be called with the references lock held). Returns the video ID of the upload.
+    """
+    video_record["references"] = video_record.get("references", 1) + 1
+    videos_db.set(content_hash, video_record)
+    video_id = uuid.uuid4().hex
+    references_db.set(video_id, {"content_hash": content_hash})
+    return video_id
+
+
+def _add_reference(content_hash: str) -> str | None:
+    """
+    Add a reference to a stored video. Returns the video ID of the upload (`None` if the video or its file does not exist).
+    """
+    with _references_lock:
+        video_record = videos_db.get_by_id(content_hash)
+        if video_record is None or not path_exists(video_record["video_path"]):
+            return None
+        return _create_reference(content_hash, video_record)
+
+
+def _save_video(content_hash: str, video_record: dict) -> tuple[str, bool]:
+    """
+    Save a new stored video and add a reference to it. Returns the video ID of the upload,
+    and `False` if an identical video was saved in the meantime (the reference is added to it instead).
+    """
+    with _references_lock:
+        existing_record = videos_db.get_by_id(content_hash)
+        if existing_record is not None and path_exists(existing_record["video_path"]):
+            return _create_reference(content_hash, existing_record), False
+        return _create_reference(content_hash, {**video_record, "references": 0}), True
+
+
+def _get_content_hash(video_id: str) -> str | None:
+    """
+    Returns the key of the stored video of an upload (`None` if the upload does not exist).
+    Videos uploaded before the per-upload references are stored by their own ID (and have no content hash).
+    """
+    reference = references_db.get_by_id(video_id)
+    if reference is not None:
+        return reference["content_hash"]
+    video_record = videos_db.get_by_id(video_id)
+    if video_record is not None and "content_hash" not in video_record:
+        return video_id
+    return None
+
 
+async def upload_video(request: Request, convert_video: bool) -> UploadVideoResponse:
+    # Reject the upload before receiving it if its declared size is too large
+    _check_content_length(request)
+    video = UploadStream(request, UPLOAD_FIELD_NAME)
+    filename = await video.open()
+    if filename is None:
+        raise AppException(f"The form must have a '{UPLOAD_FIELD_NAME}' file", status_code=status.HTTP_400_BAD_REQUEST)
 
-def upload_video(video: UploadFile, convert_video: bool) -> UploadVideoResponse:
     # Validate video extension
-    video_extension = get_file_extension(video.filename)
+    video_extension = get_file_extension(filename)
     if video_extension not in VALID_VIDEO_EXTENSIONS:
         raise AppException(
             f"The file must have one of the following extensions: {', '.join(VALID_VIDEO_EXTENSIONS)}",
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    needs_conversion = convert_video and video_extension != VideoExtension.MP4
+    use_proxy = AppConfig.Videos.UPLOAD_MODE == VideoUploadMode.PROXY
+    needs_conversion = use_proxy or (convert_video and video_extension != VideoExtension.MP4)
 
     file_name = uuid.uuid4()
-    video_content = video.file.read()
     dst_file_extension = VideoExtension.MP4 if needs_conversion else video_extension
 
     dst_file_path = join_path(
         AppConfig.Videos.STORAGE_PATH, 
         f"{file_name}{dst_file_extension}"
     )
-    make_dirs(AppConfig.Videos.STORAGE_PATH)
+    await run_in_threadpool(make_dirs, AppConfig.Videos.STORAGE_PATH)
 
-    if needs_conversion:
+    # Stream the upload to its final location (or to a temporal one if it must be converted)
+    if use_proxy and video_extension in STREAMABLE_VIDEO_EXTENSIONS:
+        # Transcode the proxy while the upload is received
+        uploaded_file = await _save_proxy_upload(video, dst_file_path)
+        needs_conversion = False
+    elif needs_conversion:
         src_file_path = join_path(
             AppConfig.Videos.TEMP_PATH, 
             f"{file_name}{video_extension}"
         )
-        make_dirs(AppConfig.Videos.TEMP_PATH)
-        _convert_video(src_file_path, dst_file_path, video_content)
+        await run_in_threadpool(make_dirs, AppConfig.Videos.TEMP_PATH)
+        uploaded_file = await _save_upload(video, src_file_path)
     else:
-        write_file(dst_file_path, video_content, binary=True)
+        uploaded_file = await _save_upload(video, dst_file_path)
+
+    # Videos are stored by their content, so an identical upload reuses the stored file, metadata and analyses
+    # (the store and the file system are accessed in the thread pool, so the event loop is never blocked by the lock or the I/O)
+    content_hash = uploaded_file.content_hash
+    video_id = await run_in_threadpool(_add_reference, content_hash)
+    if video_id is not None:
+        await run_in_threadpool(remove_file, uploaded_file.path)
+        return UploadVideoResponse(video_id=video_id)
+
+    if needs_conversion:
+        await run_in_threadpool(_convert_video, src_file_path, dst_file_path, use_proxy)
 
     # Save video metadata
-    if dst_file_extension == VideoExtension.WEBM:
-        video_metadata = _get_stream_metadata(dst_file_path)
-    else:
-        video_metadata = extract_metadata(dst_file_path)
-    if video_metadata is None:
-        raise AppException("Unable to extract video metadata")
-    video_id = videos_db.add(dict(video_metadata))
-    if video_id is None:
-        raise AppException("Unable to save video metadata")
+    try:
+        video_metadata = await run_in_threadpool(_extract_video_metadata, dst_file_path, dst_file_extension)
+    except BaseException:
+        await run_in_threadpool(remove_file, dst_file_path)
+        raise
+    video_record = {
+        **dict(video_metadata),
+        "content_hash": content_hash,
+        "file_size": uploaded_file.size,
+    }
+    video_id, saved = await run_in_threadpool(_save_video, content_hash, video_record)
+    if not saved:
+        await run_in_threadpool(remove_file, dst_file_path)
 
     return UploadVideoResponse(
         video_id=video_id
@@ -90,21 +281,38 @@ def upload_video(video: UploadFile, convert_video: bool) -> UploadVideoResponse:
 
 
 def get_video_metadata(video_id: str) -> FullVideoMetadata | None:
-    video_metadata = videos_db.get_by_id(video_id)
+    content_hash = _get_content_hash(video_id)
+    video_metadata = videos_db.get_by_id(content_hash) if content_hash is not None else None
     if video_metadata is None:
         return None
     return FullVideoMetadata(**video_metadata)
 
 
 def delete_video(video_id: str) -> None:
-    video_metadata = get_video_metadata(video_id)
-    if video_metadata is None:
-        raise AppException("Video not found", status_code=status.HTTP_404_NOT_FOUND)
-    remove_file(video_metadata.video_path)
-    videos_db.delete(video_id)
+    """
+    Removes the reference of an upload to its video. The file, metadata and cached analyses are removed with the last reference.
+    """
+    with _references_lock:
+        content_hash = _get_content_hash(video_id)
+        video_record = videos_db.get_by_id(content_hash) if content_hash is not None else None
+        if video_record is None:
+            raise AppException("Video not found", status_code=status.HTTP_404_NOT_FOUND)
+        references_db.delete(video_id)
+        references = video_record.get("references", 1) - 1
+        if references > 0:
+            video_record["references"] = references
+            videos_db.set(content_hash, video_record)
+            return
+        remove_file(video_record["video_path"])
+        videos_db.delete(content_hash)
+    analysis_cache.evict(video_record["video_path"])
+    frame_store.evict(video_record["video_path"])
 
 
 def clear_videos() -> None:
     videos_db.clear()
+    references_db.clear()
+    analysis_cache.clear()
+    frame_store.clear()
     remove_dir_contents(AppConfig.Videos.STORAGE_PATH)
     remove_dir_contents(AppConfig.Videos.TEMP_PATH)
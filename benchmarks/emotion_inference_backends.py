@@ -0,0 +1,117 @@
+import os
+import sys
+
+
+# Initial setup
+
+app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(app_path) # This is to allow the import of config.py and any static resource file
+os.chdir(app_path) # This is to allow the import any api module
+
+from api.common.constants.runtime import Environment
+os.environ[Environment.DEV_MODE] = "true"
+
+
+###
+
+
+import time
+import cv2
+import numpy as np
+from api.algorithms.decoders.factory import get_video_decoder
+from api.algorithms.emotion_classifiers.base import BaseEmotionClassifier
+from api.algorithms.emotion_classifiers.factory import get_emotion_classifier
+from api.algorithms.face_detectors.ssd import SsdFaceDetector
+from api.algorithms.frame_context import FrameContext
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.common.constants.emotions import EMOTION_FACE_SIZE, EmotionsInferenceBackend
+from api.common.utils.video import calculate_optimal_size, extract_metadata
+
+
+# Videos used for the benchmark
+VIDEOS = [
+    "tests/videos/attention_level/test_video_7.mp4",
+    "tests/videos/attention_level/test_video_8.mp4",
+]
+
+# Inference backends to compare (the first one is the reference for the agreement)
+BACKENDS = [
+    EmotionsInferenceBackend.KERAS,
+    EmotionsInferenceBackend.TFLITE,
+    EmotionsInferenceBackend.OPENCV,
+]
+
+# Batch sizes to compare
+BATCH_SIZES = [1, 8, 32, 64]
+
+# Number of runs for each batch size (the best one is reported)
+REPEATS = 3
+
+
+def load_faces(video_path: str) -> np.ndarray:
+    """
+    Extract the faces of the video as the emotions pipe does (48x48 grayscale, one face per frame).
+    """
+    metadata = extract_metadata(video_path)
+    if metadata is None:
+        raise ValueError(f"Unable to extract the metadata of '{video_path}'")
+    settings = VideoAnalyzerSettings(metadata=metadata, discarded_frames=0)
+    frame_size = calculate_optimal_size(metadata, settings.video_resolution)
+    decoder = get_video_decoder(settings, frame_size, discarded_frames=0)
+    detector = SsdFaceDetector(settings)
+    faces = []
+    for frame in decoder.read_frames():
+        context = FrameContext(frame)
+        face = detector.detect(context)
+        if face is None:
+            continue
+        extracted_face = context.gray[face.top:face.bottom, face.left:face.right]
+        if extracted_face.size > 0:
+            faces.append(cv2.resize(extracted_face, EMOTION_FACE_SIZE))
+    return np.asarray(faces, dtype=np.float32).reshape(-1, *EMOTION_FACE_SIZE, 1)
+
+
+def predict(classifier: BaseEmotionClassifier, faces: np.ndarray, batch_size: int) -> np.ndarray:
+    return np.concatenate([
+        classifier.predict(faces[i:i + batch_size])
+        for i in range(0, len(faces), batch_size)
+    ])
+
+
+def measure_latency(classifier: BaseEmotionClassifier, faces: np.ndarray, batch_size: int) -> float:
+    """
+    Measure the mean latency (in milliseconds) of a batch with the given size.
+    """
+    best_time = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        predict(classifier, faces, batch_size)
+        best_time = min(best_time, time.perf_counter() - start)
+    return best_time * 1000 / np.ceil(len(faces) / batch_size)
+
+
+classifiers: dict[str, BaseEmotionClassifier] = {}
+for backend in BACKENDS:
+    try:
+        classifiers[backend] = get_emotion_classifier(backend)
+    except Exception as e:
+        print(f"Skipping backend '{backend}': {e}")
+
+for video_path in VIDEOS:
+    faces = load_faces(video_path)
+    if len(faces) == 0:
+        print(f"{video_path} (no faces)")
+        continue
+
+    print(f"{video_path} ({len(faces)} faces)")
+    reference = None
+    print(f"{'Backend':>8} | {'Batch size':>10} | {'ms/batch':>9} | {'Max abs diff':>12} | {'Argmax agreement':>16}")
+    for backend, classifier in classifiers.items():
+        predictions = predict(classifier, faces, max(BATCH_SIZES)) # Also warms up the backend
+        reference = predictions if reference is None else reference
+        max_diff = float(np.abs(predictions - reference).max())
+        agreement = float((predictions.argmax(axis=1) == reference.argmax(axis=1)).mean() * 100)
+        for batch_size in BATCH_SIZES:
+            latency = measure_latency(classifier, faces, batch_size)
+            print(f"{backend:>8} | {batch_size:>10} | {latency:>9.2f} | {max_diff:>12.5f} | {agreement:>15.1f}%")
+    print()
@@ -0,0 +1,77 @@
+import os
+import sys
+
+
+# Initial setup
+
+app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(app_path) # This is to allow the import of config.py and any static resource file
+os.chdir(app_path) # This is to allow the import any api module
+
+from api.common.constants.runtime import Environment
+os.environ[Environment.DEV_MODE] = "true"
+
+
+###
+
+
+import time
+from api.algorithms.decoders.factory import get_video_decoder
+from api.algorithms.face_detectors.ssd import SsdFaceDetector
+from api.algorithms.frame_context import FrameContext
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.common.utils.video import calculate_optimal_size, extract_metadata
+
+
+# Videos used for the benchmark
+VIDEOS = [
+    "tests/videos/attention_level/test_video_7.mp4",
+    "tests/videos/attention_level/test_video_8.mp4",
+]
+
+# Batch sizes to compare
+BATCH_SIZES = [1, 2, 4, 8, 16, 32]
+
+# Number of runs for each batch size (the best one is reported)
+REPEATS = 3
+
+
+def load_frames(video_path: str) -> tuple[VideoAnalyzerSettings, list[FrameContext]]:
+    """
+    Decode all the frames of the video at the analysis resolution.
+    """
+    metadata = extract_metadata(video_path)
+    if metadata is None:
+        raise ValueError(f"Unable to extract the metadata of '{video_path}'")
+    settings = VideoAnalyzerSettings(metadata=metadata, discarded_frames=0)
+    frame_size = calculate_optimal_size(metadata, settings.video_resolution)
+    decoder = get_video_decoder(settings, frame_size, discarded_frames=0)
+    return settings, [FrameContext(frame) for frame in decoder.read_frames()]
+
+
+def measure_fps(detector: SsdFaceDetector, frames: list[FrameContext], batch_size: int) -> float:
+    """
+    Measure the frames per second of the face detector with the given batch size.
+    """
+    best_time = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for i in range(0, len(frames), batch_size):
+            detector.detect_batch(frames[i:i + batch_size])
+        best_time = min(best_time, time.perf_counter() - start)
+    return len(frames) / best_time
+
+
+for video_path in VIDEOS:
+    settings, frames = load_frames(video_path)
+    detector = SsdFaceDetector(settings)
+    detector.detect_batch(frames[:1]) # Warm-up
+
+    print(f"{video_path} ({len(frames)} frames)")
+    print(f"{'Batch size':>10} | {'FPS':>8} | {'Speedup':>7}")
+    base_fps = None
+    for batch_size in BATCH_SIZES:
+        fps = measure_fps(detector, frames, batch_size)
+        base_fps = base_fps or fps
+        print(f"{batch_size:>10} | {fps:>8.1f} | {fps / base_fps:>6.2f}x")
+    print()
@@ -0,0 +1,62 @@
+import os
+import sys
+
+
+# Initial setup
+
+app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(app_path) # This is to allow the import of config.py and any static resource file
+os.chdir(app_path) # This is to allow the import any api module
+
+from api.common.constants.runtime import Environment
+os.environ[Environment.DEV_MODE] = "true"
+
+
+###
+
+
+import time
+from api.algorithms.pipes.attention_level import AttentionLevelPipe
+from api.algorithms.settings.attention_level import AttentionLevelSettings
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.algorithms.video_analyzer import VideoAnalyzer
+from api.common.utils.video import extract_metadata
+from api.models.attention_level import AttentionLevelPipeResponse
+
+
+# Videos used for the benchmark
+VIDEOS = [
+    "tests/videos/attention_level/test_video_7.mp4",
+    "tests/videos/attention_level/test_video_8.mp4",
+]
+
+# Face detection intervals to compare (the first one is the reference for the drift)
+DETECTION_INTERVALS = [1, 2, 5, 10, 15, 30]
+
+
+def count_blinks(video_settings: VideoAnalyzerSettings) -> tuple[int, float]:
+    """
+    Count the blinks in the video. Returns the number of blinks and the analysis time.
+    """
+    pipe = AttentionLevelPipe(AttentionLevelSettings(video_settings=video_settings))
+    video_analyzer = VideoAnalyzer(video_settings, {"attentionLevel": pipe})
+    start = time.perf_counter()
+    result: AttentionLevelPipeResponse = video_analyzer.run()["attentionLevel"]
+    return result.blinks, time.perf_counter() - start
+
+
+for video_path in VIDEOS:
+    metadata = extract_metadata(video_path)
+    if metadata is None:
+        raise ValueError(f"Unable to extract the metadata of '{video_path}'")
+
+    print(f"{video_path} ({metadata.frame_count} frames)")
+    print(f"{'Interval':>8} | {'Blinks':>6} | {'Drift':>5} | {'Time (s)':>8} | {'Speedup':>7}")
+    reference_blinks, reference_time = None, None
+    for interval in DETECTION_INTERVALS:
+        video_settings = VideoAnalyzerSettings(metadata=metadata, face_detection_interval=interval)
+        blinks, analysis_time = count_blinks(video_settings)
+        reference_blinks = blinks if reference_blinks is None else reference_blinks
+        reference_time = analysis_time if reference_time is None else reference_time
+        print(f"{interval:>8} | {blinks:>6} | {blinks - reference_blinks:>+5} | {analysis_time:>8.2f} | {reference_time / analysis_time:>6.2f}x")
+    print()
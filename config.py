@@ -2,8 +2,12 @@ import os
 import sys
 import logging.config
 from dotenv import load_dotenv
+from api.common.constants.cache import DEFAULT_ANALYSIS_CACHE_SIZE
+from api.common.constants.emotions import DEFAULT_EMOTIONS_INFERENCE_BACKEND, VALID_EMOTIONS_INFERENCE_BACKENDS
+from api.common.constants.jobs import DEFAULT_JOB_QUEUE_SIZE, DEFAULT_JOB_TTL, DEFAULT_JOB_WORKERS
 from api.common.constants.persistence import DB_EXTENSION_BY_STRATEGY, PersistenceStrategy
 from api.common.constants.runtime import Environment, RuntimeArgs
+from api.common.constants.video import DEFAULT_FRAME_STORE_MAX_SIZE, DEFAULT_MAX_UPLOAD_SIZE, DEFAULT_PROXY_FRAME_RATE, VideoResolution, VideoUploadMode
 from api.common.utils.os import get_env, join_path
 from api.common.utils.runtime import has_arg
 
@@ -26,12 +30,31 @@ BASE_DB_EXTENSION = DB_EXTENSION_BY_STRATEGY[BASE_DB_STRATEGY]
 class AppConfig:
     IS_DEV = IS_DEV
     PORT = int(get_env(Environment.PORT, 8000))
+    PRELOAD_MODELS = get_env(Environment.PRELOAD_MODELS, "true").lower() == "true"
 
     class Videos:
         TEMP_PATH = join_path(BASE_STORAGE_PATH, "temp")
         STORAGE_PATH = join_path(BASE_STORAGE_PATH, "videos")
         DB_STRATEGY = BASE_DB_STRATEGY
         DB_PATH = join_path(BASE_STORAGE_PATH, f"videos{BASE_DB_EXTENSION}")
+        REFERENCES_DB_PATH = join_path(BASE_STORAGE_PATH, f"video_references{BASE_DB_EXTENSION}")
+        MAX_UPLOAD_SIZE = int(get_env(Environment.MAX_UPLOAD_SIZE, DEFAULT_MAX_UPLOAD_SIZE))
+        UPLOAD_MODE = get_env(Environment.VIDEO_UPLOAD_MODE, VideoUploadMode.ORIGINAL)
+        PROXY_RESOLUTION = get_env(Environment.PROXY_RESOLUTION, VideoResolution.LOW)
+        PROXY_FRAME_RATE = float(get_env(Environment.PROXY_FRAME_RATE, DEFAULT_PROXY_FRAME_RATE))
+        PROXY_GRAYSCALE = get_env(Environment.PROXY_GRAYSCALE, "false").lower() == "true"
+
+    class Jobs:
+        WORKERS = int(get_env(Environment.JOB_WORKERS, DEFAULT_JOB_WORKERS))
+        QUEUE_SIZE = int(get_env(Environment.JOB_QUEUE_SIZE, DEFAULT_JOB_QUEUE_SIZE))
+        TTL = float(get_env(Environment.JOB_TTL, DEFAULT_JOB_TTL))
+        DB_STRATEGY = BASE_DB_STRATEGY
+        DB_PATH = join_path(BASE_STORAGE_PATH, f"jobs{BASE_DB_EXTENSION}")
+
+    class AnalysisCache:
+        MAX_SIZE = int(get_env(Environment.ANALYSIS_CACHE_SIZE, DEFAULT_ANALYSIS_CACHE_SIZE))
+        DB_STRATEGY = BASE_DB_STRATEGY
+        DB_PATH = join_path(BASE_STORAGE_PATH, f"analysis_cache{BASE_DB_EXTENSION}")
 
     class Swagger:
         TITLE = "Edutrackr AI"
@@ -43,6 +66,12 @@ class AppConfig:
         API_KEY_NAME = "api_key"
 
 class AIConfig:
+    PROCESS_POOL_SIZE = int(get_env(Environment.PROCESS_POOL_SIZE, os.cpu_count() or 1))
+
+    class FrameStore:
+        PATH = join_path(BASE_STORAGE_PATH, "frames")
+        MAX_SIZE = int(get_env(Environment.FRAME_STORE_MAX_SIZE, DEFAULT_FRAME_STORE_MAX_SIZE))
+
     class Blinking:
         SHAPE_PREDICTOR_PATH = join_path(app_path, "resources/blinking/shape_predictor_68_face_landmarks.dat")
 
@@ -50,6 +79,16 @@ class AIConfig:
         PROTOTXT_PATH = join_path(app_path, "resources/emotions/face_detector/deploy.prototxt")
         WEIGHTS_PATH = join_path(app_path, "resources/emotions/face_detector/res10_300x300_ssd_iter_140000.caffemodel")
         CLASSIFICATION_MODEL_PATH = join_path(app_path, "resources/emotions/modelFEC.h5")
+        CLASSIFICATION_TFLITE_MODEL_PATH = join_path(app_path, "resources/emotions/modelFEC.tflite")
+        CLASSIFICATION_ONNX_MODEL_PATH = join_path(app_path, "resources/emotions/modelFEC.onnx")
+        INFERENCE_BACKEND = get_env(Environment.EMOTIONS_INFERENCE_BACKEND, DEFAULT_EMOTIONS_INFERENCE_BACKEND)
+
+# Fail at startup instead of at the first analysis
+if AIConfig.Emotions.INFERENCE_BACKEND not in VALID_EMOTIONS_INFERENCE_BACKENDS:
+    raise ValueError(
+        f"Invalid value for environment variable '{Environment.EMOTIONS_INFERENCE_BACKEND}': {AIConfig.Emotions.INFERENCE_BACKEND} "
+        f"(use one of: {', '.join(VALID_EMOTIONS_INFERENCE_BACKENDS)})"
+    )
 
 class TestingConfig:
     TEMP_PATH = os.path.join(os.getcwd(), "tests/.temp")
@@ -1,5 +1,6 @@
 import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -10,14 +11,22 @@ from config import AppConfig
 from api.routes.app import router
 from api.common.constants.runtime import RuntimeArgs
 from api.common.utils.runtime import has_arg
+from api.services.startup import run_startup
 
 
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the models before serving the first request
+    app.state.startup_report = run_startup()
+    yield
+
 app = FastAPI(
     title=AppConfig.Swagger.TITLE,
     description=AppConfig.Swagger.DESCRIPTION,
     version=AppConfig.Swagger.VERSION,
+    lifespan=lifespan,
 )
 app.include_router(router)
 
@@ -0,0 +1,47 @@
+import os
+import sys
+
+
+# Initial setup
+
+app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(app_path) # This is to allow the import of config.py and any static resource file
+os.chdir(app_path) # This is to allow the import any api module
+
+from api.common.constants.runtime import Environment
+os.environ[Environment.DEV_MODE] = "true"
+
+
+###
+
+
+# Converts the Keras emotion classification model to the formats used by the lean inference backends:
+# - TensorFlow Lite (`EmotionsInferenceBackend.TFLITE`)
+# - ONNX, run with OpenCV DNN (`EmotionsInferenceBackend.OPENCV`). Requires `pip install tf2onnx`.
+
+
+import tensorflow as tf
+from keras.models import load_model
+from api.common.constants.emotions import EMOTION_FACE_SIZE
+from config import AIConfig
+
+
+model = load_model(AIConfig.Emotions.CLASSIFICATION_MODEL_PATH)
+
+# TensorFlow Lite
+converter = tf.lite.TFLiteConverter.from_keras_model(model)
+tflite_model = converter.convert()
+with open(AIConfig.Emotions.CLASSIFICATION_TFLITE_MODEL_PATH, "wb") as file:
+    file.write(tflite_model)
+print(f"TensorFlow Lite model saved to '{AIConfig.Emotions.CLASSIFICATION_TFLITE_MODEL_PATH}'")
+
+# ONNX (the batch dimension is dynamic, so any chunk size can be classified)
+import tf2onnx
+input_signature = [tf.TensorSpec((None, *EMOTION_FACE_SIZE, 1), tf.float32, name="input")]
+tf2onnx.convert.from_keras(
+    model,
+    input_signature=input_signature,
+    opset=13,
+    output_path=AIConfig.Emotions.CLASSIFICATION_ONNX_MODEL_PATH
+)
+print(f"ONNX model saved to '{AIConfig.Emotions.CLASSIFICATION_ONNX_MODEL_PATH}'")
@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from api.algorithms.frame_context import FaceBox, FrameContext
+from api.algorithms.pipes import attention_level
+from api.algorithms.pipes.attention_level import AttentionLevelPipe
+from api.algorithms.settings.attention_level import AttentionLevelSettings
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.common.constants.face_detection import FaceDetector
+from api.models.attention_level import AttentionLevelPartialState
+from api.models.videos import FullVideoMetadata
+
+OPEN = 0.3
+CLOSED = 0.1
+NO_FACE = None
+
+
+class AttentionLevelPipeTest(unittest.TestCase):
+    """
+    Tests the blink counting with the eye aspect ratios (EAR) of each frame, instead of a face landmarks model.
+    """
+
+    def setUp(self):
+        metadata = FullVideoMetadata(video_path="video.mp4", frame_count=20, width=64, height=48, aspect_ratio="4:3", avg_fps=10, duration=2)
+        self.settings = AttentionLevelSettings(VideoAnalyzerSettings(metadata=metadata, discarded_frames=0), eye_ratio_threshold=0.2)
+        patches = [
+            mock.patch.object(attention_level.face_landmarks_predictor, "get", lambda: lambda gray, face: None),
+            mock.patch.object(attention_level, "landmarks_to_array", lambda landmarks: np.zeros((68, 2))),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+    def analyze(self, ears: list[float | None]) -> AttentionLevelPipe:
+        pipe = AttentionLevelPipe(self.settings)
+        pipe.reset_state()
+        contexts = []
+        for index, ear in enumerate(ears):
+            context = FrameContext(np.zeros((48, 64, 3), dtype=np.uint8), index)
+            context.faces = {FaceDetector.HOG: None if ear is None else FaceBox(left=0, top=0, right=10, bottom=10)}
+            contexts.append(context)
+        eye_aspect_ratios = iter(ear for ear in ears if ear is not None)
+        with mock.patch.object(AttentionLevelPipe, "_AttentionLevelPipe__eye_aspect_ratio", lambda self, eyes: np.array([next(eye_aspect_ratios)])):
+            pipe.analyze_frames(contexts)
+        return pipe
+
+
+    def analyze_segments(self, segments: list[list[float | None]]) -> AttentionLevelPipe:
+        pipe = AttentionLevelPipe(self.settings)
+        pipe.reset_state()
+        for segment in segments:
+            pipe.merge_partial_state(self.analyze(segment).get_partial_state())
+        return pipe
+
+
+    def test01_blink_across_segments(self):
+        # The eye is closed at the end of a segment and open at the start of the next one
+        segments = [[OPEN, CLOSED, OPEN, CLOSED], [OPEN, OPEN, CLOSED, OPEN]]
+        single_pass = self.analyze([ear for segment in segments for ear in segment])
+        self.assertEqual(single_pass.get_final_result().blinks, 3)
+        self.assertEqual(self.analyze_segments(segments).get_final_result(), single_pass.get_final_result())
+
+
+    def test02_closed_eye_across_segments(self):
+        # The eye is still closed at the start of the next segment, so the blink is registered in that segment
+        segments = [[OPEN, CLOSED], [CLOSED, OPEN], [CLOSED], [CLOSED, CLOSED, OPEN]]
+        single_pass = self.analyze([ear for segment in segments for ear in segment])
+        self.assertEqual(single_pass.get_final_result().blinks, 2)
+        self.assertEqual(self.analyze_segments(segments).get_final_result(), single_pass.get_final_result())
+
+
+    def test03_segments_without_faces(self):
+        # A segment without faces keeps the eye state of the previous segment
+        segments = [[OPEN, CLOSED], [NO_FACE, NO_FACE], [NO_FACE, OPEN]]
+        single_pass = self.analyze([ear for segment in segments for ear in segment])
+        self.assertEqual(single_pass.get_final_result().blinks, 1)
+        self.assertEqual(self.analyze_segments(segments).get_final_result(), single_pass.get_final_result())
+
+
+    def test04_merge_partial_state(self):
+        pipe = AttentionLevelPipe(self.settings)
+        pipe.reset_state()
+        pipe.merge_partial_state(AttentionLevelPartialState(blinks=2, first_eye_closed=False, eye_closed=True))
+        pipe.merge_partial_state(AttentionLevelPartialState(blinks=1, first_eye_closed=False, eye_closed=False))
+        self.assertEqual(pipe.get_partial_state(), AttentionLevelPartialState(blinks=4, first_eye_closed=False, eye_closed=False))
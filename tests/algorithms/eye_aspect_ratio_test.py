@@ -0,0 +1,33 @@
+import unittest
+import dlib
+import numpy as np
+from api.algorithms.eye_aspect_ratio import landmarks_to_array, optimized_ear, optimized_ear_array, original_ear, original_ear_array
+
+
+class EyeAspectRatioTest(unittest.TestCase):
+    def setUp(self):
+        random = np.random.default_rng(0)
+        # Landmarks of both eyes for many frames (frames x eyes x points x coordinates)
+        self.eyes = random.integers(0, 640, size=(50, 2, 6, 2), dtype=np.int32)
+
+    def test01_original_ear_array(self):
+        expected = np.array([[original_ear(eye) for eye in frame] for frame in self.eyes])
+        np.testing.assert_allclose(original_ear_array(self.eyes), expected)
+        np.testing.assert_allclose(original_ear_array(self.eyes[0]), expected[0])
+
+    def test02_optimized_ear_array(self):
+        expected = np.array([[optimized_ear(eye) for eye in frame] for frame in self.eyes])
+        np.testing.assert_allclose(optimized_ear_array(self.eyes), expected)
+        np.testing.assert_allclose(optimized_ear_array(self.eyes[0]), expected[0])
+
+    def test03_invalid_eye_landmarks(self):
+        with self.assertRaises(ValueError):
+            optimized_ear_array(np.zeros((2, 5, 2), dtype=np.int32))
+
+    def test04_landmarks_to_array(self):
+        points = [dlib.point(i, 100 + i) for i in range(68)] # type: ignore
+        landmarks = dlib.full_object_detection(dlib.rectangle(0, 0, 200, 200), points) # type: ignore
+        array = landmarks_to_array(landmarks)
+        self.assertEqual(array.shape, (68, 2))
+        np.testing.assert_array_equal(array[:, 0], np.arange(68))
+        np.testing.assert_array_equal(array[:, 1], np.arange(68) + 100)
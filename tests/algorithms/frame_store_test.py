@@ -0,0 +1,46 @@
+import os
+import shutil
+import unittest
+
+import numpy as np
+
+from api.algorithms.frame_store import FrameStore
+from config import TestingConfig
+
+class FrameStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(TestingConfig.TEMP_PATH, 'frames')
+        self.video_path = os.path.join(TestingConfig.TEMP_PATH, 'video.mp4')
+        os.makedirs(TestingConfig.TEMP_PATH, exist_ok=True)
+        with open(self.video_path, 'wb') as file:
+            file.write(b'video')
+        self.store = FrameStore(self.path, max_size=1024 * 1024)
+        self.frames = [np.full((4, 6, 3), i, dtype=np.uint8) for i in range(5)]
+        self.key = self.store.get_key(self.video_path, 'params')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.remove(self.video_path)
+
+
+    def test01_write_and_read(self):
+        self.assertIsNone(self.store.read(self.key))
+        written = list(self.store.write_through(self.key, self.video_path, self.frames))
+        self.assertEqual(len(written), len(self.frames))
+        np.testing.assert_array_equal(self.store.read(self.key), np.stack(self.frames))
+        self.store.evict(self.video_path)
+        self.assertIsNone(self.store.read(self.key))
+
+
+    def test02_cleared_while_writing(self):
+        # The analysis still gets all the frames, and the dropped entry is not saved
+        written = []
+        for frame in self.store.write_through(self.key, self.video_path, self.frames):
+            written.append(frame)
+            if len(written) == 2:
+                self.store.clear()
+        self.assertEqual(len(written), len(self.frames))
+        self.assertIsNone(self.store.read(self.key))
+        self.assertEqual(os.listdir(self.path), [])
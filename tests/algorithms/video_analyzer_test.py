@@ -0,0 +1,189 @@
+import os
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from api.algorithms.face_detectors.base import BaseFaceDetector
+from api.algorithms.face_detectors.factory import get_face_detector
+from api.algorithms.frame_context import FaceBox, FrameContext
+from api.algorithms.pipes.base import BaseAnalysisPipe
+from api.algorithms.settings.video_analyzer import VideoAnalyzerSettings
+from api.algorithms.video_analyzer import VideoAnalyzer
+from api.common.constants.face_detection import FaceDetector
+from api.common.utils.video import calculate_frame_step
+from api.models.videos import FullVideoMetadata
+from config import AIConfig
+
+VIDEO_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "videos/attention_level/test_video_7.mp4")
+
+
+def load_metadata(video_path: str) -> FullVideoMetadata:
+    capture = cv2.VideoCapture(video_path)
+    try:
+        width, height = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        frame_count, fps = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)), capture.get(cv2.CAP_PROP_FPS)
+    finally:
+        capture.release()
+    return FullVideoMetadata(
+        video_path=video_path,
+        frame_count=frame_count,
+        width=width,
+        height=height,
+        aspect_ratio="16:9",
+        avg_fps=round(fps, 2),
+        duration=round(frame_count / fps, 2),
+    )
+
+
+class FakeSsdFaceDetector(BaseFaceDetector):
+    """
+    Stands for the SSD detector (its model files are not part of the repository), returning a box that no HOG detection matches.
+    """
+
+    def detect(self, context: FrameContext) -> FaceBox | None:
+        return FaceBox(left=0, top=0, right=1, bottom=1, confidence=1.0)
+
+
+def create_face_detector(face_detector: str, video_settings: VideoAnalyzerSettings) -> BaseFaceDetector:
+    if face_detector == FaceDetector.SSD:
+        return FakeSsdFaceDetector(video_settings)
+    return get_face_detector(face_detector, video_settings)
+
+
+class FaceRecordingSettings:
+    def __init__(self, video_settings: VideoAnalyzerSettings, frame_rate: float | None = None):
+        self.video_settings = video_settings
+        self.frame_rate = frame_rate
+
+
+class FaceRecordingPipe(BaseAnalysisPipe[dict]):
+    """
+    Records the face received in each analyzed frame.
+    """
+
+    def __init__(self, settings: FaceRecordingSettings):
+        super().__init__()
+        self._settings = settings
+
+    def reset_state(self) -> None:
+        self._faces = {}
+
+    def _analyze_frame(self, context: FrameContext) -> None:
+        face = self._get_face(context)
+        self._faces[context.index] = None if face is None else (face.left, face.top, face.right, face.bottom)
+
+    def get_final_result(self) -> dict:
+        return self._faces
+
+
+class FailingPipe(FaceRecordingPipe):
+    """
+    Fails when it receives its first frame.
+    """
+
+    def _analyze_frame(self, context: FrameContext) -> None:
+        raise RuntimeError("Pipe failed")
+
+
+class HogFaceRecordingPipe(FaceRecordingPipe):
+    face_detector = FaceDetector.HOG
+
+
+class SsdFaceRecordingPipe(FaceRecordingPipe):
+    face_detector = FaceDetector.SSD
+
+
+class VideoAnalyzerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.video_settings = VideoAnalyzerSettings(metadata=load_metadata(VIDEO_PATH), discarded_frames=0)
+
+
+    @mock.patch("api.algorithms.video_analyzer.get_face_detector", create_face_detector)
+    def test01_faces_by_preferred_detector(self):
+        # The attention level pipe gets the same (HOG) faces when it runs alone and along with a pipe preferring SSD
+        standalone = VideoAnalyzer(self.video_settings, {
+            "hog": HogFaceRecordingPipe(FaceRecordingSettings(self.video_settings)),
+        }).run()
+        unified = VideoAnalyzer(self.video_settings, {
+            "ssd": SsdFaceRecordingPipe(FaceRecordingSettings(self.video_settings, frame_rate=3)),
+            "hog": HogFaceRecordingPipe(FaceRecordingSettings(self.video_settings)),
+        }).run()
+
+        self.assertEqual(unified["hog"], standalone["hog"])
+        self.assertTrue(any(face is not None for face in standalone["hog"].values()))
+        self.assertEqual(len(standalone["hog"]), self.video_settings.metadata.frame_count)
+        # The SSD pipe only gets the faces of its own detector, on the frames at its own frame rate
+        self.assertEqual(set(unified["ssd"].values()), {(0, 0, 1, 1)})
+        ssd_step = calculate_frame_step(self.video_settings.metadata, self.video_settings.discarded_frames, 3)
+        self.assertEqual(sorted(unified["ssd"]), list(range(0, self.video_settings.metadata.frame_count, ssd_step)))
+
+
+    @mock.patch("api.algorithms.video_analyzer.get_face_detector", create_face_detector)
+    def test02_faces_by_configured_detector(self):
+        # A detector set in the settings is shared by all the pipes
+        self.video_settings.face_detector = FaceDetector.SSD
+        result = VideoAnalyzer(self.video_settings, {
+            "hog": HogFaceRecordingPipe(FaceRecordingSettings(self.video_settings)),
+        }).run()
+        self.assertEqual(set(result["hog"].values()), {(0, 0, 1, 1)})
+
+
+    def test03_invalid_face_detection_scale(self):
+        for scale in (0, -0.5, 1.5):
+            with self.assertRaises(ValueError):
+                VideoAnalyzerSettings(metadata=self.video_settings.metadata, face_detection_scale=scale)
+        self.assertEqual(VideoAnalyzerSettings(metadata=self.video_settings.metadata, face_detection_scale=0.5).face_detection_scale, 0.5)
+        # A scale changed after the settings were validated is rejected by the detector
+        self.video_settings.face_detection_scale = 1.5
+        with self.assertRaises(ValueError):
+            get_face_detector(FaceDetector.HOG, self.video_settings)
+
+
+    def test04_multithreaded_stops_on_failed_pipe(self):
+        # The frames are no longer fanned out to the pipes once a pipe failed
+        self.video_settings.batch_size = 1
+        self.video_settings.frame_queue_size = 1
+        analyzer = VideoAnalyzer(self.video_settings, {
+            "failing": FailingPipe(FaceRecordingSettings(self.video_settings)),
+            "hog": FaceRecordingPipe(FaceRecordingSettings(self.video_settings)),
+        })
+        analyzer._reset()
+        produced_batches = 0
+
+        def read_batches():
+            nonlocal produced_batches
+            for index in range(1000):
+                produced_batches += 1
+                yield [FrameContext(np.zeros((4, 4, 3), dtype=np.uint8), index)]
+
+        with self.assertRaises(RuntimeError):
+            analyzer._analyze_multithreaded(read_batches())
+        self.assertLess(produced_batches, 1000)
+
+
+    @unittest.skipUnless(
+        all(os.path.exists(path) for path in (
+            AIConfig.Blinking.SHAPE_PREDICTOR_PATH,
+            AIConfig.Emotions.PROTOTXT_PATH,
+            AIConfig.Emotions.WEIGHTS_PATH,
+            AIConfig.Emotions.CLASSIFICATION_MODEL_PATH,
+        )),
+        "The model files are not available"
+    )
+    def test05_unified_attention_level(self):
+        from api.algorithms.pipes.attention_level import AttentionLevelPipe
+        from api.algorithms.pipes.emotions import EmotionsPipe
+        from api.algorithms.settings.attention_level import AttentionLevelSettings
+        from api.algorithms.settings.emotions import EmotionsSettings
+
+        standalone = VideoAnalyzer(self.video_settings, {
+            "attentionLevel": AttentionLevelPipe(AttentionLevelSettings(self.video_settings)),
+        }).run()
+        unified = VideoAnalyzer(self.video_settings, {
+            "emotions": EmotionsPipe(EmotionsSettings(self.video_settings)),
+            "attentionLevel": AttentionLevelPipe(AttentionLevelSettings(self.video_settings)),
+        }).run()
+        self.assertEqual(unified["attentionLevel"], standalone["attentionLevel"])
@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+
+from starlette.requests import Request
+
+from api.common.exceptions import AppException
+from api.common.utils.upload_stream import UploadStream
+
+BOUNDARY = "test-boundary"
+
+
+def create_request(body: bytes, body_chunk_size: int, content_type: str = f"multipart/form-data; boundary={BOUNDARY}") -> Request:
+    chunks = [body[start:start + body_chunk_size] for start in range(0, len(body), body_chunk_size)]
+
+    async def receive():
+        chunk = chunks.pop(0) if chunks else b""
+        return {"type": "http.request", "body": chunk, "more_body": len(chunks) > 0}
+
+    headers = [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers}, receive)
+
+
+def create_form(*parts: tuple[str, str | None, bytes]) -> bytes:
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename is not None else "")
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+async def read_upload(upload: UploadStream, size: int) -> tuple[str | None, list[bytes]]:
+    # The upload is read in a single event loop, as the request body stream is closed with its loop
+    filename = await upload.open()
+    chunks = []
+    while filename is not None and (chunk := await upload.read(size)):
+        chunks.append(chunk)
+    return filename, chunks
+
+
+class UploadStreamTest(unittest.TestCase):
+
+    def test01_read_file_in_chunks(self):
+        content = bytes(range(256)) * 40
+        body = create_form(("name", None, b"ignored"), ("video", "video.mp4", content))
+        upload = UploadStream(create_request(body, body_chunk_size=100), "video")
+
+        filename, chunks = asyncio.run(read_upload(upload, 1000))
+        self.assertEqual(filename, "video.mp4")
+        self.assertEqual(b"".join(chunks), content)
+        # Chunks are at least the requested size, except the last one
+        self.assertTrue(all(len(chunk) >= 1000 for chunk in chunks[:-1]))
+
+
+    def test02_missing_file(self):
+        upload = UploadStream(create_request(create_form(("other", "video.mp4", b"data")), body_chunk_size=10), "video")
+        self.assertEqual(asyncio.run(read_upload(upload, 1000)), (None, []))
+
+
+    def test03_incomplete_upload(self):
+        body = create_form(("video", "video.mp4", b"data" * 100))
+        upload = UploadStream(create_request(body[:200], body_chunk_size=50), "video")
+        with self.assertRaises(AppException):
+            asyncio.run(read_upload(upload, 1000))
+
+
+    def test04_not_multipart(self):
+        with self.assertRaises(AppException):
+            UploadStream(create_request(b"{}", body_chunk_size=10, content_type="application/json"), "video")
@@ -0,0 +1,63 @@
+import unittest
+
+from api.common.utils.video import calculate_frame_step, split_video_segments
+from api.models.videos import FullVideoMetadata
+
+
+def sampled_frames(frame_count: int, start_frame: int, end_frame: int | None, discarded_frames: int) -> list[int]:
+    # Frames analyzed by a decoder that starts at `start_frame` and discards `discarded_frames` after each analyzed frame
+    return list(range(start_frame, frame_count if end_frame is None else end_frame, discarded_frames + 1))
+
+
+class SplitVideoSegmentsTest(unittest.TestCase):
+
+    def test01_boundaries_at_sampling_steps(self):
+        segments = split_video_segments(frame_count=100, segments=4, discarded_frames=2)
+        self.assertEqual([(segment.start_frame, segment.end_frame) for segment in segments], [(0, 27), (27, 54), (54, 81), (81, None)])
+
+
+    def test02_same_frames_as_single_pass(self):
+        for frame_count in (1, 7, 30, 101):
+            for segments_count in (1, 2, 3, 8):
+                for discarded_frames in (0, 1, 4):
+                    segments = split_video_segments(frame_count, segments_count, discarded_frames)
+                    self.assertLessEqual(len(segments), segments_count)
+                    frames = [
+                        frame
+                        for segment in segments
+                        for frame in sampled_frames(frame_count, segment.start_frame, segment.end_frame, discarded_frames)
+                    ]
+                    self.assertEqual(frames, sampled_frames(frame_count, 0, None, discarded_frames))
+
+
+    def test03_more_segments_than_frames(self):
+        segments = split_video_segments(frame_count=3, segments=8, discarded_frames=0)
+        self.assertEqual([(segment.start_frame, segment.end_frame) for segment in segments], [(0, 1), (1, 2), (2, None)])
+        # An empty video is analyzed in a single segment
+        self.assertEqual([(segment.start_frame, segment.end_frame) for segment in split_video_segments(0, 4, 0)], [(0, None)])
+
+
+    def test04_boundary_times(self):
+        timestamps = [0.0, 0.1, 0.3, 0.4]
+        segments = split_video_segments(frame_count=4, segments=2, discarded_frames=0, timestamps=timestamps)
+        self.assertEqual([(segment.start_time, segment.end_time) for segment in segments], [(None, 0.2), (0.2, None)])
+
+
+class CalculateFrameStepTest(unittest.TestCase):
+
+    def create_metadata(self, avg_fps: float) -> FullVideoMetadata:
+        return FullVideoMetadata(video_path="video.mp4", frame_count=100, width=64, height=48, aspect_ratio="4:3", avg_fps=avg_fps, duration=10)
+
+
+    def test01_never_below_frame_rate(self):
+        # Half steps are rounded down too, whatever the parity of the step
+        for avg_fps, expected_step in ((7.5, 2), (10.5, 3), (9, 3), (30, 10), (2, 1)):
+            step = calculate_frame_step(self.create_metadata(avg_fps), discarded_frames=0, frame_rate=3)
+            self.assertEqual(step, expected_step)
+            self.assertGreaterEqual(avg_fps / step, 3 if avg_fps >= 3 else avg_fps)
+
+
+    def test02_discarded_frames(self):
+        # The frame rate can only reduce the sampled frames
+        self.assertEqual(calculate_frame_step(self.create_metadata(30), discarded_frames=14, frame_rate=3), 15)
+        self.assertEqual(calculate_frame_step(self.create_metadata(30), discarded_frames=1, frame_rate=None), 2)
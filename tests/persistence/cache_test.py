@@ -0,0 +1,45 @@
+import os
+import unittest
+
+from api.persistence.cache import LRUObjectCache
+from api.persistence.simple import SimpleObjectStore
+from config import TestingConfig
+
+class LRUObjectCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db_file_path = os.path.join(TestingConfig.TEMP_PATH, 'cache.json')
+        self.store = SimpleObjectStore(file_path=self.db_file_path)
+        self.cache = LRUObjectCache(self.store, max_size=2)
+
+
+    def tearDown(self):
+        os.remove(self.db_file_path)
+
+
+    def test01_least_recently_used_eviction(self):
+        self.cache.set('video1', 'a', {'value': 1})
+        self.cache.set('video1', 'b', {'value': 2})
+        self.assertEqual(self.cache.get('video1', 'a'), {'value': 1})
+        self.cache.set('video2', 'c', {'value': 3})
+        self.assertIsNone(self.cache.get('video1', 'b'))
+        self.assertEqual(sorted(self.store.get_all()), ['video1:a', 'video2:c'])
+
+
+    def test02_evict_owner(self):
+        self.cache.set('video1', 'a', {'value': 1})
+        self.cache.set('video2', 'b', {'value': 2})
+        self.cache.evict('video1')
+        # A miss does not save the evicted entry again
+        self.assertIsNone(self.cache.get('video1', 'a'))
+        self.assertEqual(list(self.store.get_all()), ['video2:b'])
+
+
+    def test03_index_loaded_from_store(self):
+        self.cache.set('video1', 'a', {'value': 1})
+        self.cache.set('video1', 'b', {'value': 2})
+        cache = LRUObjectCache(self.store, max_size=2)
+        cache.set('video2', 'c', {'value': 3})
+        self.assertEqual(len(self.store.get_all()), 2)
+        cache.evict('video1')
+        self.assertEqual(list(self.store.get_all()), ['video2:c'])
@@ -0,0 +1,69 @@
+import json
+import os
+import unittest
+
+from api.persistence.simple import COMPACTION_MIN_ENTRIES, SimpleObjectStore
+from config import TestingConfig
+
+class SimpleObjectStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db_file_path = os.path.join(TestingConfig.TEMP_PATH, 'db.json')
+        self.db = SimpleObjectStore(file_path=self.db_file_path)
+
+
+    def tearDown(self):
+        os.remove(self.db_file_path)
+
+
+    def test01_set_add_and_delete(self):
+        self.db.set('a', {'name': 'Alice'})
+        key = self.db.add({'name': 'Bob'})
+        self.db.delete('a')
+        self.assertIsNone(self.db.get_by_id('a'))
+        self.assertEqual(self.db.get_all(), {key: {'name': 'Bob'}})
+        # Reads return copies of the records
+        self.db.get_by_id(key)['name'] = 'Charlie'
+        self.assertEqual(self.db.get_by_id(key), {'name': 'Bob'})
+
+
+    def test02_persistence(self):
+        self.db.set('a', {'value': 1})
+        self.db.set('b', {'value': 2})
+        self.db.set('a', {'value': 3})
+        self.db.delete('b')
+        self.assertEqual(SimpleObjectStore(self.db_file_path).get_all(), {'a': {'value': 3}})
+
+
+    def test03_reload_on_change(self):
+        other_db = SimpleObjectStore(self.db_file_path)
+        self.db.set('a', {'value': 1})
+        self.assertEqual(other_db.get_by_id('a'), {'value': 1})
+        other_db.clear()
+        self.assertIsNone(self.db.get_by_id('a'))
+
+
+    def test04_compaction(self):
+        for i in range(COMPACTION_MIN_ENTRIES + 1):
+            self.db.set('a', {'value': i})
+        with open(self.db_file_path, 'r') as file:
+            self.assertLessEqual(len(file.readlines()), 1)
+        self.assertEqual(self.db.get_by_id('a'), {'value': COMPACTION_MIN_ENTRIES})
+
+
+    def test05_legacy_file(self):
+        with open(self.db_file_path, 'w') as file:
+            json.dump({'a': {'value': 1}}, file, indent=4)
+        db = SimpleObjectStore(self.db_file_path)
+        self.assertEqual(db.get_all(), {'a': {'value': 1}})
+        db.set('b', {'value': 2})
+        self.assertEqual(SimpleObjectStore(self.db_file_path).get_all(), {'a': {'value': 1}, 'b': {'value': 2}})
+
+
+    def test06_incomplete_entry(self):
+        self.db.set('a', {'value': 1})
+        with open(self.db_file_path, 'a') as file:
+            file.write('{"op": "set", "key": "b", "val')
+        db = SimpleObjectStore(self.db_file_path)
+        db.set('c', {'value': 3})
+        self.assertEqual(SimpleObjectStore(self.db_file_path).get_all(), {'a': {'value': 1}, 'c': {'value': 3}})
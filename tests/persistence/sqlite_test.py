@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import threading
+import unittest
+
+from api.persistence.sqlite import SCHEMA_VERSION, STORE_TABLE, SQLiteObjectStore
+from config import TestingConfig
+
+class SQLiteObjectStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db_file_path = os.path.join(TestingConfig.TEMP_PATH, 'db.db')
+        self.db = SQLiteObjectStore(file_path=self.db_file_path)
+
+
+    def tearDown(self):
+        del self.db
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_file_path + suffix):
+                os.remove(self.db_file_path + suffix)
+
+
+    def test01_set_and_get_by_id(self):
+        self.db.set('a', {'name': 'Alice'})
+        self.db.set('a', {'name': "O'Brien"})
+        self.assertEqual(self.db.get_by_id('a'), {'name': "O'Brien"})
+        self.assertEqual(len(self.db.get_all()), 1)
+        self.assertIsNone(self.db.get_by_id("' OR '1'='1"))
+
+
+    def test02_add_delete_and_clear(self):
+        key = self.db.add({'name': 'Bob'})
+        self.db.add({'name': 'Charlie'})
+        self.db.delete(key)
+        self.assertIsNone(self.db.get_by_id(key))
+        self.assertEqual(len(self.db.get_all()), 1)
+        self.db.clear()
+        self.assertEqual(len(self.db.get_all()), 0)
+
+
+    def test03_threads(self):
+        def worker(index: int):
+            for i in range(20):
+                self.db.set(f'{index}:{i}', {'value': i})
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.db.get_all()), 80)
+
+
+    def test04_migration(self):
+        # Database with the original schema (no primary key) and a repeated key
+        del self.db
+        os.remove(self.db_file_path)
+        connection = sqlite3.connect(self.db_file_path)
+        connection.execute(f"CREATE TABLE {STORE_TABLE} (ID TEXT NOT NULL, DATA TEXT NOT NULL);")
+        connection.executemany(f"INSERT INTO {STORE_TABLE} (ID, DATA) VALUES (?, ?);", [
+            ('a', '{"value": 1}'),
+            ('b', '{"value": 2}'),
+            ('a', '{"value": 3}'),
+        ])
+        connection.commit()
+        connection.close()
+
+        self.db = SQLiteObjectStore(file_path=self.db_file_path)
+        self.assertEqual(self.db.get_all(), {'a': {'value': 3}, 'b': {'value': 2}})
+        self.db.set('b', {'value': 4})
+        self.assertEqual(self.db.get_by_id('b'), {'value': 4})
+
+        connection = sqlite3.connect(self.db_file_path)
+        self.assertEqual(connection.execute("PRAGMA user_version;").fetchone()[0], SCHEMA_VERSION)
+        self.assertEqual(connection.execute("PRAGMA journal_mode;").fetchone()[0], 'wal')
+        connection.close()
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import numpy as np
+from starlette.requests import Request
+
+from api.algorithms.frame_store import FrameStore
+from api.common.constants.video import VideoUploadMode
+from api.common.exceptions import AppException
+from api.models.videos import FullVideoMetadata
+from api.persistence.cache import LRUObjectCache
+from api.persistence.simple import SimpleObjectStore
+from api.services import videos
+from config import AppConfig, TestingConfig
+
+BOUNDARY = "test-boundary"
+
+
+def create_upload_request(filename: str, content: bytes) -> Request:
+    body = (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="video"; filename="{filename}"\r\n\r\n'.encode()
+        + content
+        + f"\r\n--{BOUNDARY}--\r\n".encode()
+    )
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers}, receive)
+
+
+def extract_video_metadata(video_path: str, video_extension: str) -> FullVideoMetadata:
+    # The uploaded content is not a real video, so its metadata is not probed
+    return FullVideoMetadata(video_path=video_path, frame_count=1, width=1, height=1, aspect_ratio="1:1", avg_fps=1, duration=1)
+
+
+class VideosServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(TestingConfig.TEMP_PATH, 'videos_service')
+        os.makedirs(self.path)
+        self.videos_db = SimpleObjectStore(os.path.join(self.path, 'videos.json'))
+        self.references_db = SimpleObjectStore(os.path.join(self.path, 'references.json'))
+        self.analysis_cache = LRUObjectCache(SimpleObjectStore(os.path.join(self.path, 'cache.json')), max_size=10)
+        self.frame_store = FrameStore(os.path.join(self.path, 'frames'), max_size=1024 * 1024)
+        patches = [
+            mock.patch.object(videos, 'videos_db', self.videos_db),
+            mock.patch.object(videos, 'references_db', self.references_db),
+            mock.patch.object(videos, 'analysis_cache', self.analysis_cache),
+            mock.patch.object(videos, 'frame_store', self.frame_store),
+            mock.patch.object(videos, '_extract_video_metadata', extract_video_metadata),
+            mock.patch.object(AppConfig.Videos, 'STORAGE_PATH', os.path.join(self.path, 'storage')),
+            mock.patch.object(AppConfig.Videos, 'TEMP_PATH', os.path.join(self.path, 'temp')),
+            mock.patch.object(AppConfig.Videos, 'UPLOAD_MODE', VideoUploadMode.ORIGINAL),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+
+    def upload(self, content: bytes, filename: str = 'video.mp4') -> str:
+        return asyncio.run(videos.upload_video(create_upload_request(filename, content), convert_video=False)).video_id
+
+
+    def test01_reupload_identical_content(self):
+        first_id = self.upload(b'video content')
+        second_id = self.upload(b'video content', filename='copy.mp4')
+
+        # Each upload gets its own ID, sharing a single stored file
+        self.assertNotEqual(first_id, second_id)
+        self.assertEqual(videos.get_video_metadata(first_id), videos.get_video_metadata(second_id))
+        content_hash = self.references_db.get_by_id(first_id)['content_hash']
+        self.assertEqual(self.references_db.get_by_id(second_id)['content_hash'], content_hash)
+        record = self.videos_db.get_by_id(content_hash)
+        self.assertEqual(record['references'], 2)
+        self.assertEqual(os.listdir(AppConfig.Videos.STORAGE_PATH), [os.path.basename(record['video_path'])])
+        self.assertNotEqual(self.references_db.get_by_id(self.upload(b'other content'))['content_hash'], content_hash)
+
+
+    def test02_add_reference_and_save_video(self):
+        self.assertIsNone(videos._add_reference('missing'))
+        video_id = self.upload(b'video content')
+        content_hash = self.references_db.get_by_id(video_id)['content_hash']
+        record = self.videos_db.get_by_id(content_hash)
+
+        reference_id = videos._add_reference(content_hash)
+        self.assertNotIn(reference_id, (None, video_id))
+        self.assertEqual(self.videos_db.get_by_id(content_hash)['references'], 2)
+        # An identical video saved in the meantime gets a reference instead of being replaced
+        saved_id, saved = videos._save_video(content_hash, {**record, 'video_path': 'other.mp4'})
+        self.assertFalse(saved)
+        self.assertEqual(self.references_db.get_by_id(saved_id)['content_hash'], content_hash)
+        self.assertEqual(self.videos_db.get_by_id(content_hash)['video_path'], record['video_path'])
+        self.assertEqual(self.videos_db.get_by_id(content_hash)['references'], 3)
+        # A reference to a removed file is replaced by the new video
+        os.remove(record['video_path'])
+        self.assertIsNone(videos._add_reference(content_hash))
+        _, saved = videos._save_video(content_hash, {**record, 'video_path': 'other.mp4'})
+        self.assertTrue(saved)
+        self.assertEqual(self.videos_db.get_by_id(content_hash)['references'], 1)
+
+
+    def test03_delete_references(self):
+        first_id = self.upload(b'video content')
+        second_id = self.upload(b'video content')
+        video_path = videos.get_video_metadata(first_id).video_path
+        self.analysis_cache.set(video_path, 'emotions', {'value': 1})
+        frames_key = self.frame_store.get_key(video_path, 'params')
+        list(self.frame_store.write_through(frames_key, video_path, [np.zeros((2, 2, 3), dtype=np.uint8)]))
+
+        # Deleting an upload keeps the file, the cached analyses and the stored frames of the other upload
+        videos.delete_video(first_id)
+        self.assertIsNone(videos.get_video_metadata(first_id))
+        self.assertTrue(os.path.exists(video_path))
+        self.assertIsNotNone(self.analysis_cache.get(video_path, 'emotions'))
+        self.assertIsNotNone(self.frame_store.read(frames_key))
+        # Deleting the same upload again (or the video by its content hash) does not remove the reference of the other upload
+        for video_id in (first_id, self.references_db.get_by_id(second_id)['content_hash']):
+            with self.assertRaises(AppException):
+                videos.delete_video(video_id)
+        self.assertEqual(videos.get_video_metadata(second_id).video_path, video_path)
+
+        # Deleting the last upload removes all of them
+        videos.delete_video(second_id)
+        self.assertIsNone(videos.get_video_metadata(second_id))
+        self.assertEqual(self.videos_db.get_all(), {})
+        self.assertFalse(os.path.exists(video_path))
+        self.assertIsNone(self.analysis_cache.get(video_path, 'emotions'))
+        self.assertIsNone(self.frame_store.read(frames_key))
+
+
+    def test04_legacy_video(self):
+        # Videos uploaded before the per-upload references are stored by their own ID
+        video_path = os.path.join(self.path, 'legacy.mp4')
+        with open(video_path, 'wb') as file:
+            file.write(b'legacy')
+        self.videos_db.set('legacy', dict(extract_video_metadata(video_path, '.mp4')))
+        self.assertEqual(videos.get_video_metadata('legacy').video_path, video_path)
+        videos.delete_video('legacy')
+        self.assertIsNone(videos.get_video_metadata('legacy'))
+        self.assertFalse(os.path.exists(video_path))
@@ -1,9 +1,15 @@
 import os
 import sys
+import shutil
+import tempfile
 
 app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(app_path)
 
+# The services create their stores when imported, so the tests use a temporal storage instead of the development one
+storage_path = tempfile.mkdtemp(prefix="edutrackr-tests-")
+os.environ["STORAGE_PATH"] = storage_path
+
 ###
 
 import unittest
@@ -22,4 +28,7 @@ if __name__ == '__main__':
     verbose = has_arg("-v") or has_arg("--verbose")
     verbosity_level = 2 if verbose else 1
     runner = unittest.TextTestRunner(verbosity=verbosity_level)
-    runner.run(suite())
+    try:
+        runner.run(suite())
+    finally:
+        shutil.rmtree(storage_path, ignore_errors=True)